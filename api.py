@@ -0,0 +1,379 @@
+# api.py - API HTTP/JSON do ParaTodos sobre asyncio (sem Streamlit e sem dependências externas)
+#
+#   python api.py --porta 8080                 # um processo
+#   python api.py --porta 8080 --processos 4   # vários processos na mesma porta (SO_REUSEPORT)
+#
+# Rotas:
+#   GET  /saude
+#   POST /usuarios   {"username", "senha", "perfil"}
+#   POST /login      {"username", "senha"}                         -> {"token", "profile"}
+#   POST /busca      {"origem": [lat, lon], "destino": [lat, lon], "necessidades": [...]}
+#   POST /corridas   {"motorista_id", "origem", "destino", "necessidades"}   (Authorization: Bearer <token>)
+#   POST /corridas/encerrar {"motorista_id"}                                (Authorization: Bearer <token>)
+#   GET  /corridas/situacao?motorista_id=<id>                              (Authorization: Bearer <token>)
+#   POST /motoristas/posicao {"motorista_id", "posicao": [lat, lon]}       (X-Chave-Rastreamento: <chave>)
+#   POST /pedidos    {"origem", "destino", "necessidades"}                   (Authorization: Bearer <token>)
+#   GET  /historico?antes_de=<id>&limite=<n>                                 (Authorization: Bearer <token>)
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import db
+import nucleo
+
+# Segredo que assina os tokens; sem ele, um aleatório por execução (tokens não sobrevivem a reinícios)
+VARIAVEL_SEGREDO = "PARATODOS_API_SEGREDO"
+VALIDADE_TOKEN_S = 12 * 3600
+MAX_CORPO = 64 * 1024
+TEMPO_OCIOSO_S = 30.0
+# Chave que os aparelhos dos motoristas enviam junto com a posição; sem ela, /motoristas/posicao recusa tudo
+VARIAVEL_CHAVE_RASTREAMENTO = "PARATODOS_RASTREAMENTO_CHAVE"
+# Consultas ao banco e busca (que pode atualizar a frota) rodam nestas threads
+TRABALHADORES_DB = db.TAMANHO_POOL
+# Login e cadastro esperam o bcrypt; a fila do servico_auth limita quantos calculam ao mesmo tempo
+TRABALHADORES_AUTH = 32
+
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+_executor_db = ThreadPoolExecutor(max_workers=TRABALHADORES_DB, thread_name_prefix="api-db")
+_executor_auth = ThreadPoolExecutor(max_workers=TRABALHADORES_AUTH, thread_name_prefix="api-auth")
+
+
+class ErroHttp(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# --- Tokens ---------------------------------------------------------------------
+
+def _segredo():
+    return os.environ[VARIAVEL_SEGREDO].encode("utf-8")
+
+
+def gerar_token(usuario, agora=None):
+    conteudo = f"{usuario}|{int((agora or time.time()) + VALIDADE_TOKEN_S)}".encode("utf-8")
+    assinatura = hmac.new(_segredo(), conteudo, hashlib.sha256).digest()
+    return (base64.urlsafe_b64encode(conteudo).decode() + "." + base64.urlsafe_b64encode(assinatura).decode())
+
+
+def validar_token(token):
+    """Retorna o usuário do token, ou None se for inválido ou estiver vencido."""
+    try:
+        parte_conteudo, parte_assinatura = token.split(".")
+        conteudo = base64.urlsafe_b64decode(parte_conteudo)
+        assinatura = base64.urlsafe_b64decode(parte_assinatura)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(hmac.new(_segredo(), conteudo, hashlib.sha256).digest(), assinatura):
+        return None
+    usuario, _, expira = conteudo.decode("utf-8").rpartition("|")
+    return usuario if int(expira) > time.time() else None
+
+
+# --- Rotas ----------------------------------------------------------------------
+
+def _usuario(cabecalhos):
+    tipo, _, token = cabecalhos.get("authorization", "").partition(" ")
+    usuario = validar_token(token) if tipo.lower() == "bearer" else None
+    if usuario is None:
+        raise ErroHttp(401, "Token ausente ou inválido.")
+    return usuario
+
+
+def _campo(dados, nome, tipo):
+    valor = dados.get(nome)
+    # Em Python bool é int: true/false do JSON não valem como número
+    if not isinstance(valor, tipo) or (isinstance(valor, bool) and tipo is not bool):
+        raise ErroHttp(400, f"Campo '{nome}' ausente ou inválido.")
+    return valor
+
+
+def _ponto(dados, nome):
+    from geo import coordenadas_validas
+
+    valor = _campo(dados, nome, list)
+    if len(valor) != 2 or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valor):
+        raise ErroHttp(400, f"Campo '{nome}' deve ser [lat, lon].")
+    # json.loads aceita NaN e Infinity
+    lat, lon = float(valor[0]), float(valor[1])
+    if not coordenadas_validas(lat, lon):
+        raise ErroHttp(400, f"Campo '{nome}' fora das coordenadas válidas.")
+    return lat, lon
+
+
+def _necessidades(dados):
+    valor = _campo(dados, "necessidades", list)
+    if not valor or not all(isinstance(n, str) for n in valor):
+        raise ErroHttp(400, "Informe ao menos uma necessidade.")
+    return valor
+
+
+async def _em(executor, funcao, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+
+
+async def rota_saude(pedido):
+    return 200, {"status": "ok"}
+
+
+async def rota_cadastro(pedido):
+    dados = pedido["json"]
+    criado = await _em(_executor_auth, nucleo.cadastrar, _campo(dados, "username", str),
+                       _campo(dados, "senha", str), _campo(dados, "perfil", str))
+    if not criado:
+        raise ErroHttp(409, "Este nome de usuário já existe.")
+    return 201, {"username": dados["username"]}
+
+
+async def rota_login(pedido):
+    dados = pedido["json"]
+    usuario = await _em(_executor_auth, nucleo.autenticar, _campo(dados, "username", str),
+                        _campo(dados, "senha", str))
+    if usuario is None:
+        raise ErroHttp(401, "Usuário ou senha inválidos.")
+    return 200, {"token": gerar_token(usuario["username"]), "profile": usuario["profile"]}
+
+
+async def rota_busca(pedido):
+    dados = pedido["json"]
+    busca = await _em(_executor_db, nucleo.buscar_motoristas, _ponto(dados, "origem"), _ponto(dados, "destino"),
+                      _necessidades(dados))
+    rota = busca.rota
+    return 200, {
+        "rota": {"distancia_km": rota.distancia_km, "duracao_min": rota.duracao_min},
+        "motoristas": [dict(m, capabilities=list(m["capabilities"])) for m in busca.motoristas],
+    }
+
+
+async def rota_corrida(pedido):
+    usuario = _usuario(pedido["cabecalhos"])
+    dados = pedido["json"]
+    try:
+        corrida = await _em(_executor_db, nucleo.chamar_motorista, usuario, _campo(dados, "motorista_id", int),
+                            _ponto(dados, "origem"), _ponto(dados, "destino"), _necessidades(dados))
+    except nucleo.MotoristaIndisponivel:
+        raise ErroHttp(409, "Motorista indisponível para estas necessidades.")
+    return 201, corrida
+
+
+async def rota_pedido(pedido):
+    """Motorista escolhido pelo despacho em lote, junto com os pedidos que chegarem na mesma janela."""
+    from despacho import obter_despachante
+
+    usuario = _usuario(pedido["cabecalhos"])
+    dados = pedido["json"]
+    origem, necessidades = _ponto(dados, "origem"), _necessidades(dados)
+    despachante = obter_despachante()
+    atribuicao = await asyncio.wrap_future(
+        despachante.pedir(usuario, origem, _ponto(dados, "destino"), necessidades))
+    if atribuicao is None:
+        raise ErroHttp(409, "Nenhum motorista disponível para estas necessidades.")
+    try:
+        corrida = await _em(_executor_db, nucleo.registrar_despacho, usuario, origem, necessidades, atribuicao)
+    except BaseException:
+        despachante.liberar(atribuicao.motorista_id)
+        raise
+    return 201, corrida
+
+
+async def rota_encerrar(pedido):
+    usuario = _usuario(pedido["cabecalhos"])
+    motorista_id = _campo(pedido["json"], "motorista_id", int)
+    if not await _em(_executor_db, nucleo.encerrar_corrida, usuario, motorista_id):
+        raise ErroHttp(404, "Nenhuma corrida sua em andamento com este motorista.")
+    return 200, {"motorista_id": motorista_id}
+
+
+def _situacao(usuario, motorista_id):
+    corrida = nucleo.acompanhar_corrida(usuario, motorista_id)
+    return None if corrida is None else corrida.situacao()
+
+
+async def rota_situacao(pedido):
+    usuario = _usuario(pedido["cabecalhos"])
+    try:
+        motorista_id = int(pedido["consulta"]["motorista_id"][0])
+    except (KeyError, ValueError):
+        raise ErroHttp(400, "Informe motorista_id.")
+    situacao = await _em(_executor_db, _situacao, usuario, motorista_id)
+    if situacao is None:
+        raise ErroHttp(404, "Nenhuma corrida sua em andamento com este motorista.")
+    return 200, {"posicao": [situacao.posicao.lat, situacao.posicao.lon], "eta_min": situacao.eta_min,
+                 "progresso": round(situacao.progresso, 3), "chegou": situacao.chegou}
+
+
+async def rota_posicao(pedido):
+    """GPS do motorista. Exige o cabeçalho X-Chave-Rastreamento igual a PARATODOS_RASTREAMENTO_CHAVE."""
+    import rastreamento
+
+    chave = os.environ.get(VARIAVEL_CHAVE_RASTREAMENTO)
+    if not chave or not hmac.compare_digest(pedido["cabecalhos"].get("x-chave-rastreamento", ""), chave):
+        raise ErroHttp(401, "Chave de rastreamento ausente ou inválida.")
+    dados = pedido["json"]
+    lat, lon = _ponto(dados, "posicao")
+    if not await _em(_executor_db, rastreamento.registrar_posicao, _campo(dados, "motorista_id", int), lat, lon):
+        raise ErroHttp(404, "Motorista sem corrida em andamento.")
+    return 200, {"status": "ok"}
+
+
+async def rota_historico(pedido):
+    usuario = _usuario(pedido["cabecalhos"])
+    consulta = pedido["consulta"]
+    try:
+        antes_de = int(consulta["antes_de"][0]) if "antes_de" in consulta else None
+        limite = min(int(consulta.get("limite", [db.TAMANHO_PAGINA_HISTORICO])[0]), 500)
+    except ValueError:
+        raise ErroHttp(400, "Parâmetros de paginação inválidos.")
+    if limite < 1:
+        raise ErroHttp(400, "limite deve ser pelo menos 1.")
+    corridas, proximo = await _em(_executor_db, nucleo.historico, usuario, antes_de, limite)
+    return 200, {"corridas": corridas, "proximo": proximo}
+
+
+ROTAS = {
+    "/saude": {"GET": rota_saude},
+    "/usuarios": {"POST": rota_cadastro},
+    "/login": {"POST": rota_login},
+    "/busca": {"POST": rota_busca},
+    "/corridas": {"POST": rota_corrida},
+    "/corridas/encerrar": {"POST": rota_encerrar},
+    "/corridas/situacao": {"GET": rota_situacao},
+    "/motoristas/posicao": {"POST": rota_posicao},
+    "/pedidos": {"POST": rota_pedido},
+    "/historico": {"GET": rota_historico},
+}
+
+
+# --- HTTP/1.1 -------------------------------------------------------------------
+
+def _resposta(status, dados, manter_conexao):
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    cabecalho = (f"HTTP/1.1 {status} {MOTIVOS[status]}\r\n"
+                 f"Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(corpo)}\r\n"
+                 f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n")
+    return cabecalho.encode("latin-1") + corpo
+
+
+async def _tratar(metodo, alvo, cabecalhos, corpo):
+    partes = urlsplit(alvo)
+    metodos = ROTAS.get(partes.path)
+    if metodos is None:
+        raise ErroHttp(404, "Rota não encontrada.")
+    rota = metodos.get(metodo)
+    if rota is None:
+        raise ErroHttp(405, "Método não permitido.")
+    dados = {}
+    if corpo:
+        try:
+            dados = json.loads(corpo)
+        except ValueError:
+            raise ErroHttp(400, "JSON inválido.")
+        if not isinstance(dados, dict):
+            raise ErroHttp(400, "O corpo deve ser um objeto JSON.")
+    return await rota({"json": dados, "consulta": parse_qs(partes.query), "cabecalhos": cabecalhos})
+
+
+async def atender(leitor, escritor):
+    """Atende uma conexão; várias requisições em sequência (keep-alive)."""
+    try:
+        while True:
+            try:
+                bruto = await asyncio.wait_for(leitor.readuntil(b"\r\n\r\n"), TEMPO_OCIOSO_S)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                break
+            linhas = bruto.decode("latin-1").split("\r\n")
+            try:
+                metodo, alvo, versao = linhas[0].split(" ", 2)
+            except ValueError:
+                escritor.write(_resposta(400, {"erro": "Requisição inválida."}, False))
+                break
+            cabecalhos = {}
+            for linha in linhas[1:]:
+                nome, _, valor = linha.partition(":")
+                if nome:
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+            manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+            comprimento = cabecalhos.get("content-length") or "0"
+            # Só dígitos: int() aceitaria sinal, espaços e "_"
+            if not comprimento.isdecimal():
+                escritor.write(_resposta(400, {"erro": "Content-Length inválido."}, False))
+                break
+            tamanho = int(comprimento)
+            if tamanho > MAX_CORPO:
+                escritor.write(_resposta(413, {"erro": "Corpo grande demais."}, False))
+                break
+            corpo = await leitor.readexactly(tamanho) if tamanho else b""
+
+            try:
+                status, dados = await _tratar(metodo, alvo, cabecalhos, corpo)
+            except ErroHttp as erro:
+                status, dados = erro.status, {"erro": erro.mensagem}
+            except Exception:
+                status, dados = 500, {"erro": "Erro interno."}
+            escritor.write(_resposta(status, dados, manter))
+            await escritor.drain()
+            if not manter:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        escritor.close()
+
+
+async def servir(host, porta, reuse_port=False):
+    servidor = await asyncio.start_server(atender, host, porta, reuse_port=reuse_port, backlog=1024)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def _processo(host, porta, caminho_banco):
+    db.DATABASE_PATH = caminho_banco
+    db.init_db()
+    asyncio.run(servir(host, porta, reuse_port=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP do ParaTodos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--banco", default=db.DATABASE_PATH)
+    parser.add_argument("--processos", type=int, default=1, help="processos servindo a mesma porta")
+    args = parser.parse_args()
+
+    # Todos os processos precisam do mesmo segredo para aceitar os tokens uns dos outros
+    os.environ.setdefault(VARIAVEL_SEGREDO, secrets.token_hex(32))
+    db.DATABASE_PATH = args.banco
+    db.init_db()
+    print(f"API em http://{args.host}:{args.porta} ({args.processos} processo(s))")
+    if args.processos == 1:
+        asyncio.run(servir(args.host, args.porta))
+        return
+    contexto = multiprocessing.get_context("spawn")
+    filhos = [contexto.Process(target=_processo, args=(args.host, args.porta, os.path.abspath(args.banco)),
+                               daemon=True)
+              for _ in range(args.processos - 1)]
+    for filho in filhos:
+        filho.start()
+    try:
+        asyncio.run(servir(args.host, args.porta, reuse_port=True))
+    finally:
+        for filho in filhos:
+            filho.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,13 +14,17 @@
 
 # Este é o novo app.py simplificado que chama os módulos
 
+# Cada página importa o que usa (pandas, folium, numpy...) só quando é exibida;
+# a tela de login carrega apenas o essencial. Ver: python diagnostico.py importacoes
+
+import time
 import streamlit as st
-from auth import login_page, register_page, load_session
+from metricas import registrar
+from auth import login_page, register_page, load_session, eh_admin
 from db import init_db
-from motoristas import pagina_home
-from mapa import pagina_mapa
 from utils import carregar_tema
-import pandas as pd
+
+inicio_execucao = time.perf_counter()
 
 st.set_page_config(page_title="ParaTodos - Match PCD", layout="wide")
 carregar_tema()
@@ -28,26 +32,41 @@ init_db()
 load_session()
 
 menu_login = st.sidebar.selectbox("Acesso", ["Login", "Cadastro"])
+pagina = menu_login
 
-if not st.session_state.logged_in:
-    if menu_login == "Login":
-        login_page()
+try:
+    if not st.session_state.logged_in:
+        if menu_login == "Login":
+            login_page()
+        else:
+            register_page()
     else:
-        register_page()
-else:
-    menu = st.sidebar.selectbox("Menu", ["Home", "Histórico", "Preços", "Sobre", "Como usar"])
-
-    if menu == "Home":
-        pagina_home()
-    elif menu == "Histórico":
-        from db import mostrar_historico
-        mostrar_historico()
-    elif menu == "Preços":
-        from db import mostrar_precos
-        mostrar_precos()
-    elif menu == "Sobre":
-        from utils import mostrar_sobre
-        mostrar_sobre()
-    elif menu == "Como usar":
-        from utils import mostrar_como_usar
-        mostrar_como_usar()
+        opcoes = ["Home", "Histórico", "Preços", "Sobre", "Como usar"]
+        if eh_admin(st.session_state.username):
+            opcoes += ["Painel", "Diagnóstico"]
+        menu = pagina = st.sidebar.selectbox("Menu", opcoes)
+
+        if menu == "Home":
+            from motoristas import pagina_home
+            pagina_home()
+        elif menu == "Histórico":
+            from historico import mostrar_historico
+            mostrar_historico()
+        elif menu == "Preços":
+            from utils import mostrar_precos
+            mostrar_precos()
+        elif menu == "Painel":
+            from painel import pagina_painel
+            pagina_painel()
+        elif menu == "Sobre":
+            from utils import mostrar_sobre
+            mostrar_sobre()
+        elif menu == "Como usar":
+            from utils import mostrar_como_usar
+            mostrar_como_usar()
+        elif menu == "Diagnóstico":
+            from painel import pagina_diagnostico
+            pagina_diagnostico()
+finally:
+    # Tempo total da execução do script, por página (também quando ela chama st.rerun)
+    registrar(f"pagina.{pagina}", time.perf_counter() - inicio_execucao)
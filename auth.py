@@ -1,12 +1,17 @@
 # auth.py - Gerencia login, cadastro e sessão de usuário
 
 import streamlit as st
-import bcrypt
-from db import get_user, add_user, user_exists
+from db import user_exists
 import os
 
 logo_path = os.path.join(os.path.dirname(__file__), "logo.png")
 
+# Usuários com acesso às páginas de administração, ex.: PARATODOS_ADMINS=ana,joao
+ADMINS = {nome.strip() for nome in os.environ.get("PARATODOS_ADMINS", "").split(",") if nome.strip()}
+
+def eh_admin(username):
+    return username in ADMINS
+
 def load_session():
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
@@ -14,6 +19,8 @@ def load_session():
         st.session_state.profile = ""
 
 def login_page():
+    from nucleo import autenticar
+
     # Logo grande no topo da sidebar
     with st.sidebar:
         st.markdown("<br>", unsafe_allow_html=True)
@@ -35,16 +42,18 @@ def login_page():
                 if not username or not password:
                     st.warning("Por favor, preencha todos os campos.")
                 else:
-                    user = get_user(username)
-                    if user and bcrypt.checkpw(password.encode('utf-8'), user[1]):
+                    user = autenticar(username, password)
+                    if user:
                         st.session_state.logged_in = True
                         st.session_state.username = username
-                        st.session_state.profile = user[2]
+                        st.session_state.profile = user["profile"]
                         st.rerun()
                     else:
                         st.error("Usuário ou senha inválidos.")
 
 def register_page():
+    from nucleo import cadastrar
+
     with st.sidebar:
         st.markdown("<br>", unsafe_allow_html=True)
         st.image(logo_path, width=160)
@@ -71,6 +80,7 @@ def register_page():
                     st.warning("Preencha todos os campos para cadastrar.")
                 elif user_exists(username):
                     st.error("Usuário já existe!")
-                else:
-                    add_user(username, password, profile)
+                elif cadastrar(username, password, profile):
                     st.success("Cadastro realizado. Faça login.")
+                else:
+                    st.error("Este nome de usuário já existe.")
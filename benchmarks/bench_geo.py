@@ -0,0 +1,79 @@
+# bench_geo.py - Compara o cálculo de distâncias/ETAs em lote (NumPy) com o laço escalar
+#
+# Uso: python benchmarks/bench_geo.py [--motoristas 10000] [--repeticoes 5]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from geo import (calcular_distancia_km, distancias_km_lote, estimar_duracao,
+                 estimar_duracao_lote, matriz_distancias_km)
+
+
+def melhor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de distâncias e ETAs em lote")
+    parser.add_argument("--motoristas", type=int, default=10000)
+    parser.add_argument("--passageiros", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    lats = [-26.9155 + rng.uniform(-0.1, 0.1) for _ in range(args.motoristas)]
+    lons = [-49.0713 + rng.uniform(-0.1, 0.1) for _ in range(args.motoristas)]
+    lat, lon = -26.9155, -49.0713
+    lats_np, lons_np = np.array(lats), np.array(lons)
+
+    def escalar():
+        dist = [calcular_distancia_km(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+        return dist, [estimar_duracao(d) for d in dist]
+
+    def lote():
+        dist = distancias_km_lote(lat, lon, lats_np, lons_np)
+        return dist, estimar_duracao_lote(dist)
+
+    dist_escalar, eta_escalar = escalar()
+    dist_lote, eta_lote = lote()
+    assert np.allclose(dist_lote, dist_escalar, rtol=1e-12, atol=1e-9)
+    assert list(eta_lote) == eta_escalar
+
+    t_escalar = melhor_tempo(escalar, args.repeticoes)
+    t_lote = melhor_tempo(lote, args.repeticoes)
+    print(f"1 passageiro x {args.motoristas} motoristas")
+    print(f"  escalar: {t_escalar * 1e3:9.3f} ms")
+    print(f"  lote:    {t_lote * 1e3:9.3f} ms  ({t_escalar / t_lote:.1f}x)")
+
+    n = args.passageiros
+    p_lats, p_lons = lats_np[:n] + 0.001, lons_np[:n] - 0.001
+
+    def matriz_escalar():
+        return [[calcular_distancia_km(a, b, la, lo) for la, lo in zip(lats, lons)]
+                for a, b in zip(p_lats.tolist(), p_lons.tolist())]
+
+    def matriz_lote():
+        return matriz_distancias_km(p_lats, p_lons, lats_np, lons_np)
+
+    assert np.allclose(matriz_lote(), matriz_escalar(), rtol=1e-12, atol=1e-9)
+    t_escalar = melhor_tempo(matriz_escalar, 1)
+    t_lote = melhor_tempo(matriz_lote, args.repeticoes)
+    print(f"matriz {n} x {args.motoristas}")
+    print(f"  escalar: {t_escalar * 1e3:9.3f} ms")
+    print(f"  lote:    {t_lote * 1e3:9.3f} ms  ({t_escalar / t_lote:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# suite.py - Benchmarks dos caminhos críticos: matching, preços, histórico (SQLite) e login (bcrypt)
+#
+# Roda sem Streamlit e sem rede, num banco temporário. Uso:
+#   python benchmarks/suite.py                       # perfil rápido, compara com benchmarks/base.json
+#   python benchmarks/suite.py --perfil completo     # frotas até 1M, históricos até 10M corridas
+#   python benchmarks/suite.py --json resultado.json # resultado em JSON
+#   python benchmarks/suite.py --salvar-base         # grava a base (rode na máquina de referência)
+#
+# Sai com código 1 se algum caso ficar mais lento que a base além da tolerância.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+CAMINHO_BASE = os.path.join(os.path.dirname(__file__), "base.json")
+PERFIS = {
+    "rapido": {"frotas": [20, 1_000, 100_000], "cotacoes": [10, 1_000, 100_000],
+               "corridas": [10_000, 100_000]},
+    "completo": {"frotas": [20, 1_000, 100_000, 1_000_000], "cotacoes": [10, 1_000, 100_000, 1_000_000],
+                 "corridas": [10_000, 1_000_000, 10_000_000]},
+}
+# Tolerância padrão: mais lento que a base em mais de 25% conta como regressão
+TOLERANCIA = 0.25
+CENTRO = (-26.9155, -49.0713)
+VEICULOS = ["Comum", "Híbrido", "Elétrico"]
+USUARIOS_SINTETICOS = 1_000
+
+
+def _resumo(amostras):
+    ms = np.asarray(amostras) * 1000
+    return {"mediana_ms": round(float(np.median(ms)), 4), "p95_ms": round(float(np.percentile(ms, 95)), 4),
+            "amostras": len(ms)}
+
+
+def _cronometrar(funcao, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def _frota_sintetica(n, rng):
+    from matching import ADAPTACOES
+    return [{"id": i, "name": f"Motorista {i}", "veiculo": rng.choice(VEICULOS),
+             "capabilities": rng.sample(ADAPTACOES, rng.randint(0, 3)),
+             "lat": CENTRO[0] + rng.uniform(-0.2, 0.2), "lon": CENTRO[1] + rng.uniform(-0.2, 0.2)}
+            for i in range(n)]
+
+
+def _necessidades(rng):
+    from matching import ADAPTACOES
+    return rng.sample(ADAPTACOES[:5], rng.randint(1, 2))
+
+
+def bench_matching(tamanhos, rng):
+    from espacial import GradeEspacial
+    from matching import IndiceCapacidades, proximos_compativeis
+
+    resultados = {}
+    for n in tamanhos:
+        motoristas = _frota_sintetica(n, rng)
+        inicio = time.perf_counter()
+        indice = IndiceCapacidades(motoristas)
+        grade = GradeEspacial([m["lat"] for m in motoristas], [m["lon"] for m in motoristas])
+        resultados[f"matching/construcao/n={n}"] = _resumo([time.perf_counter() - inicio])
+
+        consultas = [(CENTRO[0] + rng.uniform(-0.1, 0.1), CENTRO[1] + rng.uniform(-0.1, 0.1), _necessidades(rng))
+                     for _ in range(200)]
+        amostras = []
+        for lat, lon, necessidades in consultas:
+            inicio = time.perf_counter()
+            proximos_compativeis(indice, grade, lat, lon, necessidades, k=10, raio_km=10.0)
+            amostras.append(time.perf_counter() - inicio)
+        resultados[f"matching/busca/n={n}"] = _resumo(amostras)
+    return resultados
+
+
+def bench_precos(tamanhos, rng):
+    from precos import cotar_motoristas
+
+    resultados = {}
+    for n in tamanhos:
+        motoristas = [{"veiculo": rng.choice(VEICULOS)} for _ in range(n)]
+        necessidades = _necessidades(rng)
+        repeticoes = 200 if n <= 1_000 else 20
+        amostras = _cronometrar(lambda: cotar_motoristas(motoristas, necessidades, 6.4, 13), repeticoes)
+        resultados[f"precos/cotacao/n={n}"] = _resumo(amostras)
+    return resultados
+
+
+def _semear_historico(caminho, n, rng):
+    """Preenche o histórico direto no SQLite (sem o gravador), em uma transação."""
+    inicio = datetime(2024, 1, 1)
+
+    def linhas():
+        for i in range(n):
+            yield (f"usuario{rng.randrange(USUARIOS_SINTETICOS)}", f"Motorista {rng.randrange(5000)}",
+                   ", ".join(_necessidades(rng)), "Finalizada",
+                   (inicio + timedelta(seconds=30 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+                   rng.choice(VEICULOS), round(rng.uniform(10, 80), 2))
+
+    conn = sqlite3.connect(caminho)
+    with conn:
+        conn.executemany("""INSERT INTO historico (usuario, motorista, necessidades, status, data, veiculo, preco)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", linhas())
+    conn.close()
+
+
+def bench_historico(tamanhos, rng):
+    import db
+
+    resultados = {}
+    caminho_original = db.DATABASE_PATH
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db.DATABASE_PATH = os.path.join(pasta, "bench.db")
+            try:
+                db.init_db()
+                _semear_historico(db.DATABASE_PATH, n, rng)
+
+                amostras = _cronometrar(
+                    lambda: db.salvar_corrida("usuario0", "Motorista 1", ["rampa"], "Finalizada", "Comum", 20.0), 200)
+                resultados[f"historico/salvar_corrida/n={n}"] = _resumo(amostras)
+
+                usuarios = [f"usuario{rng.randrange(USUARIOS_SINTETICOS)}" for _ in range(50)]
+                amostras = []
+                for usuario in usuarios:
+                    inicio = time.perf_counter()
+                    db.carregar_historico_pagina(usuario)
+                    amostras.append(time.perf_counter() - inicio)
+                resultados[f"historico/primeira_pagina/n={n}"] = _resumo(amostras)
+
+                amostras = []
+                for usuario in usuarios[:10]:
+                    inicio = time.perf_counter()
+                    db.carregar_historico(usuario)
+                    amostras.append(time.perf_counter() - inicio)
+                resultados[f"historico/completo_usuario/n={n}"] = _resumo(amostras)
+            finally:
+                db.encerrar_gravador_corridas()
+                db.fechar_conexoes()
+                db.DATABASE_PATH = caminho_original
+    return resultados
+
+
+def bench_bcrypt():
+    from servico_auth import custo_configurado, gerar_hash, verificar_senha
+
+    custo = custo_configurado()
+    hashed = gerar_hash("senha-de-teste")
+    amostras = _cronometrar(lambda: verificar_senha("senha-de-teste", hashed), 10)
+    # O custo faz parte do nome: bases com custos diferentes não são comparadas
+    return {f"bcrypt/verificar/custo={custo}": _resumo(amostras)}
+
+
+def executar(perfil, grupos, semente=42):
+    config = PERFIS[perfil]
+    rng = random.Random(semente)
+    resultados = {}
+    if "matching" in grupos:
+        resultados.update(bench_matching(config["frotas"], rng))
+    if "precos" in grupos:
+        resultados.update(bench_precos(config["cotacoes"], rng))
+    if "historico" in grupos:
+        resultados.update(bench_historico(config["corridas"], rng))
+    if "bcrypt" in grupos:
+        resultados.update(bench_bcrypt())
+    return {
+        "perfil": perfil,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"plataforma": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count(), "sqlite": sqlite3.sqlite_version, "numpy": np.__version__},
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, base, tolerancia=TOLERANCIA):
+    """Compara as medianas com a base. Retorna [(caso, base_ms, atual_ms, razão, regrediu)]."""
+    linhas = []
+    for caso, medida in atual["resultados"].items():
+        referencia = base["resultados"].get(caso)
+        if referencia is None:
+            continue
+        razao = medida["mediana_ms"] / referencia["mediana_ms"] if referencia["mediana_ms"] else float("inf")
+        linhas.append((caso, referencia["mediana_ms"], medida["mediana_ms"], razao, razao > 1 + tolerancia))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do ParaTodos")
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="rapido")
+    parser.add_argument("--grupos", nargs="+", default=["matching", "precos", "historico", "bcrypt"],
+                        choices=["matching", "precos", "historico", "bcrypt"])
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    parser.add_argument("--base", default=CAMINHO_BASE, help="resultado de referência para comparar")
+    parser.add_argument("--salvar-base", action="store_true", help="grava o resultado como nova base")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    atual = executar(args.perfil, args.grupos)
+    print(f"{'caso':<42} {'mediana (ms)':>13} {'p95 (ms)':>11}")
+    for caso, medida in atual["resultados"].items():
+        print(f"{caso:<42} {medida['mediana_ms']:>13.3f} {medida['p95_ms']:>11.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+    if args.salvar_base:
+        with open(args.base, "w", encoding="utf-8") as arquivo:
+            json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+        print(f"Base gravada em {args.base}")
+        return
+    if not os.path.exists(args.base):
+        print(f"Sem base em {args.base}; rode com --salvar-base na máquina de referência.")
+        return
+
+    with open(args.base, encoding="utf-8") as arquivo:
+        base = json.load(arquivo)
+    linhas = comparar(atual, base, args.tolerancia)
+    print(f"\nComparação com {args.base} ({base['data']}, {base['maquina']['plataforma']})")
+    for caso, base_ms, atual_ms, razao, regrediu in linhas:
+        print(f"{caso:<42} {base_ms:>10.3f} -> {atual_ms:>10.3f} ms  {razao:5.2f}x{'  REGRESSÃO' if regrediu else ''}")
+    if any(regrediu for *_, regrediu in linhas):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# carga.py - Gerador de carga: N passageiros simultâneos num banco SQLite temporário
+#
+# Modo "nucleo" chama as mesmas funções que as páginas usam (login, busca, chamada,
+# histórico), um passageiro por thread, como as sessões de um servidor Streamlit.
+# Modo "apptest" executa o app.py de verdade pelo AppTest do Streamlit, um passageiro
+# por processo (o AppTest não roda duas execuções ao mesmo tempo no mesmo processo).
+#   python carga.py --usuarios 20 --corridas 10
+#   python carga.py --modo apptest --usuarios 4 --corridas 2 --json carga.json
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import db
+import nucleo
+
+CENTRO = (-26.9155, -49.0713)
+NECESSIDADES = ["rampa", "cadeira de rodas", "interprete libras", "comunicação assistida", "elevador"]
+SENHA = "senha-carga"
+
+
+class Medicoes:
+    """Tempos por operação, erros por tipo e recusas (motorista já reservado), coletados por todas as threads."""
+
+    def __init__(self):
+        self.tempos = {}
+        self.erros = Counter()
+        self.recusas = Counter()
+        self._lock = threading.Lock()
+
+    def medir(self, operacao, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args)
+        except sqlite3.OperationalError as erro:
+            texto = str(erro).lower()
+            self.erro("bloqueio" if "locked" in texto or "busy" in texto else "sqlite")
+            erro.contado = True
+            raise
+        except nucleo.MotoristaIndisponivel as erro:
+            # Outro passageiro reservou o motorista antes: esperado sob concorrência, não é erro
+            with self._lock:
+                self.recusas[operacao] += 1
+            erro.contado = True
+            raise
+        except Exception as erro:
+            self.erro(type(erro).__name__)
+            erro.contado = True
+            raise
+        duracao = time.perf_counter() - inicio
+        with self._lock:
+            self.tempos.setdefault(operacao, []).append(duracao)
+        return resultado
+
+    def erro(self, tipo):
+        with self._lock:
+            self.erros[tipo] += 1
+
+    def mesclar(self, tempos, erros, recusas):
+        with self._lock:
+            for operacao, valores in tempos.items():
+                self.tempos.setdefault(operacao, []).extend(valores)
+            self.erros.update(erros)
+            self.recusas.update(recusas)
+
+
+def _ponto(rng):
+    return CENTRO[0] + rng.uniform(-0.05, 0.05), CENTRO[1] + rng.uniform(-0.05, 0.05)
+
+
+# --- Modo núcleo: as funções que as páginas chamam (nucleo.py), sem Streamlit ----
+
+def _login(usuario):
+    if nucleo.autenticar(usuario, SENHA) is None:
+        raise RuntimeError("login recusado")
+
+
+def passageiro_nucleo(usuario, corridas, medicoes, rng):
+    medicoes.medir("login", _login, usuario)
+    for _ in range(corridas):
+        necessidades = rng.sample(NECESSIDADES, rng.randint(1, 2))
+        origem, destino = _ponto(rng), _ponto(rng)
+        busca = medicoes.medir("busca", nucleo.buscar_motoristas, origem, destino, necessidades)
+        if busca.motoristas:
+            motorista = rng.choice(busca.motoristas)
+            try:
+                medicoes.medir("chamada", nucleo.chamar_motorista, usuario, motorista["id"], origem, destino,
+                               necessidades)
+            except nucleo.MotoristaIndisponivel:
+                pass
+            else:
+                # A corrida simulada termina na hora e o motorista volta a ficar livre
+                medicoes.medir("encerrar", nucleo.encerrar_corrida, usuario, motorista["id"])
+        medicoes.medir("historico", nucleo.historico, usuario)
+
+
+# --- Modo AppTest: o app.py inteiro, como o navegador o executaria --------------
+
+def _widget(lista, rotulo):
+    return next(w for w in lista if w.label.startswith(rotulo))
+
+
+def _executar(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def passageiro_apptest(usuario, corridas, medicoes, rng):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                           default_timeout=120)
+    medicoes.medir("abrir", _executar, at)
+    _widget(at.text_input, "Usuário").set_value(usuario)
+    _widget(at.text_input, "Senha").set_value(SENHA)
+    _widget(at.button, "Entrar").click()
+    medicoes.medir("login", _executar, at)
+    if not at.session_state["logged_in"]:
+        medicoes.erro("login recusado")
+        return
+    for _ in range(corridas):
+        at.sidebar.selectbox[1].set_value("Home")
+        medicoes.medir("home", _executar, at)
+        _widget(at.multiselect, "Selecione").set_value(rng.sample(NECESSIDADES, rng.randint(1, 2)))
+        _widget(at.text_input, "Local atual").set_value("{:.5f}, {:.5f}".format(*_ponto(rng)))
+        _widget(at.text_input, "Local de parada").set_value("{:.5f}, {:.5f}".format(*_ponto(rng)))
+        _widget(at.button, "Buscar").click()
+        medicoes.medir("busca", _executar, at)
+        chamar = [b for b in at.button if b.label.startswith("🚗 Chamar")]
+        if chamar:
+            chamar[0].click()
+            medicoes.medir("chamada", _executar, at)
+            at.session_state["corrida_em_andamento"] = None
+            at.session_state["mostrar_mapa"] = False
+        at.sidebar.selectbox[1].set_value("Histórico")
+        medicoes.medir("historico", _executar, at)
+
+
+CENARIOS = {"nucleo": passageiro_nucleo, "apptest": passageiro_apptest}
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def relatorio(medicoes, duracao_s, usuarios):
+    operacoes = {}
+    for operacao, tempos in sorted(medicoes.tempos.items()):
+        ordenados = sorted(tempos)
+        operacoes[operacao] = {
+            "contagem": len(ordenados), "por_segundo": round(len(ordenados) / duracao_s, 2),
+            "p50_ms": round(_percentil(ordenados, 0.50) * 1000, 2),
+            "p95_ms": round(_percentil(ordenados, 0.95) * 1000, 2),
+            "p99_ms": round(_percentil(ordenados, 0.99) * 1000, 2),
+            "max_ms": round(ordenados[-1] * 1000, 2),
+        }
+    return {"usuarios": usuarios, "duracao_s": round(duracao_s, 2), "operacoes": operacoes,
+            "erros": dict(medicoes.erros), "recusas": dict(medicoes.recusas)}
+
+
+def _passageiro(modo, usuario, corridas, semente, largada):
+    """Roda um passageiro e devolve (tempos, erros, recusas). largada é o instante (time.time) de começar."""
+    medicoes = Medicoes()
+    time.sleep(max(0.0, largada - time.time()))
+    try:
+        CENARIOS[modo](usuario, corridas, medicoes, random.Random(semente))
+    except Exception as erro:
+        # Falhas dentro de medir() já foram contadas; as de fora (ex.: widget ausente) não
+        if not getattr(erro, "contado", False):
+            medicoes.erro(type(erro).__name__)
+    return medicoes.tempos, medicoes.erros, medicoes.recusas
+
+
+def _preparar_processo(caminho_banco, custo_bcrypt):
+    if custo_bcrypt:
+        os.environ["PARATODOS_BCRYPT_CUSTO"] = custo_bcrypt
+    db.DATABASE_PATH = caminho_banco
+
+
+def executar(modo, usuarios, corridas, semente=42):
+    """Cria os usuários no banco atual e roda os passageiros todos ao mesmo tempo."""
+    nomes = [f"carga{i}" for i in range(usuarios)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda nome: db.add_user(nome, SENHA, "Deficiência Motora"), nomes))
+
+    if modo == "apptest":
+        executor = ProcessPoolExecutor(
+            max_workers=usuarios, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_preparar_processo,
+            initargs=(os.path.abspath(db.DATABASE_PATH), os.environ.get("PARATODOS_BCRYPT_CUSTO")))
+        # Folga para os processos subirem e importarem o Streamlit antes da largada
+        largada = time.time() + 5.0
+    else:
+        executor = ThreadPoolExecutor(max_workers=usuarios, thread_name_prefix="passageiro")
+        largada = time.time() + 0.1
+
+    medicoes = Medicoes()
+    with executor:
+        futuros = [executor.submit(_passageiro, modo, nome, corridas, semente + i, largada)
+                   for i, nome in enumerate(nomes)]
+        for futuro in futuros:
+            medicoes.mesclar(*futuro.result())
+    return relatorio(medicoes, time.time() - largada, usuarios)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do ParaTodos num banco temporário")
+    parser.add_argument("--modo", choices=sorted(CENARIOS), default="nucleo")
+    parser.add_argument("--usuarios", type=int, default=20, help="passageiros simultâneos")
+    parser.add_argument("--corridas", type=int, default=10, help="corridas por passageiro")
+    parser.add_argument("--custo-bcrypt", type=int, help="custo do bcrypt (padrão: o calibrado)")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    if args.custo_bcrypt:
+        os.environ["PARATODOS_BCRYPT_CUSTO"] = str(args.custo_bcrypt)
+    with tempfile.TemporaryDirectory() as pasta:
+        db.DATABASE_PATH = os.path.join(pasta, "carga.db")
+        db.init_db()
+        try:
+            resultado = executar(args.modo, args.usuarios, args.corridas)
+        finally:
+            db.encerrar_gravador_corridas()
+            db.fechar_conexoes()
+
+    print(f"{resultado['usuarios']} passageiros ({args.modo}) em {resultado['duracao_s']} s")
+    print(f"{'operação':<10} {'total':>7} {'por s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for operacao, m in resultado["operacoes"].items():
+        print(f"{operacao:<10} {m['contagem']:>7} {m['por_segundo']:>8} {m['p50_ms']:>9} {m['p95_ms']:>9}"
+              f" {m['p99_ms']:>9} {m['max_ms']:>9}")
+    print("Erros: " + (", ".join(f"{tipo}={n}" for tipo, n in resultado["erros"].items()) or "nenhum"))
+    print("Motorista já reservado: " + (", ".join(f"{op}={n}" for op, n in resultado["recusas"].items()) or "nenhum"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    if resultado["erros"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
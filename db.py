@@ -1,135 +1,622 @@
-# db.py - Banco de dados e funções auxiliares (SQLite)
+# db.py - Banco de dados e funções auxiliares (SQLite, sem Streamlit)
 
 import sqlite3
-import pandas as pd
-import io
-import streamlit as st
+import json
+import queue
+import threading
+import time
+import atexit
+from contextlib import contextmanager
 from datetime import datetime
-import bcrypt
+from fila_escrita import GravadorEmLote
+from metricas import contar, cronometrado
 
 DATABASE_PATH = "usuarios.db"
 
+# Gravação de corridas em lote: no máximo TAMANHO_LOTE_CORRIDAS por transação e
+# nenhuma corrida espera mais que ATRASO_MAX_CORRIDAS_S por outras
+TAMANHO_LOTE_CORRIDAS = 64
+ATRASO_MAX_CORRIDAS_S = 0.005
+
+# Corridas por página na tela de histórico
+TAMANHO_PAGINA_HISTORICO = 50
+
+# Conexões ociosas mantidas abertas para reuso entre execuções do script
+TAMANHO_POOL = 8
+# Comandos preparados mantidos em cache por conexão
+CACHE_COMANDOS = 128
+PRAGMAS_CONEXAO = (
+    "PRAGMA journal_mode=WAL",       # leitores não bloqueiam o escritor (e vice-versa)
+    "PRAGMA synchronous=NORMAL",     # em WAL, fsync só no checkpoint
+    "PRAGMA cache_size=-8000",       # ~8 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=268435456",    # leitura via mmap de até 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Frota inicial gravada na tabela drivers quando ela está vazia
+MOTORISTAS_INICIAIS = [
+    {"name": "João", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum", "lat": -26.9314, "lon": -49.1062},
+    {"name": "Maria", "capabilities": ["interprete libras"], "veiculo": "Híbrido", "lat": -26.9019, "lon": -49.1141},
+    {"name": "Carlos", "capabilities": ["rampa", "interprete libras", "cadeira de rodas"], "veiculo": "Comum", "lat": -26.9123, "lon": -49.0847},
+    {"name": "Ana", "capabilities": ["comunicação assistida"], "veiculo": "Elétrico", "lat": -26.9553, "lon": -49.0706},
+    {"name": "Pedro", "capabilities": ["rampa"], "veiculo": "Comum", "lat": -26.9571, "lon": -49.0779},
+    {"name": "Fernanda", "capabilities": ["interprete libras", "comunicação assistida"], "veiculo": "Híbrido", "lat": -26.9542, "lon": -49.1122},
+    {"name": "Lucas", "capabilities": ["rampa", "comunicação assistida"], "veiculo": "Elétrico", "lat": -26.9223, "lon": -49.0386},
+    {"name": "Patrícia", "capabilities": ["rampa", "cadeira de rodas", "elevador"], "veiculo": "Comum", "lat": -26.9494, "lon": -49.0990},
+    {"name": "Rafael", "capabilities": ["interprete libras"], "veiculo": "Híbrido", "lat": -26.9040, "lon": -49.0265},
+    {"name": "Juliana", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum", "lat": -26.9086, "lon": -49.0816},
+    {"name": "Gustavo", "capabilities": ["rampa", "cadeira de rodas", "elevador"], "veiculo": "Elétrico", "lat": -26.8726, "lon": -49.1166},
+    {"name": "Luciana", "capabilities": ["comunicação assistida"], "veiculo": "Híbrido", "lat": -26.8832, "lon": -49.0923},
+    {"name": "Eduardo", "capabilities": ["interprete libras"], "veiculo": "Comum", "lat": -26.9475, "lon": -49.1095},
+    {"name": "Beatriz", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum", "lat": -26.9327, "lon": -49.0397},
+    {"name": "Fábio", "capabilities": ["rampa", "comunicação assistida"], "veiculo": "Elétrico", "lat": -26.9442, "lon": -49.0631},
+    {"name": "Camila", "capabilities": ["interprete libras", "cadeira de rodas"], "veiculo": "Híbrido", "lat": -26.9030, "lon": -49.0841},
+    {"name": "Marcos", "capabilities": ["rampa"], "veiculo": "Comum", "lat": -26.9112, "lon": -49.1150},
+    {"name": "Vanessa", "capabilities": ["comunicação assistida"], "veiculo": "Elétrico", "lat": -26.9551, "lon": -49.1007},
+    {"name": "André", "capabilities": ["rampa", "interprete libras"], "veiculo": "Comum", "lat": -26.8993, "lon": -49.0785},
+    {"name": "Larissa", "capabilities": ["rampa", "elevador"], "veiculo": "Híbrido", "lat": -26.9322, "lon": -49.0627},
+]
+
 def get_db_connection():
-    """Retorna uma nova conexão com o banco de dados.
-    Usar a instrução 'with' garante que a conexão é fechada automaticamente.
+    """Abre uma nova conexão já configurada. Prefira conexao(), que reaproveita conexões."""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=5.0, check_same_thread=False,
+                           cached_statements=CACHE_COMANDOS)
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(pragma)
+    return conn
+
+_pools = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+def _pool_atual():
+    with _pools_lock:
+        return _pools.setdefault(DATABASE_PATH, queue.LifoQueue())
+
+@contextmanager
+def conexao():
+    """Empresta uma conexão do pool para a thread atual.
+
+    Chamadas aninhadas na mesma thread recebem a mesma conexão. Ao sair do bloco
+    mais externo a transação é confirmada (ou desfeita, em caso de erro) e a
+    conexão volta para o pool.
     """
-    return sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+    atual = getattr(_local, "conexao", None)
+    if atual is not None:
+        yield atual
+        return
+
+    pool = _pool_atual()
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = get_db_connection()
+    _local.conexao = conn
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.conexao = None
+        if pool.qsize() < TAMANHO_POOL:
+            pool.put(conn)
+        else:
+            conn.close()
+
+def fechar_conexoes():
+    """Fecha todas as conexões ociosas do pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+atexit.register(fechar_conexoes)
+
+def _separar_necessidades(texto):
+    # Registros antigos usam "_" no lugar de espaço (ex.: "cadeira_de_rodas")
+    return [n.strip().replace('_', ' ') for n in texto.split(',') if n.strip()]
+
+# --- Migrações -------------------------------------------------------------
+# Cada migração roda uma única vez por banco, em ordem; PRAGMA user_version
+# guarda o número da última aplicada. Para mudar o esquema, acrescente uma
+# função ao final de MIGRACOES (nunca altere as já publicadas).
+
+def _migracao_tabelas_iniciais(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password BLOB NOT NULL,
+        profile TEXT NOT NULL)""")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS historico (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT NOT NULL,
+        motorista TEXT NOT NULL,
+        necessidades TEXT NOT NULL,
+        status TEXT NOT NULL,
+        data TEXT NOT NULL)""")
+
+def _migracao_motoristas(cursor):
+    # versao cresce a cada alteração; a frota em memória lê só o que mudou
+    cursor.execute("""CREATE TABLE IF NOT EXISTS drivers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        veiculo TEXT NOT NULL,
+        capacidades TEXT NOT NULL,
+        lat REAL NOT NULL,
+        lon REAL NOT NULL,
+        ativo INTEGER NOT NULL DEFAULT 1,
+        versao INTEGER NOT NULL,
+        atualizado_em TEXT NOT NULL)""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_drivers_versao ON drivers (versao)")
+    if cursor.execute("SELECT 1 FROM drivers LIMIT 1").fetchone() is None:
+        for m in MOTORISTAS_INICIAIS:
+            _gravar_motorista(cursor, None, m["name"], m["veiculo"], m["capabilities"], m["lat"], m["lon"], True)
 
+def _migracao_indice_historico_usuario(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_usuario_id ON historico (usuario, id)")
+
+def _migracao_data_iso(cursor):
+    # "dd/mm/aaaa hh:mm" -> "aaaa-mm-dd hh:mm", que ordena como texto
+    cursor.execute("""UPDATE historico
+        SET data = substr(data, 7, 4) || '-' || substr(data, 4, 2) || '-' || substr(data, 1, 2) || ' ' || substr(data, 12, 5)
+        WHERE data GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9] [0-9][0-9]:[0-9][0-9]'""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_data ON historico (data)")
+
+def _migracao_necessidades_normalizadas(cursor):
+    # Uma linha por (necessidade, corrida); a chave cobre contagens por período
+    cursor.execute("""CREATE TABLE IF NOT EXISTS historico_necessidades (
+        necessidade TEXT NOT NULL,
+        data TEXT NOT NULL,
+        corrida_id INTEGER NOT NULL REFERENCES historico (id),
+        PRIMARY KEY (necessidade, data, corrida_id)) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_necessidades_corrida ON historico_necessidades (corrida_id)")
+    leitura = cursor.connection.execute("SELECT id, necessidades, data FROM historico ORDER BY id")
+    while True:
+        linhas = leitura.fetchmany(1000)
+        if not linhas:
+            break
+        cursor.executemany(
+            "INSERT OR IGNORE INTO historico_necessidades (necessidade, data, corrida_id) VALUES (?, ?, ?)",
+            [(n, data, corrida_id) for corrida_id, texto, data in linhas for n in _separar_necessidades(texto)])
+
+def _migracao_estatisticas(cursor):
+    cursor.execute("ALTER TABLE historico ADD COLUMN veiculo TEXT")
+    cursor.execute("ALTER TABLE historico ADD COLUMN preco REAL")
+    # Contagem e receita por dia em cada dimensão ('dia' usa chave vazia: total do dia)
+    cursor.execute("""CREATE TABLE IF NOT EXISTS estatisticas_corridas (
+        dimensao TEXT NOT NULL,
+        chave TEXT NOT NULL,
+        dia TEXT NOT NULL,
+        corridas INTEGER NOT NULL,
+        receita REAL NOT NULL,
+        PRIMARY KEY (dimensao, dia, chave)) WITHOUT ROWID""")
+    cursor.execute("""INSERT INTO estatisticas_corridas (dimensao, chave, dia, corridas, receita)
+        SELECT 'dia', '', substr(data, 1, 10), COUNT(*), TOTAL(preco) FROM historico GROUP BY 2, 3
+        UNION ALL
+        SELECT 'motorista', motorista, substr(data, 1, 10), COUNT(*), TOTAL(preco) FROM historico GROUP BY 2, 3
+        UNION ALL
+        SELECT 'veiculo', COALESCE(veiculo, ''), substr(data, 1, 10), COUNT(*), TOTAL(preco) FROM historico GROUP BY 2, 3
+        UNION ALL
+        SELECT 'necessidade', n.necessidade, substr(n.data, 1, 10), COUNT(*), TOTAL(h.preco)
+        FROM historico_necessidades n JOIN historico h ON h.id = n.corrida_id GROUP BY 2, 3""")
+
+def _migracao_reservas(cursor):
+    # Uma linha por motorista reservado; expira_em em segundos de time.time()
+    cursor.execute("""CREATE TABLE IF NOT EXISTS reservas (
+        motorista_id INTEGER PRIMARY KEY REFERENCES drivers (id),
+        usuario TEXT NOT NULL,
+        expira_em REAL NOT NULL)""")
+
+def _migracao_rastreamento(cursor):
+    # Corrida acompanhada por motorista e as últimas posições do GPS dele (instantes em time.time()),
+    # no banco para todos os processos da API verem o mesmo estado
+    cursor.execute("""CREATE TABLE IF NOT EXISTS acompanhamentos (
+        motorista_id INTEGER PRIMARY KEY REFERENCES drivers (id),
+        usuario TEXT NOT NULL,
+        partida_lat REAL NOT NULL,
+        partida_lon REAL NOT NULL,
+        origem_lat REAL NOT NULL,
+        origem_lon REAL NOT NULL,
+        inicio REAL NOT NULL,
+        expira_em REAL NOT NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS posicoes_motorista (
+        motorista_id INTEGER NOT NULL,
+        instante REAL NOT NULL,
+        lat REAL NOT NULL,
+        lon REAL NOT NULL,
+        PRIMARY KEY (motorista_id, instante)) WITHOUT ROWID""")
+
+def _chave_motorista(motorista_id, nome):
+    """Chave da dimensão 'motorista' nas estatísticas: o id (nomes se repetem); só o nome se o id for desconhecido."""
+    return str(motorista_id) if motorista_id is not None else f"nome:{nome}"
+
+def _migracao_motorista_id_no_historico(cursor):
+    cursor.execute("ALTER TABLE historico ADD COLUMN motorista_id INTEGER")
+    # Corridas antigas só têm o nome: o id é preenchido quando o nome é de um único motorista
+    cursor.execute("""UPDATE historico SET motorista_id = (SELECT MIN(id) FROM drivers WHERE nome = historico.motorista)
+        WHERE (SELECT COUNT(*) FROM drivers WHERE nome = historico.motorista) = 1""")
+    cursor.execute("DELETE FROM estatisticas_corridas WHERE dimensao = 'motorista'")
+    cursor.execute("""INSERT INTO estatisticas_corridas (dimensao, chave, dia, corridas, receita)
+        SELECT 'motorista', COALESCE(CAST(motorista_id AS TEXT), 'nome:' || motorista), substr(data, 1, 10),
+               COUNT(*), TOTAL(preco)
+        FROM historico GROUP BY 2, 3""")
+
+MIGRACOES = [
+    _migracao_tabelas_iniciais,
+    _migracao_motoristas,
+    _migracao_indice_historico_usuario,
+    _migracao_data_iso,
+    _migracao_necessidades_normalizadas,
+    _migracao_estatisticas,
+    _migracao_reservas,
+    _migracao_rastreamento,
+    _migracao_motorista_id_no_historico,
+]
+
+def versao_esquema():
+    """Retorna o número da última migração aplicada no banco atual."""
+    with conexao() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrar():
+    """Aplica as migrações pendentes, cada uma na sua própria transação."""
+    with conexao() as conn:
+        conn.commit()
+        for numero, migracao in enumerate(MIGRACOES, start=1):
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= numero:
+                continue
+            # BEGIN IMMEDIATE trava a escrita; relemos a versão porque outro
+            # processo pode ter migrado enquanto esperávamos.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < numero:
+                    migracao(conn.cursor())
+                    conn.execute(f"PRAGMA user_version = {numero}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+_bancos_prontos = set()
+_init_lock = threading.Lock()
+
+@cronometrado()
 def init_db():
-    """Cria as tabelas de usuários e histórico se elas não existirem."""
-    with get_db_connection() as conn:
+    """Prepara o banco (migrações pendentes) uma única vez por processo."""
+    if DATABASE_PATH in _bancos_prontos:
+        return
+    with _init_lock:
+        if DATABASE_PATH not in _bancos_prontos:
+            migrar()
+            _bancos_prontos.add(DATABASE_PATH)
+
+def _gravar_motorista(cursor, motorista_id, nome, veiculo, capacidades, lat, lon, ativo):
+    # Chamar dentro de uma transação BEGIN IMMEDIATE (migração ou salvar_motorista)
+    agora = datetime.now().isoformat(timespec="seconds")
+    versao = cursor.execute("SELECT COALESCE(MAX(versao), 0) + 1 FROM drivers").fetchone()[0]
+    valores = (nome, veiculo, json.dumps(list(capacidades), ensure_ascii=False), lat, lon, int(ativo), versao, agora)
+    if motorista_id is None:
+        cursor.execute("""INSERT INTO drivers (nome, veiculo, capacidades, lat, lon, ativo, versao, atualizado_em)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", valores)
+        return cursor.lastrowid
+    cursor.execute("""UPDATE drivers SET nome = ?, veiculo = ?, capacidades = ?, lat = ?, lon = ?, ativo = ?,
+                      versao = ?, atualizado_em = ? WHERE id = ?""", valores + (motorista_id,))
+    return motorista_id
+
+@cronometrado()
+def salvar_motorista(nome, veiculo, capacidades, lat, lon, ativo=True, motorista_id=None):
+    """Cadastra (ou atualiza, se motorista_id for dado) um motorista. Retorna o id.
+    Para remover da frota, salve com ativo=False.
+    """
+    with conexao() as conn:
+        conn.commit()
+        # A versão (MAX + 1) é lida já com a escrita travada: versões são únicas e
+        # confirmadas em ordem, e a frota em memória (que avança por versão) não perde alterações
+        conn.execute("BEGIN IMMEDIATE")
+        return _gravar_motorista(conn.cursor(), motorista_id, nome, veiculo, capacidades, lat, lon, ativo)
+
+@cronometrado()
+def carregar_motoristas_alterados(desde_versao=0):
+    """Retorna os motoristas alterados depois de desde_versao, em ordem de versão."""
+    with conexao() as conn:
         cursor = conn.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password BLOB NOT NULL,
-            profile TEXT NOT NULL)""")
-        
-        cursor.execute("""CREATE TABLE IF NOT EXISTS historico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario TEXT NOT NULL,
-            motorista TEXT NOT NULL,
-            necessidades TEXT NOT NULL,
-            status TEXT NOT NULL,
-            data TEXT NOT NULL)""")
+        cursor.execute("""SELECT id, nome, veiculo, capacidades, lat, lon, ativo, versao FROM drivers
+                          WHERE versao > ? ORDER BY versao""", (desde_versao,))
+        return [
+            {"id": row[0], "name": row[1], "veiculo": row[2], "capabilities": json.loads(row[3]),
+             "lat": row[4], "lon": row[5], "ativo": bool(row[6]), "versao": row[7]}
+            for row in cursor.fetchall()
+        ]
+
+@cronometrado()
+def carregar_nomes_motoristas(ids):
+    """Retorna {id: nome} só dos motoristas pedidos (ativos ou não), sem ler a frota toda."""
+    ids = list(dict.fromkeys(ids))
+    nomes = {}
+    with conexao() as conn:
+        # Em blocos, abaixo do limite de parâmetros por comando do SQLite
+        for inicio in range(0, len(ids), 500):
+            bloco = ids[inicio:inicio + 500]
+            nomes.update(conn.execute(f"SELECT id, nome FROM drivers WHERE id IN ({', '.join('?' * len(bloco))})",
+                                      bloco).fetchall())
+    return nomes
+
+@cronometrado()
+def reservar_motorista(motorista_id, usuario, ttl_s):
+    """Reserva o motorista por ttl_s segundos se ele estiver livre (sem reserva ou com a reserva vencida).
+    Retorna o instante (time.time()) em que a reserva expira, ou None se outro já o reservou.
+    """
+    agora = time.time()
+    with conexao() as conn:
         conn.commit()
+        # BEGIN IMMEDIATE trava a escrita já na leitura da reserva atual: dois pedidos
+        # simultâneos nunca veem o mesmo motorista livre
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute("""INSERT INTO reservas (motorista_id, usuario, expira_em) VALUES (?, ?, ?)
+            ON CONFLICT (motorista_id) DO UPDATE SET usuario = excluded.usuario, expira_em = excluded.expira_em
+            WHERE reservas.expira_em <= ?""", (motorista_id, usuario, agora + ttl_s, agora))
+        return agora + ttl_s if cursor.rowcount == 1 else None
+
+@cronometrado()
+def liberar_reserva(motorista_id, usuario=None):
+    """Apaga a reserva do motorista (só se for deste usuário, quando dado). Retorna True se havia uma."""
+    with conexao() as conn:
+        if usuario is None:
+            cursor = conn.execute("DELETE FROM reservas WHERE motorista_id = ?", (motorista_id,))
+        else:
+            cursor = conn.execute("DELETE FROM reservas WHERE motorista_id = ? AND usuario = ?",
+                                  (motorista_id, usuario))
+        return cursor.rowcount == 1
+
+@cronometrado()
+def carregar_reservas_ativas():
+    """Retorna {motorista_id: expira_em} das reservas ainda válidas."""
+    with conexao() as conn:
+        return dict(conn.execute("SELECT motorista_id, expira_em FROM reservas WHERE expira_em > ?",
+                                 (time.time(),)).fetchall())
+
+@cronometrado()
+def iniciar_acompanhamento(motorista_id, usuario, partida, origem, inicio, expira_em):
+    """Começa (ou recomeça) a corrida acompanhada do motorista, sem posições de GPS."""
+    with conexao() as conn:
+        conn.execute("DELETE FROM posicoes_motorista WHERE motorista_id = ?", (motorista_id,))
+        conn.execute("""INSERT OR REPLACE INTO acompanhamentos
+            (motorista_id, usuario, partida_lat, partida_lon, origem_lat, origem_lon, inicio, expira_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", (motorista_id, usuario, *partida, *origem, inicio, expira_em))
+
+@cronometrado()
+def carregar_acompanhamento(motorista_id):
+    """Retorna {"usuario", "partida", "origem", "inicio", "expira_em"} da corrida ainda válida, ou None."""
+    with conexao() as conn:
+        linha = conn.execute("""SELECT usuario, partida_lat, partida_lon, origem_lat, origem_lon, inicio, expira_em
+            FROM acompanhamentos WHERE motorista_id = ? AND expira_em > ?""", (motorista_id, time.time())).fetchone()
+    if linha is None:
+        return None
+    return {"usuario": linha[0], "partida": (linha[1], linha[2]), "origem": (linha[3], linha[4]),
+            "inicio": linha[5], "expira_em": linha[6]}
+
+@cronometrado()
+def registrar_posicao_motorista(motorista_id, lat, lon, instante, maximo):
+    """Guarda a posição se o motorista tem corrida acompanhada, mantendo só as `maximo` mais recentes.
+    Retorna False se não há corrida.
+    """
+    with conexao() as conn:
+        cursor = conn.execute("""INSERT OR REPLACE INTO posicoes_motorista (motorista_id, instante, lat, lon)
+            SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM acompanhamentos WHERE motorista_id = ? AND expira_em > ?)""",
+            (motorista_id, instante, lat, lon, motorista_id, instante))
+        if cursor.rowcount != 1:
+            return False
+        # Buffer circular: apaga o que passou das `maximo` posições mais recentes
+        conn.execute("""DELETE FROM posicoes_motorista WHERE motorista_id = ? AND instante <= (
+            SELECT instante FROM posicoes_motorista WHERE motorista_id = ? ORDER BY instante DESC LIMIT 1 OFFSET ?)""",
+            (motorista_id, motorista_id, maximo))
+        return True
+
+@cronometrado()
+def carregar_posicoes_motorista(motorista_id, limite):
+    """As `limite` posições mais recentes do motorista, da mais antiga à mais recente: [(instante, lat, lon)]."""
+    with conexao() as conn:
+        linhas = conn.execute("""SELECT instante, lat, lon FROM posicoes_motorista WHERE motorista_id = ?
+            ORDER BY instante DESC LIMIT ?""", (motorista_id, limite)).fetchall()
+    return linhas[::-1]
 
+@cronometrado()
+def encerrar_acompanhamento(motorista_id, usuario=None):
+    """Apaga a corrida acompanhada (só a deste usuário, quando dado) e as posições do motorista."""
+    with conexao() as conn:
+        if usuario is None:
+            cursor = conn.execute("DELETE FROM acompanhamentos WHERE motorista_id = ?", (motorista_id,))
+        else:
+            cursor = conn.execute("DELETE FROM acompanhamentos WHERE motorista_id = ? AND usuario = ?",
+                                  (motorista_id, usuario))
+        if cursor.rowcount:
+            conn.execute("DELETE FROM posicoes_motorista WHERE motorista_id = ?", (motorista_id,))
+
+@cronometrado()
 def add_user(username, password, profile):
-    """Adiciona um novo usuário ao banco de dados."""
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    with get_db_connection() as conn:
+    """Adiciona um novo usuário ao banco de dados. Retorna False se o nome já existir."""
+    from servico_auth import gerar_hash
+    hashed = gerar_hash(password)
+    with conexao() as conn:
         cursor = conn.cursor()
         try:
             cursor.execute('INSERT INTO users (username, password, profile) VALUES (?, ?, ?)', (username, hashed, profile))
-            conn.commit()
             return True
         except sqlite3.IntegrityError:
-            st.error("Este nome de usuário já existe.")
             return False
 
+@cronometrado()
 def get_user(username):
-    """Busca os dados de um usuário pelo nome de usuário."""
-    with get_db_connection() as conn:
-        conn.row_factory = sqlite3.Row
+    """Busca os dados de um usuário pelo nome de usuário.
+    Retorna {"username", "password" (hash em bytes), "profile"} ou None.
+    """
+    with conexao() as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT username, password, profile FROM users WHERE username = ?', (username,))
         user = cursor.fetchone()
         if user:
-            return dict(user)
+            password = user[1].encode('utf-8') if isinstance(user[1], str) else bytes(user[1])
+            return {"username": user[0], "password": password, "profile": user[2]}
         return None
 
+@cronometrado()
+def atualizar_senha(username, hashed):
+    """Troca o hash da senha de um usuário."""
+    with conexao() as conn:
+        conn.execute('UPDATE users SET password = ? WHERE username = ?', (hashed, username))
+
+@cronometrado()
 def user_exists(username):
     """Verifica se um nome de usuário já existe."""
-    with get_db_connection() as conn:
+    with conexao() as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT 1 FROM users WHERE username = ?', (username,))
         return cursor.fetchone() is not None
 
-def salvar_corrida(usuario, motorista, necessidades, status):
-    """Salva uma corrida no histórico."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        data = datetime.now().strftime("%d/%m/%Y %H:%M")
-        cursor.execute("INSERT INTO historico (usuario, motorista, necessidades, status, data) VALUES (?, ?, ?, ?, ?)",
-                       (usuario, motorista, ', '.join(necessidades), status, data))
+_gravador_corridas = None
+_caminho_gravador = None
+_gravador_lock = threading.Lock()
+
+def _somar_estatisticas(linhas):
+    """Agrega um lote de corridas em {(dimensao, chave, dia): [corridas, receita]}."""
+    soma = {}
+    for usuario, motorista, lista, status, data, veiculo, preco, motorista_id in linhas:
+        dia = data[:10]
+        chaves = [('dia', ''), ('motorista', _chave_motorista(motorista_id, motorista)), ('veiculo', veiculo or '')]
+        chaves.extend(('necessidade', n) for n in dict.fromkeys(lista))
+        for dimensao, chave in chaves:
+            total = soma.setdefault((dimensao, chave, dia), [0, 0.0])
+            total[0] += 1
+            total[1] += preco or 0.0
+    return soma
+
+@cronometrado()
+def _gravar_corridas(conn, linhas):
+    try:
+        necessidades = []
+        for usuario, motorista, lista, status, data, veiculo, preco, motorista_id in linhas:
+            cursor = conn.execute(
+                """INSERT INTO historico (usuario, motorista, necessidades, status, data, veiculo, preco, motorista_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (usuario, motorista, ', '.join(lista), status, data, veiculo, preco, motorista_id))
+            necessidades.extend((n, data, cursor.lastrowid) for n in dict.fromkeys(lista))
+        conn.executemany("INSERT INTO historico_necessidades (necessidade, data, corrida_id) VALUES (?, ?, ?)",
+                         necessidades)
+        # Estatísticas atualizadas na mesma transação das corridas
+        conn.executemany("""INSERT INTO estatisticas_corridas (dimensao, chave, dia, corridas, receita)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (dimensao, dia, chave) DO UPDATE SET
+                corridas = corridas + excluded.corridas, receita = receita + excluded.receita""",
+            [chave + tuple(total) for chave, total in _somar_estatisticas(linhas).items()])
         conn.commit()
+        contar("db.lotes_corridas")
+        contar("db.corridas_gravadas", len(linhas))
+    except BaseException:
+        conn.rollback()
+        raise
+
+def _criar_gravador_corridas():
+    # Conexão própria da thread do gravador, com fsync a cada commit: a corrida
+    # precisa estar no disco quando salvar_corrida retorna.
+    conn = get_db_connection()
+    conn.execute("PRAGMA synchronous=FULL")
+    return GravadorEmLote(lambda linhas: _gravar_corridas(conn, linhas),
+                          TAMANHO_LOTE_CORRIDAS, ATRASO_MAX_CORRIDAS_S,
+                          nome="gravador-corridas", ao_encerrar=conn.close)
+
+def encerrar_gravador_corridas():
+    """Grava as corridas pendentes e para a thread do gravador."""
+    global _gravador_corridas
+    with _gravador_lock:
+        gravador, _gravador_corridas = _gravador_corridas, None
+    if gravador is not None:
+        gravador.encerrar()
 
+atexit.register(encerrar_gravador_corridas)
+
+@cronometrado()
+def salvar_corrida(usuario, motorista, necessidades, status, veiculo=None, preco=None, motorista_id=None):
+    """Salva uma corrida no histórico (motorista é o nome exibido; as estatísticas usam motorista_id).
+    A inserção vai para o gravador em lote; a função retorna depois do commit.
+    """
+    global _gravador_corridas, _caminho_gravador
+    data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with _gravador_lock:
+        if _gravador_corridas is None or _caminho_gravador != DATABASE_PATH:
+            if _gravador_corridas is not None:
+                _gravador_corridas.encerrar()
+            _gravador_corridas = _criar_gravador_corridas()
+            _caminho_gravador = DATABASE_PATH
+        gravador = _gravador_corridas
+    gravador.enviar((usuario, motorista, list(necessidades), status, data, veiculo, preco, motorista_id))
+
+@cronometrado()
+def contar_corridas_por_necessidade(inicio=None, fim=None):
+    """Conta as corridas de cada necessidade com data em [inicio, fim).
+    inicio e fim são textos ISO ("aaaa-mm-dd" ou "aaaa-mm-dd hh:mm:ss"); None não limita.
+    """
+    inicio = inicio or ""
+    fim = fim or "\uffff"
+    with conexao() as conn:
+        # Percorre as necessidades distintas saltando pela chave, sem varrer a tabela
+        necessidades = [linha[0] for linha in conn.execute("""
+            WITH RECURSIVE distintas (necessidade) AS (
+                SELECT MIN(necessidade) FROM historico_necessidades
+                UNION ALL
+                SELECT (SELECT MIN(necessidade) FROM historico_necessidades WHERE necessidade > distintas.necessidade)
+                FROM distintas WHERE necessidade IS NOT NULL)
+            SELECT necessidade FROM distintas WHERE necessidade IS NOT NULL""")]
+        # Uma busca por faixa na chave (necessidade, data) para cada necessidade
+        return {
+            n: conn.execute("""SELECT COUNT(*) FROM historico_necessidades
+                               WHERE necessidade = ? AND data >= ? AND data < ?""", (n, inicio, fim)).fetchone()[0]
+            for n in necessidades
+        }
+
+@cronometrado()
+def carregar_estatisticas(dimensao, desde_dia, ate_dia=None):
+    """Lê as estatísticas de uma dimensão entre dois dias ("aaaa-mm-dd", inclusive).
+    Retorna linhas (chave, dia, corridas, receita) sem tocar no histórico.
+    """
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""SELECT chave, dia, corridas, receita FROM estatisticas_corridas
+                          WHERE dimensao = ? AND dia >= ? AND dia <= ? ORDER BY dia, chave""",
+                       (dimensao, desde_dia, ate_dia or "9999-12-31"))
+        return cursor.fetchall()
+
+@cronometrado()
 def carregar_historico(usuario):
     """Carrega o histórico de corridas de um usuário."""
-    with get_db_connection() as conn:
+    with conexao() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT motorista, necessidades, status, data FROM historico WHERE usuario = ? ORDER BY id DESC", (usuario,))
         return cursor.fetchall()
 
-def mostrar_historico():
-    st.subheader("Histórico de Corridas")
-    if 'username' in st.session_state:
-        historico = carregar_historico(st.session_state.username)
-        if historico:
-            df = pd.DataFrame(historico, columns=["Motorista", "Necessidades", "Status", "Data"])
-            st.dataframe(df, use_container_width=True)
+@cronometrado()
+def carregar_historico_pagina(usuario, antes_de_id=None, limite=TAMANHO_PAGINA_HISTORICO):
+    """Carrega uma página do histórico (paginação por chave: id < antes_de_id).
+    Retorna (linhas, cursor da próxima página ou None se não houver mais).
+    """
+    # LIMIT negativo no SQLite é "sem limite": leria o histórico inteiro
+    if limite < 1:
+        raise ValueError("limite deve ser pelo menos 1")
+    with conexao() as conn:
+        cursor = conn.cursor()
+        if antes_de_id is None:
+            cursor.execute("""SELECT id, motorista, necessidades, status, data FROM historico
+                              WHERE usuario = ? ORDER BY id DESC LIMIT ?""", (usuario, limite + 1))
         else:
-            st.info("Nenhuma corrida registrada ainda.")
-    else:
-        st.warning("Faça login para ver seu histórico.")
-
-def mostrar_precos():
-    st.subheader("Tabela de Preços")
-    tabela_precos = pd.DataFrame({
-        "Tipo de Veículo": [
-            "Carro Padrão", "Carro Compacto Econômico", "Veículo Adaptado com Rampa",
-            "Veículo com Elevador", "Carro com Motorista Treinado (Sensorial)",
-            "Carro com Acompanhante", "Veículo Compartilhado (Sustentável)",
-            "Van Acessível (Grupo ou Família)", "Carro Elétrico Sustentável"
-        ],
-        "Indicado para": [
-            "Pessoas sem deficiência", "Qualquer pessoa", "Cadeirantes",
-            "Pessoas com mobilidade muito reduzida", "Pessoas com deficiência visual ou auditiva",
-            "Pessoas com deficiência intelectual ou idosas", "Todos os públicos",
-            "Grupos com PCDs e acompanhantes", "Todos os públicos"
-        ],
-        "Adaptações Especiais": [
-            "Nenhuma", "Nenhuma", "Rampa, espaço interno ampliado",
-            "Elevador hidráulico, cintos especiais", "Comunicação adaptada (gestual, áudio)",
-            "Espaço para cuidador/a", "Pode ter adaptação",
-            "Rampa, elevador, até 4 cadeirantes", "Nenhuma (ou leve adaptação)"
-        ],
-        "Benefícios Principais": [
-            "Rápido, econômico", "Menor preço, ideal para trajetos curtos",
-            "Acesso com cadeira de rodas, segurança", "Conforto e autonomia no embarque",
-            "Mais atenção e cuidado", "Maior segurança emocional",
-            "Mais barato, menos poluição", "Ideal para clínicas, eventos, passeios",
-            "Redução de impacto ambiental, silencioso"
-        ],
-        "Preço Estimado": [
-            "A partir de R$ 8,00", "A partir de R$ 6,00", "A partir de R$ 12,00",
-            "A partir de R$ 15,00", "A partir de R$ 10,00", "A partir de R$ 13,00",
-            "A partir de R$ 6,00", "A partir de R$ 18,00", "A partir de R$ 9,00"
-        ]
-    })
-    st.dataframe(tabela_precos, use_container_width=True)
-
-    output = io.BytesIO()
-    # Verifique se 'xlsxwriter' está no seu requirements.txt
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        tabela_precos.to_excel(writer, index=False)
-    st.download_button("Baixar Excel", output.getvalue(), file_name="precos.xlsx")
\ No newline at end of file
+            cursor.execute("""SELECT id, motorista, necessidades, status, data FROM historico
+                              WHERE usuario = ? AND id < ? ORDER BY id DESC LIMIT ?""",
+                           (usuario, antes_de_id, limite + 1))
+        linhas = cursor.fetchall()
+    proximo = linhas[limite - 1][0] if len(linhas) > limite else None
+    return [linha[1:] for linha in linhas[:limite]], proximo
@@ -0,0 +1,219 @@
+# despacho.py - Despacho em lote: pedidos de uma janela atribuídos aos motoristas com custo mínimo (sem Streamlit)
+#
+# Cada pedido só considera os K_CANDIDATOS motoristas compatíveis mais próximos, o
+# que deixa o grafo pedidos x motoristas esparso. A atribuição de custo mínimo é
+# feita por caminhos aumentantes mais curtos (húngaro com Dijkstra) sobre esse
+# grafo: cada pedido novo só explora os pedidos que disputam os mesmos motoristas.
+
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import reservas
+from matching import proximos_compativeis
+from precos import obter_tarifas
+from rotas import calcular_rota
+
+# Motoristas candidatos por pedido e distância máxima até a origem
+K_CANDIDATOS = 8
+RAIO_DESPACHO_KM = 10.0
+# Peso do preço no custo, em km por real: 0.1 faz R$ 10 valerem 1 km de busca
+PESO_PRECO = 0.1
+# Tempo em que os pedidos são juntados antes de cada rodada de despacho
+JANELA_DESPACHO_S = 0.5
+
+Pedido = namedtuple("Pedido", ["id", "usuario", "origem", "destino", "necessidades"])
+Atribuicao = namedtuple("Atribuicao", ["pedido_id", "motorista_id", "motorista", "veiculo",
+                                       "distancia_km", "preco", "rota"])
+
+
+def atribuir(arestas, custo_sem_par):
+    """Atribuição de custo mínimo num grafo bipartido esparso.
+
+    arestas[i] é a lista de (coluna >= 0, custo >= 0) da linha i. Cada linha tem
+    ainda uma coluna própria "sem par" com custo_sem_par; sendo ele maior que a soma
+    dos custos reais, a solução atende o máximo de linhas possível e, entre essas,
+    tem o menor custo. Retorna {linha: coluna} só das linhas atendidas.
+    """
+    n = len(arestas)
+    par_da_linha = [None] * n
+    custo_do_par = [0.0] * n
+    par_da_coluna = {}
+    # Custo reduzido de u -> v: custo + potencial[u] - potencial[v], sempre >= 0 (os
+    # potenciais só diminuem, então uma linha nova começa com 0)
+    potencial_linha = [0.0] * n
+    potencial_coluna = {}
+    for origem in range(n):
+        # Dijkstra a partir da linha nova até a primeira coluna livre
+        dist_linha = {origem: 0.0}
+        dist_coluna = {}
+        veio_de = {}
+        finalizadas_linhas, finalizadas_colunas = {}, {}
+        fila = [(0.0, False, origem)]  # (distância, é coluna, índice)
+        while True:
+            d, eh_coluna, no = heapq.heappop(fila)
+            if not eh_coluna:
+                if no in finalizadas_linhas:
+                    continue
+                finalizadas_linhas[no] = d
+                base = d + potencial_linha[no]
+                # -1 - linha é a coluna "sem par" da linha
+                for coluna, custo in arestas[no] + [(-1 - no, custo_sem_par)]:
+                    if coluna == par_da_linha[no] or coluna in finalizadas_colunas:
+                        continue
+                    nd = base + custo - potencial_coluna.get(coluna, 0.0)
+                    if nd < dist_coluna.get(coluna, math.inf):
+                        dist_coluna[coluna] = nd
+                        veio_de[coluna] = no
+                        heapq.heappush(fila, (nd, True, coluna))
+                continue
+            if no in finalizadas_colunas:
+                continue
+            finalizadas_colunas[no] = d
+            linha = par_da_coluna.get(no)
+            if linha is None:
+                break
+            # Volta pela atribuição atual da coluna, com custo negativo
+            nd = d + potencial_coluna.get(no, 0.0) - custo_do_par[linha] - potencial_linha[linha]
+            if linha not in finalizadas_linhas and nd < dist_linha.get(linha, math.inf):
+                dist_linha[linha] = nd
+                heapq.heappush(fila, (nd, False, linha))
+
+        # Potenciais novos mantêm os custos reduzidos >= 0; só os nós finalizados mudam
+        limite = d
+        for linha, dist in finalizadas_linhas.items():
+            potencial_linha[linha] += dist - limite
+        for coluna, dist in finalizadas_colunas.items():
+            potencial_coluna[coluna] = potencial_coluna.get(coluna, 0.0) + dist - limite
+        # Troca as atribuições ao longo do caminho aumentante
+        coluna = no
+        while True:
+            linha = veio_de[coluna]
+            anterior = par_da_linha[linha]
+            par_da_linha[linha] = coluna
+            par_da_coluna[coluna] = linha
+            custo_do_par[linha] = custo_sem_par if coluna < 0 else dict(arestas[linha])[coluna]
+            if linha == origem:
+                break
+            coluna = anterior
+    return {linha: coluna for linha, coluna in enumerate(par_da_linha) if coluna >= 0}
+
+
+def despachar(pedidos, frota, ocupados=(), k=K_CANDIDATOS, raio_km=RAIO_DESPACHO_KM, peso_preco=PESO_PRECO):
+    """Atribui os pedidos aos motoristas livres minimizando distância até a origem + peso_preco * preço.
+
+    Maximiza primeiro o número de pedidos atendidos e, entre as soluções com esse
+    número, o custo total. Retorna (atribuições, pedidos sem motorista).
+    """
+    tarifas = obter_tarifas()
+    excluir = {frota.posicao[m] for m in ocupados if m in frota.posicao}
+    rotas = [calcular_rota(p.origem, p.destino) for p in pedidos]
+
+    # Arestas de cada pedido só para os seus k candidatos
+    arestas = [[] for _ in pedidos]
+    cotacoes = {}
+    for i, (pedido, rota) in enumerate(zip(pedidos, rotas)):
+        proximos = proximos_compativeis(frota.indice, frota.grade, *pedido.origem, pedido.necessidades,
+                                        k=k, raio_km=raio_km, excluir=excluir)
+        if not proximos:
+            continue
+        veiculos = [frota.motoristas[pos]["veiculo"] for _, pos in proximos]
+        totais = tarifas.cotar_lote(veiculos, pedido.necessidades, rota.distancia_km, rota.duracao_min).total
+        for (dist, pos), preco in zip(proximos, totais.tolist()):
+            cotacoes[i, pos] = (dist, preco)
+            arestas[i].append((pos, dist + peso_preco * preco))
+
+    # Ficar sem motorista custa mais que qualquer soma de custos reais: a solução
+    # ótima nunca deixa um pedido de fora só para baixar o custo dos outros
+    sem_par = 1.0 + sum(c for lista in arestas for _, c in lista)
+    atribuicoes = []
+    for i, pos in sorted(atribuir(arestas, sem_par).items()):
+        motorista = frota.motoristas[pos]
+        dist, preco = cotacoes[i, pos]
+        atribuicoes.append(Atribuicao(pedidos[i].id, motorista["id"], motorista["name"], motorista["veiculo"],
+                                      round(dist, 2), preco, rotas[i]))
+    atendidos = {a.pedido_id for a in atribuicoes}
+    return atribuicoes, [p for p in pedidos if p.id not in atendidos]
+
+
+class Despachante:
+    """Junta os pedidos que chegam durante JANELA_DESPACHO_S e despacha todos de uma vez numa thread própria.
+
+    pedir() devolve um Future com a Atribuicao (ou None se não houver motorista).
+    Cada motorista atribuído é reservado (reservas.py) até o fim estimado da corrida
+    ou até liberar(motorista_id); reservados não entram nas rodadas seguintes.
+    """
+
+    def __init__(self, obter_frota, janela_s=JANELA_DESPACHO_S):
+        self.obter_frota = obter_frota
+        self.janela_s = janela_s
+        self._pendentes = []
+        self._proximo_id = 0
+        self._condicao = threading.Condition()
+        self._thread = threading.Thread(target=self._executar, name="despacho", daemon=True)
+        self._thread.start()
+
+    def pedir(self, usuario, origem, destino, necessidades):
+        futuro = Future()
+        with self._condicao:
+            self._proximo_id += 1
+            self._pendentes.append((Pedido(self._proximo_id, usuario, tuple(origem), tuple(destino),
+                                           list(necessidades)), futuro))
+            self._condicao.notify()
+        return futuro
+
+    def liberar(self, motorista_id):
+        reservas.liberar(motorista_id)
+
+    def _rodada(self, lote):
+        """Despacha o lote; devolve os pedidos cujo motorista foi reservado por outro processo antes."""
+        por_id = {pedido.id: (pedido, futuro) for pedido, futuro in lote}
+        atribuicoes, sem_motorista = despachar([p for p, _ in lote], self.obter_frota(), reservas.reservados())
+        repetir = []
+        for atribuicao in atribuicoes:
+            pedido, futuro = por_id[atribuicao.pedido_id]
+            ttl = reservas.ttl_corrida(atribuicao.distancia_km, atribuicao.rota.duracao_min)
+            if reservas.reservar(atribuicao.motorista_id, pedido.usuario, ttl):
+                futuro.set_result(atribuicao)
+            else:
+                repetir.append((pedido, futuro))
+        for pedido in sem_motorista:
+            por_id[pedido.id][1].set_result(None)
+        return repetir
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes:
+                    self._condicao.wait()
+            time.sleep(self.janela_s)
+            with self._condicao:
+                lote, self._pendentes = self._pendentes, []
+            try:
+                repetir = self._rodada(lote)
+            except BaseException as erro:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(erro)
+                continue
+            # Voltam para a próxima rodada, que já não vê o motorista perdido
+            with self._condicao:
+                self._pendentes[:0] = repetir
+
+
+_despachante = None
+_despachante_lock = threading.Lock()
+
+
+def obter_despachante():
+    """Despachante do processo, criado na primeira chamada."""
+    global _despachante
+    if _despachante is None:
+        with _despachante_lock:
+            if _despachante is None:
+                from frota import obter_frota
+                _despachante = Despachante(obter_frota)
+    return _despachante
@@ -0,0 +1,76 @@
+# diagnostico.py - Diagnóstico de inicialização: tempo de importação dos módulos (sem Streamlit)
+#
+# Quanto custa subir um processo novo até a tela de login:
+#   python diagnostico.py importacoes
+# Outros módulos (ex.: o que a página Home carrega) e saída em JSON para acompanhar:
+#   python diagnostico.py importacoes --modulos motoristas --json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# O que app.py importa antes de mostrar a tela de login
+MODULOS_INICIO = ["streamlit", "auth", "db", "utils"]
+# Dependências pesadas que só as páginas que as usam devem carregar
+MODULOS_PESADOS = ["pandas", "folium", "streamlit_folium", "bcrypt", "numpy", "pyarrow", "xlsxwriter", "pyttsx3"]
+
+
+def _ler_importtime(saida):
+    """Converte a saída de -X importtime em [(modulo, proprio_us, acumulado_us, nivel)]."""
+    registros = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|", 2)
+        nome = nome.rstrip()
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        registros.append((nome.strip(), int(proprio), int(acumulado), nivel))
+    return registros
+
+
+def medir_importacoes(modulos=MODULOS_INICIO):
+    """Importa os módulos num processo Python novo com -X importtime e resume o resultado."""
+    comando = [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modulos)]
+    processo = subprocess.run(comando, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+    registros = _ler_importtime(processo.stderr)
+    carregados = {nome for nome, _, _, _ in registros}
+    total_us = sum(acumulado for _, _, acumulado, nivel in registros if nivel == 0)
+    return {
+        "modulos": list(modulos),
+        "total_ms": round(total_us / 1000, 1),
+        "pesados_carregados": [m for m in MODULOS_PESADOS if m in carregados],
+        "mais_lentos": [
+            {"modulo": nome, "acumulado_ms": round(acumulado / 1000, 1), "proprio_ms": round(proprio / 1000, 1)}
+            for nome, proprio, acumulado, nivel in sorted(registros, key=lambda r: -r[2]) if nivel == 0
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diagnóstico de inicialização do ParaTodos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    importacoes = comandos.add_parser("importacoes", help="tempo de importação num processo novo")
+    importacoes.add_argument("--modulos", nargs="+", default=MODULOS_INICIO)
+    importacoes.add_argument("--top", type=int, default=15, help="quantos módulos listar")
+    importacoes.add_argument("--json", action="store_true", help="uma linha JSON (para comparar entre versões)")
+    args = parser.parse_args()
+
+    resultado = medir_importacoes(args.modulos)
+    resultado["mais_lentos"] = resultado["mais_lentos"][:args.top]
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+        return
+    print(f"Importar {', '.join(resultado['modulos'])}: {resultado['total_ms']} ms")
+    print(f"Dependências pesadas carregadas: {', '.join(resultado['pesados_carregados']) or 'nenhuma'}")
+    print(f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo")
+    for item in resultado["mais_lentos"]:
+        print(f"{item['acumulado_ms']:>15} {item['proprio_ms']:>13}  {item['modulo']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# espacial.py - Índice espacial em grade para buscar motoristas próximos (sem Streamlit)
+
+import heapq
+import math
+
+import numpy as np
+
+from geo import RAIO_TERRA_KM, distancias_km_lote
+
+KM_POR_GRAU_LAT = math.pi * RAIO_TERRA_KM / 180
+# Margem no limite inferior de distância de um anel (a grade é plana, a distância não)
+FOLGA_ANEL = 0.99
+
+
+class GradeEspacial:
+    """Grade regular de células (~tamanho_celula_km de lado) com as posições dos motoristas.
+
+    A busca percorre anéis de células a partir da célula do passageiro e para assim
+    que nenhum anel seguinte pode conter alguém mais perto que o k-ésimo encontrado
+    ou dentro do raio. Só as células visitadas têm a distância calculada.
+    """
+
+    def __init__(self, lats, lons, tamanho_celula_km=1.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.tamanho_celula_km = tamanho_celula_km
+        self.graus_lat = tamanho_celula_km / KM_POR_GRAU_LAT
+        # Usa a maior latitude absoluta para que nenhuma célula tenha menos que
+        # tamanho_celula_km de largura no sentido leste-oeste.
+        lat_max = float(np.abs(self.lats).max()) if len(self.lats) else 0.0
+        self.graus_lon = tamanho_celula_km / (KM_POR_GRAU_LAT * max(math.cos(math.radians(lat_max)), 0.01))
+        self.celulas = {}
+        for pos, (lat, lon) in enumerate(zip(self.lats.tolist(), self.lons.tolist())):
+            self.celulas.setdefault(self._celula(lat, lon), []).append(pos)
+
+    def _celula(self, lat, lon):
+        return (math.floor(lat / self.graus_lat), math.floor(lon / self.graus_lon))
+
+    def _anel(self, centro, r):
+        """Células na borda do quadrado de raio r (em células) ao redor do centro."""
+        ci, cj = centro
+        if r == 0:
+            yield centro
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def ordenar_por_distancia(self, lat, lon, posicoes, k, raio_km):
+        """Calcula a distância só para as posições dadas e retorna os k mais próximos no raio."""
+        if k <= 0 or not len(posicoes):
+            return []
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        distancias = distancias_km_lote(lat, lon, self.lats[posicoes], self.lons[posicoes])
+        dentro = distancias <= raio_km
+        posicoes, distancias = posicoes[dentro], distancias[dentro]
+        if len(distancias) > k:
+            menores = np.argpartition(distancias, k - 1)[:k]
+            posicoes, distancias = posicoes[menores], distancias[menores]
+        ordem = np.lexsort((posicoes, distancias))
+        return list(zip(distancias[ordem].tolist(), posicoes[ordem].tolist()))
+
+    def mais_proximos(self, lat, lon, k, raio_km, aceitar=None):
+        """Retorna até k pares (distância_km, posição) dentro do raio, do mais próximo ao mais distante.
+
+        aceitar é um filtro opcional aplicado à posição antes do cálculo da distância.
+        """
+        if k <= 0 or not self.celulas:
+            return []
+        centro = self._celula(lat, lon)
+        max_anel = math.ceil(raio_km / (self.tamanho_celula_km * FOLGA_ANEL)) + 1
+        melhores = []  # heap de (-distância, posição) com os k melhores
+        for r in range(max_anel + 1):
+            # Qualquer célula do anel r está a pelo menos (r - 1) células de distância
+            limite_inferior = (r - 1) * self.tamanho_celula_km * FOLGA_ANEL
+            if limite_inferior > raio_km:
+                break
+            if len(melhores) == k and limite_inferior > -melhores[0][0]:
+                break
+            anel = [
+                pos
+                for celula in self._anel(centro, r)
+                for pos in self.celulas.get(celula, ())
+                if aceitar is None or aceitar(pos)
+            ]
+            # Distâncias do anel inteiro calculadas em lote
+            for dist, pos in self.ordenar_por_distancia(lat, lon, anel, k, raio_km):
+                if len(melhores) < k:
+                    heapq.heappush(melhores, (-dist, pos))
+                elif dist < -melhores[0][0]:
+                    heapq.heapreplace(melhores, (-dist, pos))
+        return sorted((-neg, pos) for neg, pos in melhores)
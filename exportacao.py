@@ -0,0 +1,138 @@
+# exportacao.py - Exportação do histórico de corridas em CSV, XLSX ou Parquet, em blocos (sem Streamlit)
+#
+# Exportar pela linha de comando:
+#   python exportacao.py csv historico.csv
+#   python exportacao.py xlsx historico_ana.xlsx --usuario ana
+
+import argparse
+import codecs
+import csv
+
+import db
+
+# Linhas lidas do banco por vez; a memória usada não depende do tamanho da tabela
+TAMANHO_BLOCO = 5000
+COLUNAS = ["id", "usuario", "motorista", "necessidades", "status", "data", "veiculo", "preco"]
+# Limite do Excel por planilha (1.048.576 linhas) menos o cabeçalho; o resto vai para planilhas seguintes
+LINHAS_POR_PLANILHA = 1_048_575
+FORMATOS = {
+    "csv": ("historico.csv", "text/csv"),
+    "xlsx": ("historico.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("historico.parquet", "application/octet-stream"),
+}
+
+
+def blocos_historico(usuario=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera listas de até tamanho_bloco linhas do histórico (todas as corridas ou só as do usuário).
+
+    Usa uma conexão própria numa única leitura: com WAL, o resultado é uma foto
+    consistente do banco e não bloqueia quem grava corridas enquanto exporta.
+    """
+    conn = db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.arraysize = tamanho_bloco
+        if usuario is None:
+            cursor.execute(f"SELECT {', '.join(COLUNAS)} FROM historico ORDER BY id")
+        else:
+            cursor.execute(f"SELECT {', '.join(COLUNAS)} FROM historico WHERE usuario = ? ORDER BY id",
+                           (usuario,))
+        while True:
+            bloco = cursor.fetchmany()
+            if not bloco:
+                break
+            yield bloco
+    finally:
+        conn.close()
+
+
+def exportar_csv(destino, usuario=None):
+    """Escreve o CSV (UTF-8 com BOM, para abrir certo no Excel) em destino, um arquivo binário."""
+    destino.write(codecs.BOM_UTF8)
+    texto = codecs.getwriter("utf-8")(destino)
+    escritor = csv.writer(texto)
+    escritor.writerow(COLUNAS)
+    total = 0
+    for bloco in blocos_historico(usuario):
+        escritor.writerows(bloco)
+        total += len(bloco)
+    return total
+
+
+def exportar_xlsx(destino, usuario=None, linhas_por_planilha=LINHAS_POR_PLANILHA):
+    """Escreve o XLSX em destino (caminho ou arquivo binário) no modo de memória constante do xlsxwriter.
+    Passando de linhas_por_planilha, continua em "Histórico 2", "Histórico 3"...
+    """
+    import xlsxwriter
+
+    livro = xlsxwriter.Workbook(destino, {"constant_memory": True, "in_memory": False})
+    try:
+        planilha, linha_atual, total = None, linhas_por_planilha, 0
+        for bloco in blocos_historico(usuario):
+            # No modo de memória constante cada linha é descarregada ao passar para a próxima
+            for linha in bloco:
+                if linha_atual == linhas_por_planilha:
+                    numero = total // linhas_por_planilha + 1
+                    planilha = livro.add_worksheet("Histórico" if numero == 1 else f"Histórico {numero}")
+                    planilha.write_row(0, 0, COLUNAS)
+                    linha_atual = 0
+                linha_atual += 1
+                # write_row devolve -1 (sem levantar) fora dos limites da planilha
+                if planilha.write_row(linha_atual, 0, linha) == -1:
+                    raise ValueError(f"Linha {linha_atual} fora dos limites da planilha do Excel.")
+                total += 1
+        if planilha is None:
+            livro.add_worksheet("Histórico").write_row(0, 0, COLUNAS)
+    finally:
+        livro.close()
+    return total
+
+
+def exportar_parquet(destino, usuario=None):
+    """Escreve o Parquet em destino (caminho ou arquivo binário), um grupo de linhas por bloco.
+    Requer pyarrow, que é opcional (ImportError se não estiver instalado).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([
+        ("id", pa.int64()), ("usuario", pa.string()), ("motorista", pa.string()),
+        ("necessidades", pa.string()), ("status", pa.string()), ("data", pa.string()),
+        ("veiculo", pa.string()), ("preco", pa.float64()),
+    ])
+    total = 0
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloco in blocos_historico(usuario):
+            colunas = list(zip(*bloco))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema))
+            total += len(bloco)
+    return total
+
+
+EXPORTADORES = {"csv": exportar_csv, "xlsx": exportar_xlsx, "parquet": exportar_parquet}
+
+
+def exportar(formato, destino, usuario=None):
+    """Exporta o histórico no formato pedido para destino (arquivo binário). Retorna o número de linhas."""
+    return EXPORTADORES[formato](destino, usuario)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o histórico de corridas do ParaTodos")
+    parser.add_argument("formato", choices=sorted(EXPORTADORES))
+    parser.add_argument("saida")
+    parser.add_argument("--usuario", help="exporta só as corridas deste usuário")
+    parser.add_argument("--banco", default=db.DATABASE_PATH)
+    args = parser.parse_args()
+
+    db.DATABASE_PATH = args.banco
+    db.init_db()
+    with open(args.saida, "wb") as saida:
+        total = exportar(args.formato, saida, args.usuario)
+    print(f"{total} corridas exportadas para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
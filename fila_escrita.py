@@ -0,0 +1,80 @@
+# fila_escrita.py - Gravação em lote (group commit) feita por uma thread dedicada (sem Streamlit)
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_FIM = object()
+
+
+class GravadorEmLote:
+    """Junta itens enviados por várias threads e grava em lotes numa thread só.
+
+    gravar_lote(itens) é chamada na thread do gravador e deve gravar e confirmar
+    (commit) todos os itens de uma vez. Um lote é gravado quando junta
+    tamanho_lote itens ou quando o item mais antigo espera atraso_max_s.
+    enviar() só retorna depois que o lote do item foi confirmado. ao_encerrar, se
+    dada, roda na thread do gravador depois do último lote.
+    """
+
+    def __init__(self, gravar_lote, tamanho_lote=64, atraso_max_s=0.005, nome="gravador-em-lote", ao_encerrar=None):
+        self.gravar_lote = gravar_lote
+        self.ao_encerrar = ao_encerrar
+        self.tamanho_lote = tamanho_lote
+        self.atraso_max_s = atraso_max_s
+        self._fila = queue.Queue()
+        self._encerrado = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._executar, name=nome, daemon=True)
+        self._thread.start()
+
+    def enviar(self, item, timeout=None):
+        """Enfileira o item e espera a gravação. Repassa a exceção se o lote falhar."""
+        futuro = Future()
+        with self._lock:
+            if self._encerrado:
+                raise RuntimeError("Gravador encerrado.")
+            self._fila.put((item, futuro))
+        return futuro.result(timeout)
+
+    def encerrar(self, timeout=None):
+        """Grava o que estiver pendente e para a thread."""
+        with self._lock:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._fila.put(_FIM)
+        self._thread.join(timeout)
+
+    def _executar(self):
+        fim = False
+        while not fim:
+            primeiro = self._fila.get()
+            if primeiro is _FIM:
+                break
+            lote = [primeiro]
+            prazo = time.monotonic() + self.atraso_max_s
+            while len(lote) < self.tamanho_lote:
+                restante = prazo - time.monotonic()
+                try:
+                    proximo = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if proximo is _FIM:
+                    fim = True
+                    break
+                lote.append(proximo)
+            self._gravar(lote)
+        if self.ao_encerrar is not None:
+            self.ao_encerrar()
+
+    def _gravar(self, lote):
+        try:
+            resultado = self.gravar_lote([item for item, _ in lote])
+        except BaseException as erro:
+            for _, futuro in lote:
+                futuro.set_exception(erro)
+        else:
+            for _, futuro in lote:
+                futuro.set_result(resultado)
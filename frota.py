@@ -0,0 +1,74 @@
+# frota.py - Retrato em memória da frota, compartilhado por todas as sessões (sem Streamlit)
+
+import threading
+import time
+from types import MappingProxyType
+
+from db import carregar_motoristas_alterados
+from espacial import GradeEspacial
+from matching import IndiceCapacidades
+
+# Intervalo mínimo entre consultas ao banco por motoristas alterados
+INTERVALO_ATUALIZACAO_S = 5.0
+
+
+class Frota:
+    """Retrato imutável dos motoristas ativos com os índices de busca já montados."""
+
+    def __init__(self, por_id, versao):
+        self.versao = versao
+        self.por_id = MappingProxyType(por_id)
+        self.motoristas = tuple(por_id.values())
+        self.posicao = {m["id"]: pos for pos, m in enumerate(self.motoristas)}
+        self.indice = IndiceCapacidades(self.motoristas)
+        self.grade = GradeEspacial([m["lat"] for m in self.motoristas], [m["lon"] for m in self.motoristas])
+
+    def __len__(self):
+        return len(self.motoristas)
+
+    def aplicar(self, alterados):
+        """Retorna um novo retrato com as alterações aplicadas (o atual não muda)."""
+        por_id = dict(self.por_id)
+        versao = self.versao
+        for linha in alterados:
+            versao = max(versao, linha["versao"])
+            if linha["ativo"]:
+                por_id[linha["id"]] = _congelar(linha)
+            else:
+                por_id.pop(linha["id"], None)
+        return Frota(por_id, versao)
+
+
+def _congelar(linha):
+    return MappingProxyType({
+        "id": linha["id"],
+        "name": linha["name"],
+        "veiculo": linha["veiculo"],
+        "capabilities": tuple(linha["capabilities"]),
+        "lat": linha["lat"],
+        "lon": linha["lon"],
+    })
+
+
+_frota = Frota({}, 0)
+_ultima_verificacao = None
+_lock = threading.Lock()
+
+
+def obter_frota(forcar=False):
+    """Retorna o retrato atual da frota, buscando no banco só os motoristas alterados.
+
+    O banco é consultado no máximo a cada INTERVALO_ATUALIZACAO_S; entre uma consulta
+    e outra todas as sessões recebem o mesmo objeto.
+    """
+    global _frota, _ultima_verificacao
+    agora = time.monotonic()
+    if not forcar and _ultima_verificacao is not None and agora - _ultima_verificacao < INTERVALO_ATUALIZACAO_S:
+        return _frota
+    with _lock:
+        if forcar or _ultima_verificacao is None or agora - _ultima_verificacao >= INTERVALO_ATUALIZACAO_S:
+            alterados = carregar_motoristas_alterados(_frota.versao)
+            if alterados:
+                _frota = _frota.aplicar(alterados)
+            _ultima_verificacao = time.monotonic()
+        return _frota
@@ -0,0 +1,81 @@
+# geo.py - Funções geográficas (distância e duração) sem dependência do Streamlit
+
+import math
+
+import numpy as np
+
+RAIO_TERRA_KM = 6371
+VELOCIDADE_MEDIA_KM_MIN = 0.5
+
+
+def calcular_distancia_km(lat1, lon1, lat2, lon2):
+    R = RAIO_TERRA_KM
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+
+def estimar_duracao(dist_km):
+    return round(dist_km / VELOCIDADE_MEDIA_KM_MIN)
+
+
+def coordenadas_validas(lat, lon):
+    """True se (lat, lon) é um ponto real da Terra (finito, lat em [-90, 90], lon em [-180, 180])."""
+    # NaN falha em qualquer comparação, então também é recusado aqui
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def interpretar_coordenadas(texto):
+    """Lê "lat, lon" digitado num campo de endereço. Retorna (lat, lon) ou None."""
+    partes = texto.replace(";", ",").split(",")
+    if len(partes) != 2:
+        return None
+    try:
+        lat, lon = float(partes[0]), float(partes[1])
+    except ValueError:
+        return None
+    if coordenadas_validas(lat, lon):
+        return (lat, lon)
+    return None
+
+
+# --- Versões em lote (NumPy) -------------------------------------------------
+# Mesma fórmula das funções acima, aplicada a vetores/matrizes de uma vez.
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    delta_phi = np.radians(lat2 - lat1)
+    delta_lambda = np.radians(lon2 - lon1)
+    a = np.sin(delta_phi / 2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return RAIO_TERRA_KM * c
+
+
+def distancias_km_lote(lat, lon, lats, lons):
+    """Distância (km) de um ponto até N pontos. Retorna um array de tamanho N."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    return _haversine_np(np.float64(lat), np.float64(lon), lats, lons)
+
+
+def distancias_km_pares(lats_origem, lons_origem, lats_destino, lons_destino):
+    """Distância (km) entre cada origem i e o destino i. Retorna um array de tamanho N."""
+    return _haversine_np(np.asarray(lats_origem, dtype=np.float64), np.asarray(lons_origem, dtype=np.float64),
+                         np.asarray(lats_destino, dtype=np.float64), np.asarray(lons_destino, dtype=np.float64))
+
+
+def matriz_distancias_km(lats_origem, lons_origem, lats_destino, lons_destino):
+    """Matriz N×M de distâncias (km) entre N origens e M destinos."""
+    lats_o = np.asarray(lats_origem, dtype=np.float64)[:, None]
+    lons_o = np.asarray(lons_origem, dtype=np.float64)[:, None]
+    lats_d = np.asarray(lats_destino, dtype=np.float64)[None, :]
+    lons_d = np.asarray(lons_destino, dtype=np.float64)[None, :]
+    return _haversine_np(lats_o, lons_o, lats_d, lons_d)
+
+
+def estimar_duracao_lote(dist_km):
+    """Versão em lote de estimar_duracao (minutos inteiros, mesmo arredondamento do round)."""
+    return np.rint(np.asarray(dist_km, dtype=np.float64) / VELOCIDADE_MEDIA_KM_MIN).astype(np.int64)
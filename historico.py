@@ -0,0 +1,53 @@
+# historico.py - Página de histórico de corridas, com paginação e exportação
+
+import streamlit as st
+from nucleo import historico
+
+
+def mostrar_historico():
+    st.subheader("Histórico de Corridas")
+    if 'username' in st.session_state:
+        usuario = st.session_state.username
+        if st.session_state.get("historico_usuario") != usuario:
+            st.session_state.historico_usuario = usuario
+            st.session_state.historico_cursores = [None]  # cursor de cada página visitada
+        cursores = st.session_state.historico_cursores
+        corridas, proximo = historico(usuario, cursores[-1])
+        if corridas:
+            import pandas as pd
+            df = pd.DataFrame(corridas).rename(columns=str.capitalize)
+            df["Data"] = pd.to_datetime(df["Data"], format="ISO8601").dt.strftime("%d/%m/%Y %H:%M")
+            st.dataframe(df, use_container_width=True)
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if len(cursores) > 1:
+                    st.button("← Mais recentes", on_click=cursores.pop)
+            with col2:
+                st.caption(f"Página {len(cursores)}")
+            with col3:
+                if proximo is not None:
+                    st.button("Mais antigas →", on_click=cursores.append, args=(proximo,))
+            _exportar_historico(usuario)
+        else:
+            st.info("Nenhuma corrida registrada ainda.")
+    else:
+        st.warning("Faça login para ver seu histórico.")
+
+
+def _exportar_historico(usuario):
+    import tempfile
+    from exportacao import FORMATOS, exportar
+
+    with st.expander("Exportar histórico completo"):
+        formato = st.selectbox("Formato", list(FORMATOS), format_func=str.upper)
+        if st.button("Gerar arquivo"):
+            # O arquivo é montado em disco, em blocos; só o resultado final vai para o download
+            with tempfile.TemporaryFile() as arquivo:
+                try:
+                    exportar(formato, arquivo, usuario)
+                except ImportError:
+                    st.error("Formato indisponível neste servidor.")
+                    return
+                arquivo.seek(0)
+                nome_arquivo, mime = FORMATOS[formato]
+                st.download_button(f"Baixar {formato.upper()}", arquivo.read(), file_name=nome_arquivo, mime=mime)
@@ -1,8 +1,28 @@
 # mapa.py - Página de rota simulada com folium
 
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
+import streamlit.components.v1 as components
+from mapas import html_mapa, html_mapa_ao_vivo, script_posicao
+from rotas import calcular_rota
+from metricas import cronometrado
+
+ALTURA_MAPA = 500
+
+@cronometrado()
+def mostrar_mapa(origem, motorista, rota=None, altura=ALTURA_MAPA):
+    """Exibe o mapa a partir do HTML em cache. Interagir com ele não reexecuta a página."""
+    components.html(html_mapa(origem, motorista, rota), height=altura)
+
+@cronometrado()
+def mostrar_mapa_ao_vivo(chave, origem, rota, altura=ALTURA_MAPA):
+    """Mapa da corrida a partir do HTML em cache. Chame fora do fragmento que se repete: o mapa vai ao
+    navegador só nas execuções completas e o motorista se move com mover_motorista.
+    """
+    components.html(html_mapa_ao_vivo(chave, origem, rota), height=altura)
+
+def mover_motorista(chave, posicao):
+    """Move o motorista do mapa ao vivo `chave`; só a posição vai ao navegador."""
+    components.html(script_posicao(chave, posicao), height=0)
 
 def pagina_mapa():
     if 'selected_driver' not in st.session_state:
@@ -13,9 +33,5 @@ def pagina_mapa():
     ponto_partida = [-26.9155, -49.0713]     # ponto do usuário
     ponto_motorista = [-26.9108, -49.0703]   # ponto do motorista
 
-    mapa = folium.Map(location=[-26.913, -49.0708], zoom_start=14, tiles="OpenStreetMap")
-    folium.Marker(ponto_motorista, tooltip="Motorista", icon=folium.Icon(color="blue")).add_to(mapa)
-    folium.Marker(ponto_partida, tooltip="Você", icon=folium.Icon(color="green")).add_to(mapa)
-    folium.PolyLine(locations=[ponto_motorista, ponto_partida], color="blue", weight=3).add_to(mapa)
-
-    st_folium(mapa, width=700, height=500, returned_objects=[])
+    rota = calcular_rota(ponto_motorista, ponto_partida)
+    mostrar_mapa(ponto_partida, ponto_motorista, rota.geometria)
@@ -0,0 +1,88 @@
+# mapas.py - Geração de mapas folium com cache do HTML (sem Streamlit)
+
+import json
+from functools import lru_cache
+
+import folium
+
+# Mapas distintos (origem, motorista, rota) guardados; os menos usados saem primeiro
+TAMANHO_CACHE_MAPAS = 256
+# Casas decimais das coordenadas na chave do cache (~1 m)
+PRECISAO_CHAVE = 5
+ZOOM_PADRAO = 14
+# Tipo da mensagem (window.postMessage) que move o motorista no mapa ao vivo
+TIPO_MENSAGEM_POSICAO = "paratodos-motorista"
+
+
+def _ponto(ponto):
+    return (round(float(ponto[0]), PRECISAO_CHAVE), round(float(ponto[1]), PRECISAO_CHAVE))
+
+
+def _rota(rota, origem, motorista):
+    if not rota:
+        return (motorista, origem)
+    return tuple(_ponto(p) for p in rota)
+
+
+def mapa_base(origem, rota):
+    """Mapa com o passageiro e a rota, sem o motorista (que vai numa camada à parte)."""
+    centro = [sum(p[0] for p in rota) / len(rota), sum(p[1] for p in rota) / len(rota)]
+    mapa = folium.Map(location=centro, zoom_start=ZOOM_PADRAO, tiles="OpenStreetMap")
+    folium.Marker(list(origem), tooltip="Você", icon=folium.Icon(color="green")).add_to(mapa)
+    folium.PolyLine(locations=[list(p) for p in rota], color="blue", weight=3).add_to(mapa)
+    return mapa
+
+
+def camada_motorista(posicao):
+    """Camada só com o marcador do motorista, para atualizar a posição sem refazer o mapa."""
+    camada = folium.FeatureGroup(name="Motorista")
+    folium.Marker(list(posicao), tooltip="Motorista", icon=folium.Icon(color="blue")).add_to(camada)
+    return camada
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_MAPAS)
+def _html_mapa(origem, motorista, rota):
+    mapa = mapa_base(origem, rota)
+    camada_motorista(motorista).add_to(mapa)
+    return mapa.get_root().render()
+
+
+def html_mapa(origem, motorista, rota=None):
+    """HTML completo do mapa, gerado uma vez por (origem, posição do motorista, rota).
+    Sem rota, liga motorista e passageiro em linha reta.
+    """
+    origem, motorista = _ponto(origem), _ponto(motorista)
+    return _html_mapa(origem, motorista, _rota(rota, origem, motorista))
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_MAPAS)
+def _html_mapa_ao_vivo(chave, origem, rota):
+    mapa = mapa_base(origem, rota)
+    marcador = folium.Marker(list(rota[0]), tooltip="Motorista", icon=folium.Icon(color="blue"))
+    marcador.add_to(mapa)
+    # O mapa escuta as posições enviadas por script_posicao e só move o marcador
+    mapa.get_root().script.add_child(folium.Element(f"""
+        window.addEventListener("message", function (evento) {{
+            var dados = evento.data;
+            if (dados && dados.tipo === {json.dumps(TIPO_MENSAGEM_POSICAO)} && dados.chave === {json.dumps(chave)}) {{
+                {marcador.get_name()}.setLatLng([dados.lat, dados.lon]);
+            }}
+        }});"""))
+    return mapa.get_root().render()
+
+
+def html_mapa_ao_vivo(chave, origem, rota):
+    """HTML do mapa da corrida (passageiro, rota e motorista no início da rota), gerado uma vez por
+    (chave, origem, rota). O motorista é movido no navegador pelas mensagens de script_posicao.
+    """
+    origem = _ponto(origem)
+    return _html_mapa_ao_vivo(chave, origem, _rota(rota, origem, origem))
+
+
+def script_posicao(chave, posicao):
+    """Script mínimo que move o motorista do mapa ao vivo `chave`, aberto em outro iframe da página."""
+    mensagem = json.dumps({"tipo": TIPO_MENSAGEM_POSICAO, "chave": chave,
+                           "lat": round(float(posicao[0]), PRECISAO_CHAVE),
+                           "lon": round(float(posicao[1]), PRECISAO_CHAVE)})
+    return ("<script>for (var i = 0; i < window.parent.frames.length; i++) "
+            f"window.parent.frames[i].postMessage({mensagem}, '*');</script>")
@@ -0,0 +1,90 @@
+# matching.py - Motor de compatibilidade entre necessidades e motoristas (sem Streamlit)
+
+ADAPTACOES = [
+    "rampa",
+    "cadeira de rodas",
+    "interprete libras",
+    "comunicação assistida",
+    "elevador",
+    "acompanhante",
+]
+
+
+class IndiceCapacidades:
+    """Índice de motoristas por capacidades.
+
+    Cada adaptação vira um bit e cada motorista uma máscara. Motoristas com a
+    mesma máscara ficam agrupados (índice invertido máscara -> motoristas), então
+    uma busca testa só os grupos distintos (no máximo 2^adaptações) com um AND.
+    """
+
+    def __init__(self, motoristas, adaptacoes=ADAPTACOES):
+        self.motoristas = list(motoristas)
+        self.bits = {nome: 1 << i for i, nome in enumerate(adaptacoes)}
+        self.mascaras = []
+        grupos = {}
+        for pos, motorista in enumerate(self.motoristas):
+            mascara = 0
+            for capacidade in motorista["capabilities"]:
+                if capacidade not in self.bits:
+                    # Capacidade fora do vocabulário: ganha um bit novo
+                    self.bits[capacidade] = 1 << len(self.bits)
+                mascara |= self.bits[capacidade]
+            self.mascaras.append(mascara)
+            grupos.setdefault(mascara, []).append(pos)
+        self.grupos = {mascara: tuple(posicoes) for mascara, posicoes in grupos.items()}
+        self._cache = {}
+
+    def codificar(self, necessidades):
+        """Converte uma lista de necessidades em máscara. Retorna None se alguma for desconhecida."""
+        mascara = 0
+        for nome in necessidades:
+            bit = self.bits.get(nome)
+            if bit is None:
+                return None
+            mascara |= bit
+        return mascara
+
+    def buscar(self, necessidades):
+        """Retorna as posições dos motoristas que atendem todas as necessidades."""
+        consulta = self.codificar(necessidades)
+        if consulta is None:
+            return ()
+        posicoes = self._cache.get(consulta)
+        if posicoes is None:
+            encontrados = []
+            for mascara, grupo in self.grupos.items():
+                if mascara & consulta == consulta:
+                    encontrados.extend(grupo)
+            posicoes = self._cache[consulta] = tuple(encontrados)
+        return posicoes
+
+    def compativeis(self, necessidades):
+        """Retorna os motoristas (dicts) que atendem todas as necessidades."""
+        return [self.motoristas[pos] for pos in self.buscar(necessidades)]
+
+
+# Abaixo disso é mais barato medir a distância de todos os compatíveis do que varrer a grade
+LIMITE_BUSCA_DIRETA = 256
+
+
+def proximos_compativeis(indice, grade, lat, lon, necessidades, k=10, raio_km=10.0, excluir=None):
+    """Retorna até k pares (distância_km, posição) de motoristas compatíveis dentro do raio.
+
+    Combina o filtro de capacidades com a grade espacial: se poucos motoristas são
+    compatíveis, mede só eles; senão percorre a grade filtrando pela máscara.
+    excluir é um conjunto opcional de posições ignoradas (motoristas ocupados).
+    """
+    consulta = indice.codificar(necessidades)
+    if consulta is None:
+        return []
+    candidatos = indice.buscar(necessidades)
+    if len(candidatos) <= LIMITE_BUSCA_DIRETA:
+        if excluir:
+            candidatos = [pos for pos in candidatos if pos not in excluir]
+        return grade.ordenar_por_distancia(lat, lon, candidatos, k, raio_km)
+    mascaras = indice.mascaras
+    if excluir:
+        return grade.mais_proximos(lat, lon, k, raio_km,
+                                   aceitar=lambda pos: mascaras[pos] & consulta == consulta and pos not in excluir)
+    return grade.mais_proximos(lat, lon, k, raio_km, aceitar=lambda pos: mascaras[pos] & consulta == consulta)
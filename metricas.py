@@ -0,0 +1,139 @@
+# metricas.py - Cronômetros, contadores e histogramas em memória para diagnóstico (sem Streamlit)
+#
+# Desligado por padrão. Para ligar:
+#   PARATODOS_METRICAS=1 streamlit run app.py
+# Com PARATODOS_METRICAS_ARQUIVO=metricas.jsonl um resumo é gravado ao encerrar o processo.
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+ATIVO = os.environ.get("PARATODOS_METRICAS", "").lower() in ("1", "true", "sim")
+CAMINHO_JSONL = os.environ.get("PARATODOS_METRICAS_ARQUIVO")
+# Amostras guardadas por métrica para os percentis (as mais recentes)
+AMOSTRAS_POR_METRICA = 2048
+
+_NADA = contextlib.nullcontext()
+
+
+class Histograma:
+    """Contagem, soma e máximo de todas as medidas, percentis sobre as últimas AMOSTRAS_POR_METRICA."""
+
+    def __init__(self):
+        self.contagem = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.amostras = deque(maxlen=AMOSTRAS_POR_METRICA)
+
+    def registrar(self, segundos):
+        self.contagem += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        self.amostras.append(segundos)
+
+    def resumo(self):
+        ordenadas = sorted(self.amostras)
+
+        def percentil(p):
+            return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] * 1000 if ordenadas else 0.0
+
+        return {"contagem": self.contagem, "total_ms": round(self.total * 1000, 3),
+                "p50_ms": round(percentil(0.50), 3), "p95_ms": round(percentil(0.95), 3),
+                "p99_ms": round(percentil(0.99), 3), "max_ms": round(self.maximo * 1000, 3)}
+
+
+_tempos = {}
+_contadores = {}
+_lock = threading.Lock()
+
+
+def registrar(nome, segundos):
+    """Acrescenta uma medida de tempo ao histograma da métrica."""
+    if not ATIVO:
+        return
+    with _lock:
+        histograma = _tempos.get(nome)
+        if histograma is None:
+            histograma = _tempos[nome] = Histograma()
+        histograma.registrar(segundos)
+
+
+def contar(nome, quantidade=1):
+    if not ATIVO:
+        return
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + quantidade
+
+
+@contextlib.contextmanager
+def _medir(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, time.perf_counter() - inicio)
+
+
+def cronometro(nome):
+    """Mede o bloco `with cronometro("nome"):`. Desligado, não faz nada."""
+    return _medir(nome) if ATIVO else _NADA
+
+
+def cronometrado(nome=None):
+    """Decorador que mede cada chamada. Desligado, devolve a própria função (custo zero)."""
+    def decorar(funcao):
+        if not ATIVO:
+            return funcao
+        rotulo = nome or f"{funcao.__module__}.{funcao.__name__}"
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registrar(rotulo, time.perf_counter() - inicio)
+        return medida
+    return decorar
+
+
+def resumo():
+    """Retorna ({nome: resumo do histograma}, {nome: contagem})."""
+    with _lock:
+        return ({nome: h.resumo() for nome, h in sorted(_tempos.items())}, dict(sorted(_contadores.items())))
+
+
+def zerar():
+    with _lock:
+        _tempos.clear()
+        _contadores.clear()
+
+
+def linhas_jsonl():
+    """Uma linha JSON por métrica, com a data do instante do resumo."""
+    data = datetime.now().isoformat(timespec="seconds")
+    tempos, contadores = resumo()
+    linhas = [json.dumps({"data": data, "tipo": "tempo", "nome": nome, **valores}, ensure_ascii=False)
+              for nome, valores in tempos.items()]
+    linhas += [json.dumps({"data": data, "tipo": "contador", "nome": nome, "contagem": valor}, ensure_ascii=False)
+               for nome, valor in contadores.items()]
+    return linhas
+
+
+def gravar_jsonl(caminho=CAMINHO_JSONL):
+    """Acrescenta o resumo atual ao arquivo JSONL."""
+    linhas = linhas_jsonl()
+    if caminho and linhas:
+        with open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write("\n".join(linhas) + "\n")
+
+
+if ATIVO and CAMINHO_JSONL:
+    atexit.register(gravar_jsonl)
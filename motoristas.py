@@ -1,74 +1,42 @@
 # motoristas.py - Separação de tipo de veículo e adaptação (sem sugestões automáticas)
 
 import streamlit as st
-from db import salvar_corrida
 from utils import speak
-import folium
-from streamlit_folium import st_folium
-import time
+from geo import interpretar_coordenadas
+from rotas import calcular_rota
+from nucleo import MotoristaIndisponivel, acompanhar_corrida, buscar_motoristas, chamar_motorista
 import os
-import math
-
-motoristas = [
-    {"name": "João", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum"},
-    {"name": "Maria", "capabilities": ["interprete libras"], "veiculo": "Híbrido"},
-    {"name": "Carlos", "capabilities": ["rampa", "interprete libras", "cadeira de rodas"], "veiculo": "Comum"},
-    {"name": "Ana", "capabilities": ["comunicação assistida"], "veiculo": "Elétrico"},
-    {"name": "Pedro", "capabilities": ["rampa"], "veiculo": "Comum"},
-    {"name": "Fernanda", "capabilities": ["interprete libras", "comunicação assistida"], "veiculo": "Híbrido"},
-    {"name": "Lucas", "capabilities": ["rampa", "comunicação assistida"], "veiculo": "Elétrico"},
-    {"name": "Patrícia", "capabilities": ["rampa", "cadeira de rodas", "elevador"], "veiculo": "Comum"},
-    {"name": "Rafael", "capabilities": ["interprete libras"], "veiculo": "Híbrido"},
-    {"name": "Juliana", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum"},
-    {"name": "Gustavo", "capabilities": ["rampa", "cadeira de rodas", "elevador"], "veiculo": "Elétrico"},
-    {"name": "Luciana", "capabilities": ["comunicação assistida"], "veiculo": "Híbrido"},
-    {"name": "Eduardo", "capabilities": ["interprete libras"], "veiculo": "Comum"},
-    {"name": "Beatriz", "capabilities": ["rampa", "cadeira de rodas"], "veiculo": "Comum"},
-    {"name": "Fábio", "capabilities": ["rampa", "comunicação assistida"], "veiculo": "Elétrico"},
-    {"name": "Camila", "capabilities": ["interprete libras", "cadeira de rodas"], "veiculo": "Híbrido"},
-    {"name": "Marcos", "capabilities": ["rampa"], "veiculo": "Comum"},
-    {"name": "Vanessa", "capabilities": ["comunicação assistida"], "veiculo": "Elétrico"},
-    {"name": "André", "capabilities": ["rampa", "interprete libras"], "veiculo": "Comum"},
-    {"name": "Larissa", "capabilities": ["rampa", "elevador"], "veiculo": "Híbrido"},
-]
-
-precos_veiculo = {
-    "Comum":     (4.00, 1.40, 0.25),
-    "Híbrido":   (4.50, 1.30, 0.23),
-    "Elétrico":  (5.00, 1.20, 0.20)
-}
-
-taxas_adaptacao = {
-    "rampa": 2.00,
-    "elevador": 3.50,
-    "comunicação assistida": 1.50,
-    "acompanhante": 2.50,
-    "interprete libras": 1.00,
-    "cadeira de rodas": 0.00
-}
+
+# Sem geocodificação de endereços: origem e destino digitados como "lat, lon"
+# são usados; textos comuns caem nestes pontos fixos.
+PONTO_PASSAGEIRO = (-26.9155, -49.0713)
+DESTINO_PADRAO = (-26.8755, -49.0934)
+# Só o trecho do acompanhamento (mapa e chegada) é reexecutado neste intervalo
+INTERVALO_ACOMPANHAMENTO_S = 1.0
+
 
 logo_path = os.path.join(os.path.dirname(__file__), "logo.png")
 
-def calcular_distancia_km(lat1, lon1, lat2, lon2):
-    R = 6371
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-def estimar_duracao(dist_km):
-    return round(dist_km / 0.5)
-
-def mostrar_mapa_simulado():
-    ponto_partida = [-26.9155, -49.0713]
-    ponto_motorista = [-26.9108, -49.0703]
-    mapa = folium.Map(location=[-26.913, -49.0708], zoom_start=14)
-    folium.Marker(ponto_motorista, tooltip="Motorista", icon=folium.Icon(color="blue")).add_to(mapa)
-    folium.Marker(ponto_partida, tooltip="Você", icon=folium.Icon(color="green")).add_to(mapa)
-    folium.PolyLine([ponto_motorista, ponto_partida], color="blue").add_to(mapa)
-    st_folium(mapa, width=700, height=500)
+def mostrar_mapa_simulado(origem, ponto_motorista):
+    from mapa import mostrar_mapa
+    rota = calcular_rota(ponto_motorista, origem)
+    mostrar_mapa(origem, ponto_motorista, rota.geometria)
+
+@st.fragment(run_every=INTERVALO_ACOMPANHAMENTO_S)
+def acompanhar_motorista(motorista_id, chave_mapa):
+    """Posição e chegada do motorista, atualizadas sem reexecutar o resto da página."""
+    from mapa import mover_motorista
+
+    corrida = acompanhar_corrida(st.session_state.username, motorista_id)
+    situacao = corrida.situacao() if corrida is not None else None
+    if situacao is None or situacao.chegou:
+        # Uma execução completa da página troca o acompanhamento pela chegada
+        st.session_state.corrida_em_andamento = None
+        st.session_state.mostrar_mapa = True
+        st.rerun()
+    st.info(f"Motorista a caminho: chega em ~{situacao.eta_min} min.")
+    st.progress(situacao.progresso)
+    mover_motorista(chave_mapa, (situacao.posicao.lat, situacao.posicao.lon))
 
 def pagina_home():
     if 'aba_visitada' not in st.session_state or not st.session_state.aba_visitada:
@@ -112,27 +80,57 @@ def pagina_home():
         elif not local_origem or not local_destino:
             st.warning("Preencha origem e destino para estimar a corrida.")
         else:
-            st.session_state.matched_drivers = [
-                d for d in motoristas if all(n in d["capabilities"] for n in needs)]
+            origem = interpretar_coordenadas(local_origem) or PONTO_PASSAGEIRO
+            destino = interpretar_coordenadas(local_destino) or DESTINO_PADRAO
+            st.session_state.origem = origem
+            st.session_state.destino = destino
+            busca = buscar_motoristas(origem, destino, needs)
+            st.session_state.rota_corrida = busca.rota
+            st.session_state.matched_drivers = busca.motoristas
 
     if st.session_state.get("search_clicked") and st.session_state.get("matched_drivers"):
         st.success(f"{len(st.session_state.matched_drivers)} motorista(s) encontrado(s).")
         speak(f"{len(st.session_state.matched_drivers)} motoristas encontrados.")
-        driver_names = [f"{d['name']} | Recursos: {', '.join(d['capabilities'])}" for d in st.session_state.matched_drivers]
-        selected_driver = st.selectbox("Escolha um motorista disponível:", driver_names)
-
-        distancia_km = 5.2
-        duracao_min = estimar_duracao(distancia_km)
-
-        driver_nome = selected_driver.split("|")[0].strip()
-        driver_obj = next((d for d in motoristas if d["name"] == driver_nome), None)
+        encontrados = st.session_state.matched_drivers
+        col_ordem, col_filtro = st.columns(2)
+        with col_ordem:
+            ordem = st.radio("Ordenar por:", ["Mais próximo", "Menor preço"], horizontal=True)
+        precos = [d["preco"] for d in encontrados]
+        preco_max = max(precos)
+        with col_filtro:
+            if min(precos) < max(precos):
+                preco_max = st.slider("Preço máximo (R$):", min(precos), max(precos), max(precos), step=0.5)
+        candidatos = [d for d in encontrados if d["preco"] <= preco_max]
+        if ordem == "Menor preço":
+            candidatos = sorted(candidatos, key=lambda d: (d["preco"], d["distancia_km"]))
+
+        st.dataframe([
+            {"Motorista": d["name"], "Veículo": d["veiculo"], "Distância (km)": d["distancia_km"],
+             "Chega em (min)": d["eta_min"], "Base": d["preco_base"], "Por km": round(d["preco_km"], 2),
+             "Por minuto": round(d["preco_min"], 2), "Adaptação": d["taxa_adaptacao"], "Total (R$)": d["preco"]}
+            for d in candidatos], use_container_width=True, hide_index=True)
+
+        # Escolha pelo id: nomes de motoristas podem se repetir
+        por_id = {d["id"]: d for d in candidatos}
+        selected_id = st.selectbox(
+            "Escolha um motorista disponível:", list(por_id),
+            format_func=lambda i: f"{por_id[i]['name']} | Recursos: {', '.join(por_id[i]['capabilities'])}"
+                                  f" | a {por_id[i]['distancia_km']} km | R$ {por_id[i]['preco']:.2f}")
+
+        rota_corrida = st.session_state.rota_corrida
+        distancia_km = rota_corrida.distancia_km
+        duracao_min = rota_corrida.duracao_min
+
+        driver_obj = por_id.get(selected_id)
+        st.session_state.selected_driver = driver_obj["name"] if driver_obj else ""
 
         if driver_obj:
             veiculo = driver_obj["veiculo"]
-            base, por_km, por_min = precos_veiculo.get(veiculo, (4.0, 1.4, 0.25))
-            taxa_adapt = sum(taxas_adaptacao.get(n, 0) for n in needs)
-            preco_estimado = round(base + distancia_km * por_km + duracao_min * por_min + taxa_adapt, 2)
+            taxa_adapt = driver_obj["taxa_adaptacao"]
+            preco_estimado = driver_obj["preco"]
 
+            st.markdown(f"**Distância do motorista até você:** {driver_obj['distancia_km']} km "
+                        f"(chega em ~{driver_obj['eta_min']} min)")
             st.markdown(f"**Distância estimada:** {distancia_km} km")
             st.markdown(f"**Duração estimada:** {duracao_min} minutos")
             st.markdown(f"**Tipo de veículo:** {veiculo}")
@@ -141,19 +139,34 @@ def pagina_home():
             st.markdown(f"**Preço estimado:** R$ {preco_estimado:.2f}")
 
             if st.button("🚗 Chamar motorista"):
-                st.session_state.mostrar_mapa = True
-                st.info("Motorista a caminho...")
-                progress = st.progress(0)
-                for i in range(1, 101):
-                    time.sleep(0.01)
-                    progress.progress(i)
-                st.success("Motorista chegou! 🧍‍♂️🚗")
-                speak("Motorista chegou.")
-                salvar_corrida(st.session_state.username, selected_driver.split("|")[0].strip(), needs, "Finalizada")
-
+                try:
+                    chamar_motorista(st.session_state.username, driver_obj["id"], st.session_state.origem,
+                                     st.session_state.destino, needs)
+                except MotoristaIndisponivel:
+                    st.error("Este motorista acabou de ser reservado ou não atende mais as necessidades "
+                             "selecionadas. Faça uma nova busca.")
+                else:
+                    st.session_state.corrida_em_andamento = driver_obj["id"]
+                    st.session_state.mostrar_mapa = False
+                    st.session_state.chegada_anunciada = False
+                    speak("Motorista a caminho.")
+
+            if st.session_state.get("corrida_em_andamento") == driver_obj["id"]:
+                chave_mapa = f"corrida_{driver_obj['id']}"
+                acompanhar_motorista(driver_obj["id"], chave_mapa)
+                corrida = acompanhar_corrida(st.session_state.username, driver_obj["id"])
+                if corrida is not None:
+                    # Fora do fragmento: o mapa (com a rota) vai ao navegador uma vez; a cada
+                    # intervalo o fragmento só manda a posição do motorista
+                    from mapa import mostrar_mapa_ao_vivo
+                    mostrar_mapa_ao_vivo(chave_mapa, st.session_state.origem, corrida.rota.geometria)
             # Exibir mapa se o motorista já chegou
-            if st.session_state.get("mostrar_mapa"):
-                mostrar_mapa_simulado()
+            elif st.session_state.get("mostrar_mapa"):
+                st.success("Motorista chegou! 🧍‍♂️🚗")
+                if not st.session_state.get("chegada_anunciada"):
+                    st.session_state.chegada_anunciada = True
+                    speak("Motorista chegou.")
+                mostrar_mapa_simulado(st.session_state.origem, (driver_obj["lat"], driver_obj["lon"]))
 
 
     elif st.session_state.get("search_clicked") and not st.session_state.get("matched_drivers"):
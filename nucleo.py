@@ -0,0 +1,144 @@
+# nucleo.py - Regras do app sem interface: cadastro, login, busca, chamada, acompanhamento e histórico
+#
+# As páginas do Streamlit e a API HTTP (api.py) chamam estas funções; nada aqui
+# importa o Streamlit. Frota, rotas e preços (NumPy) são importados só pela busca
+# e pela chamada, para a tela de login continuar leve.
+
+from collections import namedtuple
+
+import db
+from metricas import cronometro
+
+RAIO_BUSCA_KM = 10.0
+MAX_MOTORISTAS_BUSCA = 10
+
+Busca = namedtuple("Busca", ["rota", "motoristas"])
+
+
+class MotoristaIndisponivel(Exception):
+    """O motorista pedido não está ativo ou não atende todas as necessidades."""
+
+
+def cadastrar(username, senha, perfil):
+    """Cria o usuário. Retorna False se o nome já existir."""
+    return db.add_user(username, senha, perfil)
+
+
+def autenticar(username, senha):
+    """Confere usuário e senha. Retorna {"username", "profile"} ou None.
+    Hashes com custo abaixo do atual são refeitos em segundo plano.
+    """
+    from servico_auth import verificar_senha, precisa_rehash, rehash_em_segundo_plano
+
+    user = db.get_user(username)
+    if not user or not verificar_senha(senha, user["password"]):
+        return None
+    if precisa_rehash(user["password"]):
+        rehash_em_segundo_plano(senha, lambda novo: db.atualizar_senha(username, novo))
+    return {"username": user["username"], "profile": user["profile"]}
+
+
+def buscar_motoristas(origem, destino, necessidades, k=MAX_MOTORISTAS_BUSCA, raio_km=RAIO_BUSCA_KM):
+    """Rota da corrida e os k motoristas compatíveis mais próximos da origem, já cotados.
+
+    Cada motorista é um dict com os dados da frota mais distancia_km, eta_min e a
+    cotação (preco_base, preco_km, preco_min, taxa_adaptacao, preco).
+    """
+    from frota import obter_frota
+    from geo import estimar_duracao_lote
+    from matching import proximos_compativeis
+    from precos import cotar_motoristas
+    from reservas import posicoes_reservadas
+    from rotas import calcular_rota
+
+    with cronometro("nucleo.rota"):
+        rota = calcular_rota(origem, destino)
+    with cronometro("nucleo.matching"):
+        frota = obter_frota()
+        proximos = proximos_compativeis(frota.indice, frota.grade, *origem, necessidades, k=k, raio_km=raio_km,
+                                        excluir=posicoes_reservadas(frota))
+        etas = estimar_duracao_lote([dist for dist, _ in proximos]).tolist()
+        encontrados = [
+            dict(frota.motoristas[pos], distancia_km=round(dist, 2), eta_min=eta)
+            for (dist, pos), eta in zip(proximos, etas)]
+    # Todos os encontrados cotados de uma vez
+    with cronometro("nucleo.cotacao"):
+        cotacoes = cotar_motoristas(encontrados, necessidades, rota.distancia_km, rota.duracao_min)
+        for d, base, por_km, por_min, taxa, total in zip(encontrados, *(c.tolist() for c in cotacoes)):
+            d.update(preco_base=base, preco_km=por_km, preco_min=por_min, taxa_adaptacao=taxa, preco=total)
+    return Busca(rota, encontrados)
+
+
+def chamar_motorista(usuario, motorista_id, origem, destino, necessidades):
+    """Reserva o motorista escolhido e registra a corrida, cotada de novo aqui (o preço nunca vem do cliente).
+
+    A reserva vale até o fim estimado da corrida ou até encerrar_corrida. Levanta
+    MotoristaIndisponivel se outro passageiro já o reservou.
+    """
+    from frota import obter_frota
+    from geo import calcular_distancia_km
+    from precos import cotar_motoristas
+    from rastreamento import acompanhar
+    from reservas import liberar, reservar, ttl_corrida
+    from rotas import calcular_rota
+
+    motorista = obter_frota().por_id.get(motorista_id)
+    if motorista is None or not set(necessidades) <= set(motorista["capabilities"]):
+        raise MotoristaIndisponivel(motorista_id)
+    rota = calcular_rota(origem, destino)
+    ate_origem_km = calcular_distancia_km(motorista["lat"], motorista["lon"], *origem)
+    ttl_s = ttl_corrida(ate_origem_km, rota.duracao_min)
+    if not reservar(motorista_id, usuario, ttl_s):
+        raise MotoristaIndisponivel(motorista_id)
+    try:
+        preco = cotar_motoristas([motorista], necessidades, rota.distancia_km, rota.duracao_min).total.tolist()[0]
+        db.salvar_corrida(usuario, motorista["name"], necessidades, "Finalizada",
+                          veiculo=motorista["veiculo"], preco=preco, motorista_id=motorista_id)
+    except BaseException:
+        liberar(motorista_id, usuario)
+        raise
+    acompanhar(motorista_id, usuario, (motorista["lat"], motorista["lon"]), origem, ttl_s)
+    return {"motorista_id": motorista_id, "motorista": motorista["name"], "veiculo": motorista["veiculo"],
+            "preco": preco, "distancia_km": rota.distancia_km, "duracao_min": rota.duracao_min}
+
+
+def encerrar_corrida(usuario, motorista_id):
+    """Libera o motorista reservado pelo usuário e para de acompanhá-lo. Retorna False se não havia reserva dele."""
+    from rastreamento import encerrar
+    from reservas import liberar
+
+    encerrar(motorista_id, usuario)
+    return liberar(motorista_id, usuario)
+
+
+def registrar_despacho(usuario, origem, necessidades, atribuicao):
+    """Registra a corrida de um pedido atribuído (e já reservado) pelo despacho em lote (despacho.py)."""
+    from frota import obter_frota
+    from rastreamento import acompanhar
+    from reservas import ttl_corrida
+
+    db.salvar_corrida(usuario, atribuicao.motorista, necessidades, "Finalizada",
+                      veiculo=atribuicao.veiculo, preco=atribuicao.preco, motorista_id=atribuicao.motorista_id)
+    motorista = obter_frota().por_id.get(atribuicao.motorista_id)
+    if motorista is not None:
+        acompanhar(atribuicao.motorista_id, usuario, (motorista["lat"], motorista["lon"]), origem,
+                   ttl_corrida(atribuicao.distancia_km, atribuicao.rota.duracao_min))
+    return {"motorista_id": atribuicao.motorista_id, "motorista": atribuicao.motorista,
+            "veiculo": atribuicao.veiculo, "preco": atribuicao.preco,
+            "distancia_km": atribuicao.rota.distancia_km, "duracao_min": atribuicao.rota.duracao_min}
+
+
+def acompanhar_corrida(usuario, motorista_id):
+    """Corrida em andamento do usuário com o motorista (rastreamento.Corrida), ou None se não houver."""
+    from rastreamento import obter
+
+    corrida = obter(motorista_id)
+    return corrida if corrida is not None and corrida.usuario == usuario else None
+
+
+def historico(usuario, antes_de_id=None, limite=db.TAMANHO_PAGINA_HISTORICO):
+    """Uma página do histórico do usuário: (corridas, cursor da próxima página ou None)."""
+    linhas, proximo = db.carregar_historico_pagina(usuario, antes_de_id, limite)
+    corridas = [{"motorista": motorista, "necessidades": necessidades, "status": status, "data": data}
+                for motorista, necessidades, status, data in linhas]
+    return corridas, proximo
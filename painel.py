@@ -0,0 +1,103 @@
+# painel.py - Painel de operações (lê apenas as tabelas de estatísticas) e diagnóstico para administradores
+
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+from db import carregar_estatisticas, carregar_nomes_motoristas
+import metricas
+
+DIAS_PAINEL = 30
+
+def _tabela(dimensao, desde):
+    linhas = carregar_estatisticas(dimensao, desde)
+    return pd.DataFrame(linhas, columns=["Chave", "Dia", "Corridas", "Receita"])
+
+def _nome_motorista(chave, nomes):
+    # Chaves são o id do motorista; "nome:<nome>" sobra de corridas antigas sem id conhecido
+    if chave.startswith("nome:"):
+        return f"{chave[5:]} (sem id)"
+    return f"{nomes.get(int(chave), 'Motorista removido')} (#{chave})"
+
+def pagina_painel():
+    from auth import eh_admin
+    if not eh_admin(st.session_state.get("username")):
+        st.error("Página restrita a administradores.")
+        return
+
+    st.subheader("Painel de Operações")
+    dias = st.slider("Período (dias)", 1, 90, DIAS_PAINEL)
+    desde = (date.today() - timedelta(days=dias - 1)).isoformat()
+
+    por_dia = _tabela("dia", desde)
+    if por_dia.empty:
+        st.info("Nenhuma corrida registrada no período.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Corridas", int(por_dia["Corridas"].sum()))
+    col2.metric("Receita", f"R$ {por_dia['Receita'].sum():.2f}")
+    col3.metric("Média por dia", f"{por_dia['Corridas'].sum() / dias:.1f}")
+
+    st.markdown("#### Corridas por dia")
+    st.line_chart(por_dia.set_index("Dia")[["Corridas", "Receita"]])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Por necessidade")
+        por_necessidade = _tabela("necessidade", desde).groupby("Chave")[["Corridas", "Receita"]].sum()
+        st.bar_chart(por_necessidade["Corridas"])
+    with col2:
+        st.markdown("#### Por tipo de veículo")
+        por_veiculo = _tabela("veiculo", desde).replace({"Chave": {"": "Não informado"}})
+        st.bar_chart(por_veiculo.groupby("Chave")["Corridas"].sum())
+
+    st.markdown("#### Por motorista")
+    por_motorista = (_tabela("motorista", desde).groupby("Chave")[["Corridas", "Receita"]].sum()
+                     .sort_values("Corridas", ascending=False))
+    # Só os nomes dos motoristas que aparecem no período, não a frota inteira
+    nomes = carregar_nomes_motoristas(int(chave) for chave in por_motorista.index if not chave.startswith("nome:"))
+    por_motorista.index = [_nome_motorista(chave, nomes) for chave in por_motorista.index]
+    por_motorista.index.name = "Motorista"
+    st.dataframe(por_motorista, use_container_width=True)
+
+
+def pagina_diagnostico():
+    from auth import eh_admin
+    if not eh_admin(st.session_state.get("username")):
+        st.error("Página restrita a administradores.")
+        return
+
+    st.subheader("Diagnóstico")
+    if not metricas.ATIVO:
+        st.info("Métricas desligadas. Inicie o app com PARATODOS_METRICAS=1 para medir as execuções.")
+    else:
+        tempos, contadores = metricas.resumo()
+        st.markdown("#### Tempos (ms)")
+        if tempos:
+            df = pd.DataFrame.from_dict(tempos, orient="index")
+            df.index.name = "Métrica"
+            st.dataframe(df.sort_values("total_ms", ascending=False), use_container_width=True)
+        else:
+            st.caption("Nenhuma medida ainda.")
+        if contadores:
+            st.markdown("#### Contadores")
+            st.dataframe(pd.Series(contadores, name="Contagem"), use_container_width=True)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Baixar JSONL", "\n".join(metricas.linhas_jsonl()) + "\n",
+                               file_name="metricas.jsonl", mime="application/jsonl")
+        with col2:
+            if metricas.CAMINHO_JSONL and st.button(f"Gravar em {metricas.CAMINHO_JSONL}"):
+                metricas.gravar_jsonl()
+                st.success("Resumo gravado.")
+        with col3:
+            st.button("Zerar métricas", on_click=metricas.zerar)
+
+    st.markdown("#### Importações na inicialização")
+    if st.button("Medir (processo novo)"):
+        from diagnostico import medir_importacoes
+        resultado = medir_importacoes()
+        st.metric("Tempo até a tela de login", f"{resultado['total_ms']} ms")
+        st.caption("Dependências pesadas carregadas: " + (", ".join(resultado["pesados_carregados"]) or "nenhuma"))
+        st.dataframe(pd.DataFrame(resultado["mais_lentos"][:15]), use_container_width=True, hide_index=True)
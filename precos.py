@@ -0,0 +1,131 @@
+# precos.py - Tarifas (tarifas.json) e cotação em lote de todos os motoristas encontrados (sem Streamlit)
+
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+CAMINHO_TARIFAS = os.environ.get("PARATODOS_TARIFAS", os.path.join(os.path.dirname(__file__), "tarifas.json"))
+
+Cotacoes = namedtuple("Cotacoes", ["base", "por_km", "por_min", "taxa_adaptacao", "total"])
+
+
+class Tarifas:
+    """Tarifas compiladas: um código por tipo de veículo e um array por componente do preço.
+    O último código é o preço padrão, usado para veículos fora da tabela.
+    """
+
+    def __init__(self, config):
+        self.versao = config.get("versao", 0)
+        self.config = config
+        padrao = config["preco_padrao"]
+        self.precos_veiculo = {
+            veiculo: (p["base"], p["por_km"], p["por_min"]) for veiculo, p in config["precos_veiculo"].items()
+        }
+        self.preco_padrao = (padrao["base"], padrao["por_km"], padrao["por_min"])
+        self.taxas_adaptacao = dict(config["taxas_adaptacao"])
+        self.codigos = {veiculo: i for i, veiculo in enumerate(self.precos_veiculo)}
+        self.codigo_padrao = len(self.codigos)
+        tabela = np.array(list(self.precos_veiculo.values()) + [self.preco_padrao], dtype=np.float64)
+        self.base, self.por_km, self.por_min = tabela[:, 0], tabela[:, 1], tabela[:, 2]
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_TARIFAS):
+        with open(caminho, encoding="utf-8") as arquivo:
+            return cls(json.load(arquivo))
+
+    def taxa_adaptacao(self, necessidades):
+        return sum(self.taxas_adaptacao.get(n, 0) for n in necessidades)
+
+    def codigos_veiculos(self, veiculos):
+        return np.fromiter((self.codigos.get(v, self.codigo_padrao) for v in veiculos),
+                           dtype=np.int64, count=len(veiculos))
+
+    def cotar_lote(self, veiculos, necessidades, distancia_km, duracao_min):
+        """Cota a mesma corrida para vários motoristas de uma vez (um por tipo de veículo dado)."""
+        codigos = self.codigos_veiculos(veiculos)
+        base = self.base[codigos]
+        por_km = self.por_km[codigos] * distancia_km
+        por_min = self.por_min[codigos] * duracao_min
+        taxa = np.full(len(codigos), float(self.taxa_adaptacao(necessidades)))
+        return Cotacoes(base, por_km, por_min, taxa, np.round(base + por_km + por_min + taxa, 2))
+
+
+_tarifas = None
+_tarifas_lock = threading.Lock()
+
+
+def obter_tarifas():
+    """Tarifas do processo, lidas e compiladas de CAMINHO_TARIFAS na primeira chamada."""
+    global _tarifas
+    if _tarifas is None:
+        with _tarifas_lock:
+            if _tarifas is None:
+                _tarifas = Tarifas.carregar()
+    return _tarifas
+
+
+def cotar_motoristas(motoristas, necessidades, distancia_km, duracao_min):
+    """Cotações de todos os motoristas (dicts com "veiculo") para a corrida."""
+    return obter_tarifas().cotar_lote([m["veiculo"] for m in motoristas], necessidades, distancia_km, duracao_min)
+
+
+# --- Tabela de preços (página "Preços") -----------------------------------------
+# Gerada uma vez por versão das tarifas e compartilhada por todas as sessões.
+
+FORMATOS_TABELA = {
+    "xlsx": ("precos.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("precos.csv", "text/csv"),
+    "parquet": ("precos.parquet", "application/octet-stream"),
+}
+
+_cache_tabela = {}
+_cache_tabela_lock = threading.Lock()
+
+
+def _gerar_tabela(tarifas, formato):
+    import pandas as pd
+    import io
+
+    tabela = tarifas.config["tabela_precos"]
+    df = pd.DataFrame(tabela["linhas"], columns=tabela["colunas"])
+    if formato == "df":
+        return df
+    saida = io.BytesIO()
+    # Sem xlsxwriter ou pyarrow instalados o formato fica indisponível (None) e o download não aparece
+    if formato == "xlsx":
+        try:
+            with pd.ExcelWriter(saida, engine='xlsxwriter') as writer:
+                df.to_excel(writer, index=False)
+        except ImportError:
+            return None
+    elif formato == "csv":
+        saida.write(df.to_csv(index=False).encode('utf-8-sig'))
+    elif formato == "parquet":
+        try:
+            df.to_parquet(saida, index=False)
+        except ImportError:
+            return None
+    return saida.getvalue()
+
+
+def _tabela_em_cache(formato):
+    tarifas = obter_tarifas()
+    chave = (tarifas.versao, formato)
+    if chave not in _cache_tabela:
+        with _cache_tabela_lock:
+            if chave not in _cache_tabela:
+                _cache_tabela[chave] = _gerar_tabela(tarifas, formato)
+    return _cache_tabela[chave]
+
+
+def tabela_precos():
+    """DataFrame da tabela de preços (compartilhado: não altere)."""
+    return _tabela_em_cache("df")
+
+
+def arquivo_tabela_precos(formato):
+    """Bytes da tabela no formato pedido ("xlsx", "csv" ou "parquet"), ou None se indisponível."""
+    return _tabela_em_cache(formato)
@@ -0,0 +1,129 @@
+# rastreamento.py - Posição do motorista nas corridas em andamento (sem Streamlit)
+#
+# A corrida acompanhada e as últimas POSICOES_POR_CORRIDA posições do GPS do motorista
+# ficam no banco (tabelas acompanhamentos e posicoes_motorista, um buffer circular por
+# motorista), então todos os processos da API veem o mesmo estado. Até a primeira
+# posição real chegar, a posição é simulada ao longo da rota no instante da consulta:
+# nenhuma thread fica dormindo para mover o motorista. Há uma corrida por motorista
+# (a reserva garante isso).
+
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+import db
+from geo import calcular_distancia_km, estimar_duracao
+from metricas import contar
+
+POSICOES_POR_CORRIDA = 120
+# Uma posição simulada a cada INTERVALO_SIMULACAO_S
+INTERVALO_SIMULACAO_S = 0.5
+# Na simulação, cada segundo real vale ACELERACAO_SIMULACAO segundos de corrida
+ACELERACAO_SIMULACAO = 60
+# A esta distância da origem o motorista é considerado chegado
+RAIO_CHEGADA_KM = 0.05
+
+Posicao = namedtuple("Posicao", ["instante", "lat", "lon"])
+Situacao = namedtuple("Situacao", ["posicao", "eta_min", "progresso", "chegou"])
+
+
+@lru_cache(maxsize=256)
+def _trajeto_previsto(partida, origem):
+    """Rota da partida até a origem e a distância acumulada até cada ponto dela."""
+    from rotas import calcular_rota
+
+    rota = calcular_rota(partida, origem)
+    acumulada = [0.0]
+    for a, b in zip(rota.geometria, rota.geometria[1:]):
+        acumulada.append(acumulada[-1] + calcular_distancia_km(*a, *b))
+    return rota, tuple(acumulada)
+
+
+class Corrida:
+    """Motorista a caminho da origem do passageiro; a rota vai da partida do motorista até a origem."""
+
+    def __init__(self, motorista_id, usuario, partida, origem, inicio, expira_em):
+        self.motorista_id = motorista_id
+        self.usuario = usuario
+        self.origem = tuple(origem)
+        self.inicio = inicio
+        self.expira_em = expira_em
+        self.rota, self._acumulada = _trajeto_previsto(tuple(partida), self.origem)
+        self._duracao_simulada_s = max(self.rota.duracao_min * 60 / ACELERACAO_SIMULACAO, INTERVALO_SIMULACAO_S)
+
+    def _fracao_simulada(self, instante):
+        return max(0.0, min((instante - self.inicio) / self._duracao_simulada_s, 1.0))
+
+    def _ponto_simulado(self, instante):
+        alvo = self._acumulada[-1] * self._fracao_simulada(instante)
+        i = min(bisect_right(self._acumulada, alvo), len(self._acumulada) - 1)
+        if i == 0 or self._acumulada[i] == self._acumulada[i - 1]:
+            return self.rota.geometria[i]
+        (lat0, lon0), (lat1, lon1) = self.rota.geometria[i - 1], self.rota.geometria[i]
+        t = (alvo - self._acumulada[i - 1]) / (self._acumulada[i] - self._acumulada[i - 1])
+        return lat0 + (lat1 - lat0) * t, lon0 + (lon1 - lon0) * t
+
+    def _simuladas(self, agora, quantidade):
+        # Amostras a cada INTERVALO_SIMULACAO_S desde o início, só as `quantidade` mais recentes
+        passos = int((agora - self.inicio) // INTERVALO_SIMULACAO_S)
+        return [Posicao(self.inicio + p * INTERVALO_SIMULACAO_S,
+                        *self._ponto_simulado(self.inicio + p * INTERVALO_SIMULACAO_S))
+                for p in range(max(0, passos - quantidade + 1), passos + 1)]
+
+    def trajeto(self, agora=None):
+        """Posições da corrida (do GPS ou simuladas), da mais antiga à mais recente."""
+        reais = db.carregar_posicoes_motorista(self.motorista_id, POSICOES_POR_CORRIDA)
+        if reais:
+            return [Posicao(*linha) for linha in reais]
+        return self._simuladas(agora or time.time(), POSICOES_POR_CORRIDA)
+
+    def situacao(self, agora=None):
+        """Última posição, minutos até a origem, progresso (0 a 1) e se já chegou."""
+        agora = agora or time.time()
+        reais = db.carregar_posicoes_motorista(self.motorista_id, 1)
+        total_km = self._acumulada[-1]
+        if reais:
+            posicao = Posicao(*reais[-1])
+            restante_km = calcular_distancia_km(posicao.lat, posicao.lon, *self.origem)
+        else:
+            posicao = self._simuladas(agora, 1)[-1]
+            # Pela rota, não em linha reta: a simulação sabe quanto falta percorrer
+            restante_km = total_km * (1 - self._fracao_simulada(posicao.instante))
+        progresso = 1.0 if total_km <= 0 else max(0.0, min(1.0, 1 - restante_km / total_km))
+        return Situacao(posicao, estimar_duracao(restante_km), progresso, restante_km <= RAIO_CHEGADA_KM)
+
+
+def acompanhar(motorista_id, usuario, partida, origem, ttl_s):
+    """Começa a acompanhar o motorista da partida até a origem do passageiro, por no máximo ttl_s."""
+    _trajeto_previsto(tuple(partida), tuple(origem))
+    agora = time.time()
+    db.iniciar_acompanhamento(motorista_id, usuario, tuple(partida), tuple(origem), agora, agora + ttl_s)
+
+
+def obter(motorista_id):
+    """A corrida em andamento do motorista, ou None."""
+    dados = db.carregar_acompanhamento(motorista_id)
+    if dados is None:
+        return None
+    return Corrida(motorista_id, dados["usuario"], dados["partida"], dados["origem"], dados["inicio"],
+                   dados["expira_em"])
+
+
+def registrar_posicao(motorista_id, lat, lon):
+    """Recebe uma posição do GPS do motorista. Retorna False se ele não tem corrida em andamento."""
+    if not db.registrar_posicao_motorista(motorista_id, lat, lon, time.time(), POSICOES_POR_CORRIDA):
+        return False
+    contar("rastreamento.posicoes_recebidas")
+    return True
+
+
+def situacao(motorista_id):
+    """Situação da corrida do motorista (Corrida.situacao), ou None sem corrida."""
+    corrida = obter(motorista_id)
+    return None if corrida is None else corrida.situacao()
+
+
+def encerrar(motorista_id, usuario=None):
+    """Para de acompanhar a corrida (só a deste usuário, quando dado)."""
+    db.encerrar_acompanhamento(motorista_id, usuario)
@@ -0,0 +1,66 @@
+# reservas.py - Motoristas reservados: reserva atômica no banco e espelho em memória para o matching (sem Streamlit)
+#
+# Quem fica com o motorista é decidido pelo banco (db.reservar_motorista). O espelho
+# em memória só evita oferecer motoristas já reservados; ele é relido do banco a cada
+# INTERVALO_SINCRONIZACAO_S para enxergar as reservas feitas por outros processos.
+
+import threading
+import time
+
+import db
+from geo import estimar_duracao
+
+INTERVALO_SINCRONIZACAO_S = 2.0
+# Folga além do tempo estimado até o fim da corrida
+FOLGA_RESERVA_S = 120
+
+_reservados = {}  # motorista_id -> expira_em (time.time())
+_ultima_leitura = None
+_caminho_banco = None
+_lock = threading.Lock()
+
+
+def ttl_corrida(distancia_ate_origem_km, duracao_min):
+    """Segundos de reserva: o motorista chegar à origem, a corrida e FOLGA_RESERVA_S."""
+    return (estimar_duracao(distancia_ate_origem_km) + duracao_min) * 60 + FOLGA_RESERVA_S
+
+
+def reservados():
+    """Ids dos motoristas com reserva válida."""
+    global _reservados, _ultima_leitura, _caminho_banco
+    with _lock:
+        agora = time.monotonic()
+        if (_caminho_banco != db.DATABASE_PATH or _ultima_leitura is None
+                or agora - _ultima_leitura >= INTERVALO_SINCRONIZACAO_S):
+            _reservados = db.carregar_reservas_ativas()
+            _ultima_leitura = agora
+            _caminho_banco = db.DATABASE_PATH
+        agora = time.time()
+        return {motorista_id for motorista_id, expira_em in _reservados.items() if expira_em > agora}
+
+
+def posicoes_reservadas(frota):
+    """Posições na frota dos motoristas reservados, para o `excluir` de proximos_compativeis."""
+    return {frota.posicao[m] for m in reservados() if m in frota.posicao}
+
+
+def reservar(motorista_id, usuario, ttl_s):
+    """Reserva o motorista para o usuário. Retorna False se ele já estiver reservado."""
+    global _ultima_leitura
+    expira_em = db.reservar_motorista(motorista_id, usuario, ttl_s)
+    with _lock:
+        if expira_em is None:
+            # O espelho estava desatualizado: relê o banco na próxima consulta
+            _ultima_leitura = None
+        else:
+            _reservados[motorista_id] = expira_em
+    return expira_em is not None
+
+
+def liberar(motorista_id, usuario=None):
+    """Libera o motorista (só se a reserva for deste usuário, quando dado). Retorna True se havia reserva."""
+    liberado = db.liberar_reserva(motorista_id, usuario)
+    if liberado:
+        with _lock:
+            _reservados.pop(motorista_id, None)
+    return liberado
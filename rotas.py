@@ -0,0 +1,252 @@
+# rotas.py - Roteamento offline sobre a malha viária (extrato OSM) com A* (sem Streamlit)
+#
+# Converter um extrato OSM (XML) para o formato do app:
+#   python rotas.py converter blumenau.osm dados/blumenau.npz
+# Calcular uma rota:
+#   python rotas.py rota -- -26.9155,-49.0713 -26.8755,-49.0934
+
+import argparse
+import heapq
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from espacial import GradeEspacial
+from geo import calcular_distancia_km, distancias_km_pares, estimar_duracao
+
+CAMINHO_GRAFO = os.environ.get(
+    "PARATODOS_GRAFO", os.path.join(os.path.dirname(__file__), "dados", "blumenau.npz"))
+# Pares origem/destino (nós da malha) guardados no cache de rotas
+TAMANHO_CACHE_ROTAS = 4096
+# Distância máxima de um ponto até o nó mais próximo da malha
+RAIO_ENCAIXE_KM = 2.0
+# Sem malha carregada: distância em linha reta vezes este fator
+FATOR_DESVIO_SEM_MALHA = 1.3
+
+# Vias trafegáveis por carro e velocidade usada quando não há maxspeed
+VELOCIDADES_KMH = {
+    "motorway": 100, "motorway_link": 60, "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40, "secondary": 50, "secondary_link": 40,
+    "tertiary": 40, "tertiary_link": 30, "unclassified": 30, "residential": 30,
+    "living_street": 10, "service": 20, "road": 30,
+}
+
+Rota = namedtuple("Rota", ["distancia_km", "duracao_min", "geometria", "pela_malha"])
+
+
+class GrafoViario:
+    """Malha viária em arrays (formato CSR): as arestas que saem do nó i estão em
+    destino[inicio[i]:inicio[i + 1]], com comprimento em metros e velocidade em km/h.
+    """
+
+    def __init__(self, lat, lon, inicio, destino, comprimento_m, velocidade_kmh):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.inicio = np.asarray(inicio, dtype=np.int64)
+        self.destino = np.asarray(destino, dtype=np.int32)
+        self.comprimento_m = np.asarray(comprimento_m, dtype=np.float32)
+        self.velocidade_kmh = np.asarray(velocidade_kmh, dtype=np.float32)
+        # Listas Python para o laço do A* (indexar arrays NumPy um a um é mais lento)
+        self._inicio = self.inicio.tolist()
+        self._destino = self.destino.tolist()
+        self._comprimento = self.comprimento_m.tolist()
+        self._segundos = (self.comprimento_m / (self.velocidade_kmh / 3.6)).tolist()
+        self._lat = self.lat.tolist()
+        self._lon = self.lon.tolist()
+        self._vel_max_ms = float(self.velocidade_kmh.max()) / 3.6 if len(self.velocidade_kmh) else 1.0
+        self.grade = GradeEspacial(self.lat, self.lon, tamanho_celula_km=0.25)
+        self._entre_nos = lru_cache(maxsize=TAMANHO_CACHE_ROTAS)(self._a_estrela)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as dados:
+            return cls(dados["lat"], dados["lon"], dados["inicio"], dados["destino"],
+                       dados["comprimento_m"], dados["velocidade_kmh"])
+
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        np.savez_compressed(caminho, lat=self.lat, lon=self.lon, inicio=self.inicio, destino=self.destino,
+                            comprimento_m=self.comprimento_m, velocidade_kmh=self.velocidade_kmh)
+
+    def __len__(self):
+        return len(self._lat)
+
+    def no_mais_proximo(self, lat, lon, raio_km=RAIO_ENCAIXE_KM):
+        encontrados = self.grade.mais_proximos(lat, lon, 1, raio_km)
+        return encontrados[0][1] if encontrados else None
+
+    def _a_estrela(self, origem, destino):
+        """Caminho mais rápido entre dois nós. Retorna (segundos, metros, nós) ou None."""
+        lat, lon = self._lat, self._lon
+        lat_d, lon_d = lat[destino], lon[destino]
+        vel_max = self._vel_max_ms
+
+        def estimativa(no):
+            # Linha reta na velocidade máxima da malha: nunca superestima o tempo
+            return calcular_distancia_km(lat[no], lon[no], lat_d, lon_d) * 1000 / vel_max
+
+        tempo = {origem: 0.0}
+        metros = {origem: 0.0}
+        anterior = {origem: None}
+        abertos = [(estimativa(origem), origem)]
+        fechados = set()
+        while abertos:
+            _, no = heapq.heappop(abertos)
+            if no == destino:
+                caminho = []
+                while no is not None:
+                    caminho.append(no)
+                    no = anterior[no]
+                return tempo[destino], metros[destino], tuple(reversed(caminho))
+            if no in fechados:
+                continue
+            fechados.add(no)
+            t_no, m_no = tempo[no], metros[no]
+            for aresta in range(self._inicio[no], self._inicio[no + 1]):
+                vizinho = self._destino[aresta]
+                t = t_no + self._segundos[aresta]
+                if t < tempo.get(vizinho, math.inf):
+                    tempo[vizinho] = t
+                    metros[vizinho] = m_no + self._comprimento[aresta]
+                    anterior[vizinho] = no
+                    heapq.heappush(abertos, (t + estimativa(vizinho), vizinho))
+        return None
+
+    def rota(self, origem, destino):
+        """Rota mais rápida entre dois pontos (lat, lon), ou None se não houver caminho."""
+        no_origem = self.no_mais_proximo(*origem)
+        no_destino = self.no_mais_proximo(*destino)
+        if no_origem is None or no_destino is None:
+            return None
+        resultado = self._entre_nos(no_origem, no_destino)
+        if resultado is None:
+            return None
+        segundos, metros, nos = resultado
+        geometria = (tuple(origem),) + tuple((self._lat[n], self._lon[n]) for n in nos) + (tuple(destino),)
+        # Trechos de encaixe (ponto -> nó) entram na distância em linha reta
+        encaixe_km = (calcular_distancia_km(*origem, self._lat[no_origem], self._lon[no_origem])
+                      + calcular_distancia_km(*destino, self._lat[no_destino], self._lon[no_destino]))
+        distancia_km = metros / 1000 + encaixe_km
+        duracao_min = max(1, round(segundos / 60 + estimar_duracao(encaixe_km)))
+        return Rota(round(distancia_km, 2), duracao_min, geometria, True)
+
+
+_grafo = None
+_grafo_carregado = False
+_grafo_lock = threading.Lock()
+
+
+def obter_grafo():
+    """Malha viária do processo (carregada uma vez de CAMINHO_GRAFO) ou None se o arquivo não existir."""
+    global _grafo, _grafo_carregado
+    if not _grafo_carregado:
+        with _grafo_lock:
+            if not _grafo_carregado:
+                _grafo = GrafoViario.carregar(CAMINHO_GRAFO) if os.path.exists(CAMINHO_GRAFO) else None
+                _grafo_carregado = True
+    return _grafo
+
+
+def estimar_rota_sem_malha(origem, destino):
+    distancia_km = calcular_distancia_km(*origem, *destino) * FATOR_DESVIO_SEM_MALHA
+    return Rota(round(distancia_km, 2), estimar_duracao(distancia_km), (tuple(origem), tuple(destino)), False)
+
+
+def calcular_rota(origem, destino):
+    """Rota entre dois pontos (lat, lon) pela malha viária.
+    Sem malha (ou sem caminho), estima pela linha reta com FATOR_DESVIO_SEM_MALHA.
+    """
+    grafo = obter_grafo()
+    rota = grafo.rota(origem, destino) if grafo is not None else None
+    return rota or estimar_rota_sem_malha(origem, destino)
+
+
+# --- Conversão de extratos OSM -------------------------------------------------
+
+def _velocidade(tags):
+    maxspeed = tags.get("maxspeed", "").split()[0] if tags.get("maxspeed") else ""
+    if maxspeed.isdigit():
+        return float(maxspeed)
+    return float(VELOCIDADES_KMH[tags["highway"]])
+
+
+def converter_osm(caminho_osm, caminho_saida):
+    """Lê um extrato OSM (XML) e grava a malha viária de carros em formato .npz."""
+    coordenadas = {}
+    vias = []
+    for _, elemento in ET.iterparse(caminho_osm, events=("end",)):
+        if elemento.tag == "node":
+            coordenadas[elemento.get("id")] = (float(elemento.get("lat")), float(elemento.get("lon")))
+            elemento.clear()
+        elif elemento.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in elemento.iter("tag")}
+            if tags.get("highway") in VELOCIDADES_KMH and tags.get("access") not in ("no", "private"):
+                nos = [nd.get("ref") for nd in elemento.iter("nd")]
+                vias.append((nos, tags))
+            elemento.clear()
+
+    indice = {}
+    origens, destinos, velocidades = [], [], []
+    for nos, tags in vias:
+        nos = [n for n in nos if n in coordenadas]
+        ids = [indice.setdefault(n, len(indice)) for n in nos]
+        velocidade = _velocidade(tags)
+        sentido = tags.get("oneway", "no")
+        mao_unica = sentido in ("yes", "true", "1") or tags.get("junction") == "roundabout"
+        for a, b in zip(ids, ids[1:]):
+            if sentido == "-1":
+                # Mão única no sentido contrário ao desenho da via
+                a, b = b, a
+            origens.append(a); destinos.append(b); velocidades.append(velocidade)
+            if not mao_unica and sentido != "-1":
+                origens.append(b); destinos.append(a); velocidades.append(velocidade)
+
+    lat = np.empty(len(indice))
+    lon = np.empty(len(indice))
+    for osm_id, i in indice.items():
+        lat[i], lon[i] = coordenadas[osm_id]
+    origens = np.asarray(origens, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int32)
+    ordem = np.argsort(origens, kind="stable")
+    origens, destinos = origens[ordem], destinos[ordem]
+    velocidades = np.asarray(velocidades, dtype=np.float32)[ordem]
+    comprimento_m = (distancias_km_pares(lat[origens], lon[origens], lat[destinos], lon[destinos]) * 1000
+                     ).astype(np.float32)
+    inicio = np.zeros(len(indice) + 1, dtype=np.int64)
+    np.add.at(inicio, origens + 1, 1)
+    inicio = np.cumsum(inicio)
+
+    grafo = GrafoViario(lat, lon, inicio, destinos, comprimento_m, velocidades)
+    grafo.salvar(caminho_saida)
+    return grafo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Malha viária e rotas do ParaTodos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    converter = comandos.add_parser("converter", help="converte um extrato OSM (XML) em .npz")
+    converter.add_argument("osm")
+    converter.add_argument("saida", nargs="?", default=CAMINHO_GRAFO)
+    rota = comandos.add_parser("rota", help="calcula a rota entre dois pontos lat,lon")
+    rota.add_argument("origem")
+    rota.add_argument("destino")
+    args = parser.parse_args()
+
+    if args.comando == "converter":
+        grafo = converter_osm(args.osm, args.saida)
+        print(f"{len(grafo)} nós e {len(grafo.destino)} arestas gravados em {args.saida}")
+    else:
+        origem = tuple(float(v) for v in args.origem.split(","))
+        destino = tuple(float(v) for v in args.destino.split(","))
+        resultado = calcular_rota(origem, destino)
+        print(f"{resultado.distancia_km} km, {resultado.duracao_min} min, "
+              f"{len(resultado.geometria)} pontos ({'malha' if resultado.pela_malha else 'linha reta'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# servico_auth.py - Hash e verificação de senhas (bcrypt) num pool de threads limitado (sem Streamlit)
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# Threads que calculam bcrypt ao mesmo tempo; o resto do processo continua livre
+MAX_TRABALHADORES = min(4, os.cpu_count() or 1)
+# Pedidos aceitos (em execução + na fila) antes de segurar quem chama
+MAX_PENDENTES = 8 * MAX_TRABALHADORES
+# Tempo desejado para um hash; a calibração escolhe o maior custo que cabe nele
+TEMPO_ALVO_MS = 250
+CUSTO_MIN = 10
+CUSTO_MAX = 15
+# Força um custo fixo (pula a calibração), ex.: PARATODOS_BCRYPT_CUSTO=12
+VARIAVEL_CUSTO = "PARATODOS_BCRYPT_CUSTO"
+
+_executor = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES, thread_name_prefix="bcrypt")
+_vagas = threading.BoundedSemaphore(MAX_PENDENTES)
+_custo = None
+_custo_lock = threading.Lock()
+
+
+def _enviar(funcao, *args):
+    _vagas.acquire()
+    try:
+        futuro = _executor.submit(funcao, *args)
+    except BaseException:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    return futuro
+
+
+def calibrar_custo(alvo_ms=TEMPO_ALVO_MS):
+    """Mede um hash no custo mínimo e escolhe o maior custo que fica dentro do alvo.
+    Cada ponto a mais de custo dobra o tempo do bcrypt.
+    """
+    inicio = time.perf_counter()
+    bcrypt.hashpw(b"calibracao", bcrypt.gensalt(CUSTO_MIN))
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+    custo = CUSTO_MIN
+    while custo < CUSTO_MAX and tempo_ms * 2 <= alvo_ms:
+        custo += 1
+        tempo_ms *= 2
+    return custo
+
+
+def custo_configurado():
+    """Custo usado para novos hashes: o da variável de ambiente ou o calibrado (uma vez por processo)."""
+    global _custo
+    if _custo is None:
+        with _custo_lock:
+            if _custo is None:
+                valor = os.environ.get(VARIAVEL_CUSTO)
+                _custo = int(valor) if valor else calibrar_custo()
+    return _custo
+
+
+def custo_do_hash(hashed):
+    """Lê o custo gravado no hash ($2b$<custo>$...)."""
+    return int(hashed.split(b"$")[2])
+
+
+def precisa_rehash(hashed):
+    """Só hashes com custo abaixo do atual são refeitos. Cada processo calibra o seu custo;
+    um que calibrou mais baixo (ex.: iniciado sob carga) não rebaixa hashes já gravados.
+    """
+    return custo_do_hash(hashed) < custo_configurado()
+
+
+def _gerar_hash(senha, custo):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(custo))
+
+
+def _verificar(senha, hashed):
+    return bcrypt.checkpw(senha.encode('utf-8'), hashed)
+
+
+def gerar_hash(senha):
+    """Gera o hash da senha no pool (a thread que chama só espera o resultado)."""
+    return _enviar(_gerar_hash, senha, custo_configurado()).result()
+
+
+def verificar_senha(senha, hashed):
+    """Confere a senha contra o hash no pool."""
+    return _enviar(_verificar, senha, hashed).result()
+
+
+def rehash_em_segundo_plano(senha, ao_gerar):
+    """Gera um hash novo no custo atual e entrega para ao_gerar(novo_hash), sem esperar."""
+    custo = custo_configurado()
+    return _enviar(lambda: ao_gerar(_gerar_hash(senha, custo)))
+
+
+# Calibra no início do processo, numa thread do pool, sem atrasar quem importa
+_executor.submit(custo_configurado)
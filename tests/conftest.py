@@ -0,0 +1,20 @@
+# conftest.py - Os módulos do app ficam na raiz do repositório; cada teste de banco usa um SQLite temporário
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Aponta o db para um banco novo em tmp_path, já migrado."""
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    db.init_db()
+    yield db.DATABASE_PATH
+    db.encerrar_gravador_corridas()
+    db.fechar_conexoes()
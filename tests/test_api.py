@@ -0,0 +1,114 @@
+# test_api.py - Validação das entradas da API HTTP (rotas chamadas direto pelo _tratar, sem rede)
+
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+
+import api
+import db
+
+
+@pytest.fixture
+def token(banco, monkeypatch):
+    monkeypatch.setenv(api.VARIAVEL_SEGREDO, "segredo-de-teste")
+    monkeypatch.setenv(api.VARIAVEL_CHAVE_RASTREAMENTO, "chave-de-teste")
+    return api.gerar_token("ana")
+
+
+def _chamar(metodo, alvo, corpo=None, token=None, cabecalhos=None):
+    cabecalhos = dict(cabecalhos or {})
+    if token:
+        cabecalhos["authorization"] = f"Bearer {token}"
+    bruto = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode() if corpo is not None else b""
+    try:
+        return asyncio.run(api._tratar(metodo, alvo, cabecalhos, bruto))
+    except api.ErroHttp as erro:
+        return erro.status, {"erro": erro.mensagem}
+
+
+BUSCA = {"origem": [-26.9155, -49.0713], "destino": [-26.8755, -49.0934], "necessidades": ["rampa"]}
+
+
+def test_busca_valida(token):
+    status, dados = _chamar("POST", "/busca", BUSCA)
+    assert status == 200 and dados["motoristas"]
+
+
+@pytest.mark.parametrize("origem", [[True, False], [1], ["-26.9", "-49.0"], [91, 0], [0, 181], [1e308, 0]])
+def test_busca_recusa_pontos_invalidos(token, origem):
+    assert _chamar("POST", "/busca", dict(BUSCA, origem=origem))[0] == 400
+
+
+@pytest.mark.parametrize("literal", [b"NaN", b"Infinity", b"-Infinity"])
+def test_busca_recusa_nan_e_infinito(token, literal):
+    # json.loads aceita esses literais fora do padrão JSON
+    corpo = b'{"origem": [' + literal + b', -49.07], "destino": [-26.87, -49.09], "necessidades": ["rampa"]}'
+    assert _chamar("POST", "/busca", corpo)[0] == 400
+
+
+def test_posicao_recusa_nan(token):
+    corpo = b'{"motorista_id": 1, "posicao": [NaN, -49.07]}'
+    assert _chamar("POST", "/motoristas/posicao", corpo,
+                   cabecalhos={"x-chave-rastreamento": "chave-de-teste"})[0] == 400
+
+
+def test_corrida_recusa_id_booleano(token):
+    assert _chamar("POST", "/corridas", dict(BUSCA, motorista_id=True), token)[0] == 400
+
+
+@pytest.mark.parametrize("corpo,status", [(b"{", 400), (b"[1, 2]", 400), (b"{}", 400)])
+def test_corpo_invalido(token, corpo, status):
+    assert _chamar("POST", "/busca", corpo)[0] == status
+
+
+def test_rotas_e_metodos_desconhecidos(token):
+    assert _chamar("GET", "/nada")[0] == 404
+    assert _chamar("GET", "/busca")[0] == 405
+
+
+def test_token_obrigatorio(token):
+    assert _chamar("GET", "/historico")[0] == 401
+    vencido = api.gerar_token("ana", agora=time.time() - api.VALIDADE_TOKEN_S - 1)
+    assert _chamar("GET", "/historico", token=vencido)[0] == 401
+    # Outro usuário com a assinatura do token da ana
+    conteudo = base64.urlsafe_b64encode(f"bia|{int(time.time()) + 60}".encode()).decode()
+    assert _chamar("GET", "/historico", token=conteudo + "." + token.split(".")[1])[0] == 401
+
+
+@pytest.mark.parametrize("limite", ["0", "-1", "-5", "abc"])
+def test_historico_recusa_limite_invalido(token, limite):
+    assert _chamar("GET", f"/historico?limite={limite}", token=token)[0] == 400
+
+
+def test_historico_pagina_pela_api(token):
+    for i in range(3):
+        db.salvar_corrida("ana", f"M{i}", ["rampa"], "Concluída")
+    status, primeira = _chamar("GET", "/historico?limite=2", token=token)
+    assert status == 200
+    assert [c["motorista"] for c in primeira["corridas"]] == ["M2", "M1"]
+    _, segunda = _chamar("GET", f"/historico?limite=2&antes_de={primeira['proximo']}", token=token)
+    assert [c["motorista"] for c in segunda["corridas"]] == ["M0"] and segunda["proximo"] is None
+
+
+async def _enviar_bruto(cabecalho_content_length):
+    servidor = await asyncio.start_server(api.atender, "127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    async with servidor:
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        escritor.write(b"POST /login HTTP/1.1\r\nContent-Length: " + cabecalho_content_length + b"\r\n\r\n")
+        await escritor.drain()
+        resposta = await leitor.read()
+        escritor.close()
+    return int(resposta.split(b" ", 2)[1])
+
+
+@pytest.mark.parametrize("valor", [b"abc", b"-5", b"+3", b"1_0", b"1.5"])
+def test_content_length_invalido(valor):
+    assert asyncio.run(_enviar_bruto(valor)) == 400
+
+
+def test_corpo_grande_demais():
+    assert asyncio.run(_enviar_bruto(str(api.MAX_CORPO + 1).encode())) == 413
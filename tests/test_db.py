@@ -0,0 +1,135 @@
+# test_db.py - Motoristas, migrações do esquema, estatísticas e histórico paginado no banco
+
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+import db
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def test_banco_novo_chega_na_ultima_migracao(banco):
+    assert db.versao_esquema() == len(db.MIGRACOES)
+    assert len(db.carregar_motoristas_alterados()) == len(db.MOTORISTAS_INICIAIS)
+
+
+def test_migrar_de_novo_nao_muda_nada(banco):
+    db.migrar()
+    assert db.versao_esquema() == len(db.MIGRACOES)
+    assert len(db.carregar_motoristas_alterados()) == len(db.MOTORISTAS_INICIAIS)
+
+
+def test_migra_banco_da_primeira_versao(tmp_path, monkeypatch):
+    # Esquema e formato de dados de antes das migrações: data "dd/mm/aaaa hh:mm" e "_" nas necessidades
+    caminho = tmp_path / "antigo.db"
+    with sqlite3.connect(caminho) as conn:
+        conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, password BLOB NOT NULL, profile TEXT NOT NULL)")
+        conn.execute("""CREATE TABLE historico (id INTEGER PRIMARY KEY AUTOINCREMENT, usuario TEXT NOT NULL,
+            motorista TEXT NOT NULL, necessidades TEXT NOT NULL, status TEXT NOT NULL, data TEXT NOT NULL)""")
+        conn.executemany("INSERT INTO historico (usuario, motorista, necessidades, status, data) VALUES (?, ?, ?, ?, ?)",
+                         [("ana", "Maria", "rampa, cadeira_de_rodas", "Concluída", "05/03/2025 14:30"),
+                          ("ana", "Fulano", "elevador", "Concluída", "06/03/2025 09:00")])
+    conn.close()
+    monkeypatch.setattr(db, "DATABASE_PATH", str(caminho))
+    try:
+        db.migrar()
+        assert db.versao_esquema() == len(db.MIGRACOES)
+        assert [linha[3] for linha in db.carregar_historico("ana")] == ["2025-03-06 09:00", "2025-03-05 14:30"]
+        assert db.contar_corridas_por_necessidade() == {"cadeira de rodas": 1, "elevador": 1, "rampa": 1}
+        # Estatísticas por motorista usam o id quando o nome é de um só motorista
+        maria = next(m["id"] for m in db.carregar_motoristas_alterados() if m["name"] == "Maria")
+        assert {chave for chave, *_ in db.carregar_estatisticas("motorista", "2025-01-01")} == {str(maria),
+                                                                                                 "nome:Fulano"}
+    finally:
+        db.fechar_conexoes()
+
+
+def test_migra_o_banco_do_repositorio(tmp_path, monkeypatch):
+    caminho = tmp_path / "usuarios.db"
+    shutil.copy(RAIZ / "usuarios.db", caminho)
+    monkeypatch.setattr(db, "DATABASE_PATH", str(caminho))
+    try:
+        db.migrar()
+        assert db.versao_esquema() == len(db.MIGRACOES)
+    finally:
+        db.fechar_conexoes()
+
+
+def test_estatisticas_por_motorista_separam_nomes_iguais(banco):
+    primeiro = db.salvar_motorista("Homônimo", "Comum", ["rampa"], -26.9, -49.0)
+    segundo = db.salvar_motorista("Homônimo", "Comum", ["rampa"], -26.9, -49.0)
+    db.salvar_corrida("ana", "Homônimo", ["rampa"], "Concluída", "Comum", 10.0, motorista_id=primeiro)
+    db.salvar_corrida("ana", "Homônimo", ["rampa"], "Concluída", "Comum", 12.0, motorista_id=segundo)
+    receitas = {chave: receita for chave, _, _, receita in db.carregar_estatisticas("motorista", "2000-01-01")}
+    assert receitas == {str(primeiro): 10.0, str(segundo): 12.0}
+
+
+def test_salvar_motorista_concorrente_gera_versoes_unicas(banco):
+    versoes_antes = {m["versao"] for m in db.carregar_motoristas_alterados()}
+
+    def cadastrar(i):
+        for j in range(10):
+            db.salvar_motorista(f"M{i}-{j}", "Comum", [], -26.9, -49.0)
+
+    threads = [threading.Thread(target=cadastrar, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    versoes = [m["versao"] for m in db.carregar_motoristas_alterados()]
+    assert len(versoes) == len(set(versoes)) == len(versoes_antes) + 60
+
+
+def test_motoristas_alterados_desde_versao(banco):
+    versao = max(m["versao"] for m in db.carregar_motoristas_alterados())
+    novo = db.salvar_motorista("Novo", "Comum", ["rampa"], -26.9, -49.0)
+    db.salvar_motorista("Novo", "Comum", ["rampa"], -26.9, -49.0, ativo=False, motorista_id=novo)
+    alterados = db.carregar_motoristas_alterados(versao)
+    assert [(m["id"], m["ativo"]) for m in alterados] == [(novo, False)]
+    assert alterados[0]["versao"] == versao + 2
+
+
+def test_carregar_nomes_motoristas(banco):
+    removido = db.salvar_motorista("Removido", "Comum", [], -26.9, -49.0)
+    db.salvar_motorista("Removido", "Comum", [], -26.9, -49.0, ativo=False, motorista_id=removido)
+    ids = [1, removido, 999_999] + list(range(2, 800))
+    nomes = db.carregar_nomes_motoristas(ids)
+    assert nomes[1] == db.MOTORISTAS_INICIAIS[0]["name"] and nomes[removido] == "Removido"
+    assert 999_999 not in nomes and len(nomes) == len(db.MOTORISTAS_INICIAIS) + 1
+    assert db.carregar_nomes_motoristas([]) == {}
+
+
+def _todas_as_paginas(usuario, limite):
+    paginas, cursor = [], None
+    while True:
+        linhas, cursor = db.carregar_historico_pagina(usuario, cursor, limite)
+        paginas.append([linha[0] for linha in linhas])
+        if cursor is None:
+            return paginas
+
+
+@pytest.mark.parametrize("limite", [1, 2, 3, 5, 7, 100])
+def test_historico_paginado_percorre_tudo_uma_vez(banco, limite):
+    for i in range(5):
+        db.salvar_corrida("ana", f"M{i}", ["rampa"], "Concluída")
+        db.salvar_corrida("bia", f"Outro{i}", ["rampa"], "Concluída")
+    paginas = _todas_as_paginas("ana", limite)
+    assert [m for pagina in paginas for m in pagina] == [f"M{i}" for i in reversed(range(5))]
+    assert all(len(pagina) == limite for pagina in paginas[:-1])
+    # Sem página vazia no fim quando o total é múltiplo do limite
+    assert 0 < len(paginas[-1]) <= limite
+
+
+def test_historico_paginado_sem_corridas(banco):
+    assert db.carregar_historico_pagina("ninguem") == ([], None)
+    assert db.carregar_historico_pagina("ninguem", antes_de_id=1) == ([], None)
+
+
+@pytest.mark.parametrize("limite", [0, -1, -5])
+def test_historico_paginado_recusa_limite_menor_que_um(banco, limite):
+    with pytest.raises(ValueError):
+        db.carregar_historico_pagina("ana", None, limite)
@@ -0,0 +1,90 @@
+# test_despacho.py - A atribuição esparsa e o despacho em lote contra a força bruta
+
+import itertools
+import random
+
+import pytest
+
+from despacho import Pedido, atribuir, despachar
+from frota import Frota, _congelar
+from geo import calcular_distancia_km
+from matching import ADAPTACOES
+from precos import obter_tarifas
+from rotas import calcular_rota
+
+
+def _melhor_por_forca_bruta(custos):
+    """(-atendidas, custo total) ótimo; custos[i] é {coluna: custo} da linha i."""
+    melhor = None
+    for escolha in itertools.product(*[[None] + list(c) for c in custos]):
+        usadas = [coluna for coluna in escolha if coluna is not None]
+        if len(usadas) != len(set(usadas)):
+            continue
+        chave = (-len(usadas), sum(custos[i][c] for i, c in enumerate(escolha) if c is not None))
+        if melhor is None or chave < melhor:
+            melhor = chave
+    return melhor
+
+
+@pytest.mark.parametrize("semente", range(300))
+def test_atribuir_igual_a_forca_bruta(semente):
+    rng = random.Random(semente)
+    linhas, colunas = rng.randint(1, 6), rng.randint(1, 7)
+    # Custos inteiros (semente par) forçam empates
+    sortear = (lambda: float(rng.randint(0, 9))) if semente % 2 == 0 else (lambda: rng.random() * 10)
+    arestas = [[(j, sortear()) for j in range(colunas) if rng.random() < 0.5] for _ in range(linhas)]
+    sem_par = 1.0 + sum(c for lista in arestas for _, c in lista)
+
+    resultado = atribuir(arestas, sem_par)
+
+    custos = [dict(lista) for lista in arestas]
+    assert len(set(resultado.values())) == len(resultado)
+    assert all(coluna in custos[linha] for linha, coluna in resultado.items())
+    atendidas, total = _melhor_por_forca_bruta(custos)
+    assert -len(resultado) == atendidas
+    assert sum(custos[i][j] for i, j in resultado.items()) == pytest.approx(total, abs=1e-9)
+
+
+def test_atribuir_sem_arestas():
+    assert atribuir([], 1.0) == {}
+    assert atribuir([[], []], 1.0) == {}
+
+
+def _frota(rng, n):
+    por_id = {i: _congelar({"id": i, "name": f"M{i}", "veiculo": rng.choice(["Comum", "Híbrido", "Elétrico"]),
+                            "capabilities": rng.sample(ADAPTACOES[:5], rng.randint(1, 4)),
+                            "lat": -26.91 + rng.uniform(-0.02, 0.02), "lon": -49.07 + rng.uniform(-0.02, 0.02)})
+              for i in range(n)}
+    return Frota(por_id, 1)
+
+
+@pytest.mark.parametrize("semente", range(15))
+def test_despachar_otimo_em_frota_pequena(semente):
+    rng = random.Random(semente)
+    frota = _frota(rng, 5)
+    pedidos = [Pedido(i, f"u{i}", (-26.91 + rng.uniform(-0.02, 0.02), -49.07 + rng.uniform(-0.02, 0.02)),
+                      (-26.88, -49.09), rng.sample(ADAPTACOES[:5], rng.randint(1, 2))) for i in range(4)]
+
+    atribuicoes, sem_motorista = despachar(pedidos, frota, k=100, raio_km=100)
+
+    def custo(pedido, motorista):
+        rota = calcular_rota(pedido.origem, pedido.destino)
+        preco = obter_tarifas().cotar_lote([motorista["veiculo"]], pedido.necessidades,
+                                           rota.distancia_km, rota.duracao_min).total[0]
+        return calcular_distancia_km(*pedido.origem, motorista["lat"], motorista["lon"]) + 0.1 * preco
+
+    custos = [{m["id"]: custo(p, m) for m in frota.motoristas if set(p.necessidades) <= set(m["capabilities"])}
+              for p in pedidos]
+    assert len({a.motorista_id for a in atribuicoes}) == len(atribuicoes)
+    assert len(atribuicoes) + len(sem_motorista) == len(pedidos)
+    atendidos, total = _melhor_por_forca_bruta(custos)
+    assert -len(atribuicoes) == atendidos
+    assert sum(custos[a.pedido_id][a.motorista_id] for a in atribuicoes) == pytest.approx(total, rel=1e-9)
+
+
+def test_despachar_ignora_ocupados():
+    rng = random.Random(7)
+    frota = _frota(rng, 3)
+    pedido = Pedido(0, "u", (-26.91, -49.07), (-26.88, -49.09), [])
+    atribuicoes, _ = despachar([pedido], frota, ocupados=[0, 1], k=100, raio_km=100)
+    assert [a.motorista_id for a in atribuicoes] == [2]
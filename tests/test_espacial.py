@@ -0,0 +1,78 @@
+# test_espacial.py - Os k mais próximos da grade e do matching contra a haversine de todos os pontos
+
+import random
+
+import pytest
+
+import matching
+from espacial import GradeEspacial
+from geo import calcular_distancia_km
+from matching import ADAPTACOES, IndiceCapacidades, proximos_compativeis
+
+CENTRO = (-26.9155, -49.0713)
+
+
+def _pontos(rng, n, espalhamento):
+    return ([CENTRO[0] + rng.uniform(-espalhamento, espalhamento) for _ in range(n)],
+            [CENTRO[1] + rng.uniform(-espalhamento, espalhamento) for _ in range(n)])
+
+
+def _forca_bruta(lats, lons, lat, lon, k, raio_km, aceitar=lambda pos: True):
+    pares = sorted((calcular_distancia_km(lat, lon, a, b), pos)
+                   for pos, (a, b) in enumerate(zip(lats, lons)) if aceitar(pos))
+    return [(d, pos) for d, pos in pares if d <= raio_km][:k]
+
+
+def _conferir(obtido, esperado):
+    # Empates na distância podem trocar a ordem: compara as distâncias e os conjuntos
+    assert [d for d, _ in obtido] == pytest.approx([d for d, _ in esperado], abs=1e-9)
+    assert {pos for _, pos in obtido} == {pos for _, pos in esperado}
+
+
+@pytest.mark.parametrize("semente", range(40))
+def test_mais_proximos_igual_a_forca_bruta(semente):
+    rng = random.Random(semente)
+    lats, lons = _pontos(rng, rng.randint(1, 400), rng.choice([0.01, 0.1, 0.5]))
+    grade = GradeEspacial(lats, lons, tamanho_celula_km=rng.choice([0.5, 1.0, 3.0]))
+    for _ in range(10):
+        lat, lon = CENTRO[0] + rng.uniform(-0.3, 0.3), CENTRO[1] + rng.uniform(-0.3, 0.3)
+        k, raio_km = rng.randint(1, 20), rng.choice([0.5, 2.0, 10.0, 100.0])
+        _conferir(grade.mais_proximos(lat, lon, k, raio_km), _forca_bruta(lats, lons, lat, lon, k, raio_km))
+
+
+def test_mais_proximos_com_filtro():
+    rng = random.Random(1)
+    lats, lons = _pontos(rng, 300, 0.1)
+    grade = GradeEspacial(lats, lons)
+    pares = lambda pos: pos % 2 == 0  # noqa: E731
+    _conferir(grade.mais_proximos(*CENTRO, 15, 10.0, aceitar=pares),
+              _forca_bruta(lats, lons, *CENTRO, 15, 10.0, aceitar=pares))
+
+
+def test_grade_vazia():
+    assert GradeEspacial([], []).mais_proximos(*CENTRO, 5, 10.0) == []
+
+
+@pytest.mark.parametrize("limite", [0, 10_000])
+@pytest.mark.parametrize("semente", range(10))
+def test_proximos_compativeis_igual_a_forca_bruta(semente, limite, monkeypatch):
+    # limite 0 força a varredura da grade; 10_000 força a medição direta dos compatíveis
+    monkeypatch.setattr(matching, "LIMITE_BUSCA_DIRETA", limite)
+    rng = random.Random(semente)
+    lats, lons = _pontos(rng, 500, 0.1)
+    motoristas = [{"capabilities": rng.sample(ADAPTACOES, rng.randint(0, 3))} for _ in lats]
+    indice, grade = IndiceCapacidades(motoristas), GradeEspacial(lats, lons)
+    excluir = set(rng.sample(range(len(lats)), 50))
+    for _ in range(10):
+        necessidades = rng.sample(ADAPTACOES, rng.randint(0, 2))
+        lat, lon = CENTRO[0] + rng.uniform(-0.1, 0.1), CENTRO[1] + rng.uniform(-0.1, 0.1)
+        compativel = lambda pos: set(necessidades) <= set(motoristas[pos]["capabilities"])  # noqa: E731
+        _conferir(proximos_compativeis(indice, grade, lat, lon, necessidades, k=10, raio_km=5.0),
+                  _forca_bruta(lats, lons, lat, lon, 10, 5.0, compativel))
+        _conferir(proximos_compativeis(indice, grade, lat, lon, necessidades, k=10, raio_km=5.0, excluir=excluir),
+                  _forca_bruta(lats, lons, lat, lon, 10, 5.0, lambda pos: compativel(pos) and pos not in excluir))
+
+
+def test_necessidade_desconhecida():
+    indice = IndiceCapacidades([{"capabilities": ["rampa"]}])
+    assert proximos_compativeis(indice, GradeEspacial([CENTRO[0]], [CENTRO[1]]), *CENTRO, ["teletransporte"]) == []
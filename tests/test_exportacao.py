@@ -0,0 +1,55 @@
+# test_exportacao.py - Exportação do histórico: XLSX dividido em planilhas e CSV
+
+import csv
+import io
+import re
+import zipfile
+
+import pytest
+
+import db
+import exportacao
+
+pytest.importorskip("xlsxwriter")
+
+
+def _planilhas(caminho):
+    """[(nome, linhas)] de cada planilha do XLSX, lido direto do zip (sem openpyxl)."""
+    with zipfile.ZipFile(caminho) as arquivo:
+        nomes = re.findall(r'<sheet name="([^"]+)"', arquivo.read("xl/workbook.xml").decode("utf-8"))
+        return [(nome, arquivo.read(f"xl/worksheets/sheet{i}.xml").decode("utf-8").count("<row "))
+                for i, nome in enumerate(nomes, start=1)]
+
+
+def _corridas(quantidade, usuario="ana"):
+    for i in range(quantidade):
+        db.salvar_corrida(usuario, f"M{i}", ["rampa"], "Concluída", "Comum", 10.0 + i)
+
+
+@pytest.mark.parametrize("corridas,esperado", [
+    (25, [("Histórico", 11), ("Histórico 2", 11), ("Histórico 3", 6)]),
+    (20, [("Histórico", 11), ("Histórico 2", 11)]),
+    (10, [("Histórico", 11)]),
+    (0, [("Histórico", 1)]),
+])
+def test_xlsx_continua_em_outra_planilha(banco, tmp_path, corridas, esperado):
+    _corridas(corridas)
+    destino = tmp_path / "historico.xlsx"
+    assert exportacao.exportar_xlsx(str(destino), linhas_por_planilha=10) == corridas
+    # Cada planilha tem o cabeçalho e até 10 corridas
+    assert _planilhas(destino) == esperado
+
+
+def test_xlsx_so_do_usuario(banco, tmp_path):
+    _corridas(3)
+    _corridas(4, usuario="bia")
+    assert exportacao.exportar_xlsx(str(tmp_path / "ana.xlsx"), usuario="ana") == 3
+
+
+def test_csv_tem_todas_as_corridas(banco):
+    _corridas(7)
+    destino = io.BytesIO()
+    exportacao.exportar("csv", destino, "ana")
+    linhas = list(csv.reader(io.StringIO(destino.getvalue().decode("utf-8-sig"))))
+    assert linhas[0] == exportacao.COLUNAS
+    assert sorted(linha[2] for linha in linhas[1:]) == sorted(f"M{i}" for i in range(7))
@@ -0,0 +1,109 @@
+# test_fila_escrita.py - Gravador em lote: tamanho do lote, prazo, erros repassados e encerramento
+
+import threading
+import time
+
+import pytest
+
+from fila_escrita import GravadorEmLote
+
+
+def _enviar_em_paralelo(gravador, itens):
+    resultados, erros = {}, {}
+
+    def enviar(item):
+        try:
+            resultados[item] = gravador.enviar(item, timeout=5)
+        except Exception as erro:
+            erros[item] = erro
+
+    threads = [threading.Thread(target=enviar, args=(item,)) for item in itens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultados, erros
+
+
+def test_lote_nao_passa_do_tamanho():
+    lotes = []
+    liberar = threading.Event()
+
+    def gravar(itens):
+        liberar.wait()  # segura o primeiro lote para os outros itens se acumularem
+        lotes.append(list(itens))
+        return len(itens)
+
+    gravador = GravadorEmLote(gravar, tamanho_lote=4, atraso_max_s=0.2)
+    threading.Timer(0.1, liberar.set).start()
+    resultados, erros = _enviar_em_paralelo(gravador, range(10))
+    gravador.encerrar()
+    assert not erros and sorted(resultados) == list(range(10))
+    assert sorted(i for lote in lotes for i in lote) == list(range(10))
+    assert max(len(lote) for lote in lotes) <= 4
+    # Cada enviar recebe o retorno do lote em que o item foi gravado
+    assert all(resultados[i] == len(next(lote for lote in lotes if i in lote)) for i in resultados)
+
+
+def test_item_sozinho_espera_no_maximo_o_atraso():
+    lotes = []
+    gravador = GravadorEmLote(lotes.append, tamanho_lote=64, atraso_max_s=0.05)
+    inicio = time.monotonic()
+    gravador.enviar("a", timeout=5)
+    assert time.monotonic() - inicio < 1.0
+    assert lotes == [["a"]]
+    gravador.encerrar()
+
+
+def test_erro_do_lote_chega_a_todos_que_esperam():
+    def gravar(itens):
+        raise ValueError(f"falhou {len(itens)}")
+
+    gravador = GravadorEmLote(gravar, tamanho_lote=8, atraso_max_s=0.2)
+    resultados, erros = _enviar_em_paralelo(gravador, range(5))
+    gravador.encerrar()
+    assert not resultados
+    assert sorted(erros) == list(range(5)) and all(isinstance(e, ValueError) for e in erros.values())
+
+
+def test_erro_num_lote_nao_para_o_gravador():
+    chamadas = []
+
+    def gravar(itens):
+        chamadas.append(itens)
+        if len(chamadas) == 1:
+            raise ValueError("primeiro lote")
+        return "ok"
+
+    gravador = GravadorEmLote(gravar, tamanho_lote=1, atraso_max_s=0)
+    with pytest.raises(ValueError):
+        gravador.enviar("a", timeout=5)
+    assert gravador.enviar("b", timeout=5) == "ok"
+    gravador.encerrar()
+
+
+def test_encerrar_grava_pendentes_e_recusa_novos():
+    gravados, encerrado = [], threading.Event()
+    liberar = threading.Event()
+
+    def gravar(itens):
+        liberar.wait()
+        gravados.extend(itens)
+
+    gravador = GravadorEmLote(gravar, tamanho_lote=2, atraso_max_s=0, ao_encerrar=encerrado.set)
+    threads = [threading.Thread(target=gravador.enviar, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    # O primeiro lote (2 itens) está preso em gravar; os outros 3 esperam na fila
+    prazo = time.monotonic() + 5
+    while gravador._fila.qsize() < 3 and time.monotonic() < prazo:
+        time.sleep(0.01)
+    liberar.set()
+    gravador.encerrar(timeout=5)
+    for thread in threads:
+        thread.join()
+    assert sorted(gravados) == list(range(5))
+    assert encerrado.is_set() and not gravador._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        gravador.enviar(99)
+    gravador.encerrar()  # de novo não faz nada
@@ -0,0 +1,30 @@
+# test_mapas.py - HTML dos mapas em cache e a mensagem que move o motorista no mapa ao vivo
+
+import json
+import re
+
+import mapas
+
+ORIGEM = (-26.9155, -49.0713)
+ROTA = [(-26.9108, -49.0703), (-26.9130, -49.0708), ORIGEM]
+
+
+def test_mapa_ao_vivo_gerado_uma_vez_por_rota():
+    html = mapas.html_mapa_ao_vivo("corrida_1", ORIGEM, ROTA)
+    assert mapas.html_mapa_ao_vivo("corrida_1", list(ORIGEM), [list(p) for p in ROTA]) is html
+    assert mapas.html_mapa_ao_vivo("corrida_2", ORIGEM, ROTA) is not html
+    # Escuta as posições do mapa certo e move o marcador criado no início da rota
+    marcador = re.search(r"(marker_\w+)\.setLatLng\(\[dados\.lat, dados\.lon\]\)", html).group(1)
+    assert re.search(rf"var {marcador} = L\.marker\(\s*\[-26\.9108, -49\.0703\]", html)
+    assert '"corrida_1"' in html
+
+
+def test_script_posicao_leva_so_a_posicao():
+    script = mapas.script_posicao("corrida_1", (-26.912345678, -49.07))
+    mensagem = json.loads(re.search(r"postMessage\((\{.*?\}), '\*'\)", script).group(1))
+    assert mensagem == {"tipo": mapas.TIPO_MENSAGEM_POSICAO, "chave": "corrida_1", "lat": -26.91235, "lon": -49.07}
+    assert len(script) < 300
+
+
+def test_html_mapa_em_cache():
+    assert mapas.html_mapa(ORIGEM, ROTA[0], ROTA) is mapas.html_mapa(list(ORIGEM), list(ROTA[0]), ROTA)
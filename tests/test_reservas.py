@@ -0,0 +1,63 @@
+# test_reservas.py - Reservas de motoristas: a decisão no banco e o espelho em memória
+
+import threading
+
+import db
+import reservas
+
+
+def test_reserva_tem_um_so_vencedor(banco):
+    resultados = []
+    largada = threading.Barrier(8)
+
+    def reservar(usuario):
+        largada.wait()
+        resultados.append(db.reservar_motorista(1, usuario, 60))
+
+    threads = [threading.Thread(target=reservar, args=(f"u{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(r is not None for r in resultados) == 1
+    assert list(db.carregar_reservas_ativas()) == [1]
+
+
+def test_reserva_vencida_pode_ser_tomada(banco):
+    assert db.reservar_motorista(1, "ana", 0) is not None
+    assert db.carregar_reservas_ativas() == {}
+    assert db.reservar_motorista(1, "bia", 60) is not None
+    assert db.reservar_motorista(1, "ana", 60) is None
+
+
+def test_liberar_reserva_so_do_dono(banco):
+    db.reservar_motorista(1, "ana", 60)
+    assert not db.liberar_reserva(1, "bia")
+    assert db.liberar_reserva(1, "ana")
+    assert not db.liberar_reserva(1)
+    assert db.reservar_motorista(1, "bia", 60) is not None
+
+
+def test_espelho_de_reservas(banco):
+    assert reservas.reservar(1, "ana", 60)
+    assert not reservas.reservar(1, "bia", 60)
+    assert reservas.reservados() == {1}
+    assert not reservas.liberar(1, "bia")
+    assert reservas.liberar(1, "ana")
+    assert reservas.reservados() == set()
+
+
+def test_espelho_ve_reservas_de_outros_processos(banco, monkeypatch):
+    assert reservas.reservados() == set()
+    # Outro processo reserva direto no banco: o espelho só relê depois do intervalo
+    db.reservar_motorista(2, "bia", 60)
+    assert reservas.reservados() == set()
+    monkeypatch.setattr(reservas, "INTERVALO_SINCRONIZACAO_S", 0.0)
+    assert reservas.reservados() == {2}
+
+
+def test_reserva_recusada_rele_o_banco(banco):
+    assert reservas.reservados() == set()
+    db.reservar_motorista(3, "bia", 60)
+    assert not reservas.reservar(3, "ana", 60)
+    assert reservas.reservados() == {3}
@@ -0,0 +1,147 @@
+# test_rotas.py - Conversão de um extrato OSM mínimo e o A* contra Dijkstra
+
+import heapq
+import math
+import random
+
+import numpy as np
+import pytest
+
+from geo import calcular_distancia_km
+from rotas import GrafoViario, converter_osm
+
+# Malha de ~100 m entre nós:
+#   A -> B -> C   primary de mão única (rápida)
+#   A - D - E - F - C   residential de mão dupla (o caminho de volta)
+#   G <- H        oneway=-1: desenhada G, H, só se anda de H para G
+#   D - G (maxspeed 50), H - E, G - P (privada) e P - Q (calçada)
+NOS = {
+    "A": (-26.900, -49.070), "B": (-26.900, -49.069), "C": (-26.900, -49.068),
+    "D": (-26.901, -49.070), "E": (-26.901, -49.069), "F": (-26.901, -49.068),
+    "G": (-26.902, -49.070), "H": (-26.902, -49.069),
+    "P": (-26.903, -49.070), "Q": (-26.903, -49.069),
+}
+VIAS = [
+    ("ABC", {"highway": "primary", "oneway": "yes"}),
+    ("ADEFC", {"highway": "residential"}),
+    ("GH", {"highway": "residential", "oneway": "-1"}),
+    ("DG", {"highway": "residential", "maxspeed": "50 km/h"}),
+    ("HE", {"highway": "residential"}),
+    ("GP", {"highway": "residential", "access": "private"}),
+    ("PQ", {"highway": "footway"}),
+]
+
+
+def _osm():
+    ids = {nome: str(i) for i, nome in enumerate(NOS, start=1)}
+    linhas = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6">']
+    linhas += [f'  <node id="{ids[n]}" lat="{lat}" lon="{lon}"/>' for n, (lat, lon) in NOS.items()]
+    for i, (nos, tags) in enumerate(VIAS, start=100):
+        linhas.append(f'  <way id="{i}">')
+        linhas += [f'    <nd ref="{ids[n]}"/>' for n in nos]
+        linhas += [f'    <tag k="{k}" v="{v}"/>' for k, v in tags.items()]
+        linhas.append("  </way>")
+    linhas.append("</osm>")
+    return "\n".join(linhas)
+
+
+@pytest.fixture
+def grafo(tmp_path):
+    caminho = tmp_path / "malha.osm"
+    caminho.write_text(_osm(), encoding="utf-8")
+    return converter_osm(str(caminho), str(tmp_path / "malha.npz"))
+
+
+def _no(grafo, nome):
+    return grafo.no_mais_proximo(*NOS[nome], raio_km=0.01)
+
+
+def _caminho(grafo, origem, destino):
+    resultado = grafo._a_estrela(_no(grafo, origem), _no(grafo, destino))
+    if resultado is None:
+        return None
+    nomes = {_no(grafo, nome): nome for nome in "ABCDEFGH"}
+    return "".join(nomes[no] for no in resultado[2])
+
+
+def test_so_vias_de_carro_entram(grafo):
+    # P só está numa via privada e Q numa calçada
+    assert len(grafo) == 8
+    assert _no(grafo, "P") is None and _no(grafo, "Q") is None
+    # ABC: 2 arestas; ADEFC: 4 nos dois sentidos; GH: 1; DG e HE: 2 cada
+    assert len(grafo.destino) == 15
+
+
+def test_mao_unica(grafo):
+    assert _caminho(grafo, "A", "C") == "ABC"
+    assert _caminho(grafo, "C", "A") == "CFEDA"
+
+
+def test_mao_unica_no_sentido_contrario_ao_desenho(grafo):
+    assert _caminho(grafo, "H", "G") == "HG"
+    assert _caminho(grafo, "G", "H") == "GDEH"
+
+
+def test_velocidade_da_via(grafo):
+    d, g = _no(grafo, "D"), _no(grafo, "G")
+    arestas = range(grafo.inicio[d], grafo.inicio[d + 1])
+    assert {grafo.destino[a]: float(grafo.velocidade_kmh[a]) for a in arestas}[g] == 50.0
+    segundos, metros, _ = grafo._a_estrela(d, g)
+    assert metros == pytest.approx(calcular_distancia_km(*NOS["D"], *NOS["G"]) * 1000, rel=1e-4)
+    assert segundos == pytest.approx(metros / (50 / 3.6), rel=1e-4)
+
+
+def test_salvar_e_carregar(grafo, tmp_path):
+    carregado = GrafoViario.carregar(str(tmp_path / "malha.npz"))
+    for campo in ("lat", "lon", "inicio", "destino", "comprimento_m", "velocidade_kmh"):
+        assert np.array_equal(getattr(carregado, campo), getattr(grafo, campo))
+
+
+def test_rota_entre_pontos(grafo):
+    rota = grafo.rota((-26.9001, -49.0700), NOS["C"])
+    assert rota.pela_malha
+    assert rota.geometria[0] == (-26.9001, -49.0700) and rota.geometria[-1] == NOS["C"]
+    assert [tuple(p) for p in rota.geometria[1:-1]] == [NOS[n] for n in "ABC"]
+    assert grafo.rota((-27.5, -49.0), NOS["C"]) is None  # longe demais da malha
+
+
+def _dijkstra(grafo, origem, destino):
+    tempos, fila = {origem: 0.0}, [(0.0, origem)]
+    while fila:
+        t, no = heapq.heappop(fila)
+        if no == destino:
+            return t
+        if t > tempos[no]:
+            continue
+        for aresta in range(grafo.inicio[no], grafo.inicio[no + 1]):
+            vizinho = int(grafo.destino[aresta])
+            novo = t + float(grafo.comprimento_m[aresta]) / (float(grafo.velocidade_kmh[aresta]) / 3.6)
+            if novo < tempos.get(vizinho, math.inf):
+                tempos[vizinho] = novo
+                heapq.heappush(fila, (novo, vizinho))
+    return None
+
+
+@pytest.mark.parametrize("semente", range(10))
+def test_a_estrela_igual_a_dijkstra(semente):
+    rng = random.Random(semente)
+    n = 60
+    lat = [-26.9 + rng.uniform(-0.02, 0.02) for _ in range(n)]
+    lon = [-49.07 + rng.uniform(-0.02, 0.02) for _ in range(n)]
+    arestas = sorted({(a, b) for a in range(n) for b in rng.sample(range(n), 3) if a != b})
+    origens = np.array([a for a, _ in arestas])
+    destinos = [b for _, b in arestas]
+    # Comprimento nunca menor que a linha reta, como numa malha de verdade
+    comprimentos = [calcular_distancia_km(lat[a], lon[a], lat[b], lon[b]) * 1000 * rng.uniform(1, 1.5)
+                    for a, b in arestas]
+    inicio = np.concatenate([[0], np.cumsum(np.bincount(origens, minlength=n))])
+    grafo = GrafoViario(lat, lon, inicio, destinos, comprimentos, [rng.choice([30, 50, 80]) for _ in arestas])
+    for _ in range(20):
+        origem, destino = rng.randrange(n), rng.randrange(n)
+        esperado = _dijkstra(grafo, origem, destino)
+        resultado = grafo._a_estrela(origem, destino)
+        if esperado is None:
+            assert resultado is None
+        else:
+            assert resultado[0] == pytest.approx(esperado, rel=1e-6)
+            assert resultado[2][0] == origem and resultado[2][-1] == destino
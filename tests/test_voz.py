@@ -0,0 +1,82 @@
+# test_voz.py - Thread de voz com um motor pyttsx3 falso: tudo vira WAV para o navegador
+
+import sys
+import threading
+import types
+
+import pytest
+
+import voz
+
+
+class MotorFalso:
+    def __init__(self, liberar):
+        self.pendentes = []
+        self.sintetizados = []
+        self.liberar = liberar
+
+    def getProperty(self, nome):
+        return [types.SimpleNamespace(id="pt", name="Portuguese (Brazil)")]
+
+    def setProperty(self, nome, valor):
+        pass
+
+    def save_to_file(self, texto, caminho):
+        self.pendentes.append((texto, caminho))
+
+    def runAndWait(self):
+        self.liberar.wait()
+        for texto, caminho in self.pendentes:
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(b"RIFF" + texto.encode("utf-8"))
+            self.sintetizados.append(texto)
+        self.pendentes.clear()
+
+    def say(self, texto):
+        raise AssertionError("a voz não deve sair pelos alto-falantes do servidor")
+
+
+@pytest.fixture
+def motor(monkeypatch):
+    liberar = threading.Event()
+    liberar.set()
+    motor = MotorFalso(liberar)
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(init=lambda: motor))
+    return motor
+
+
+def test_frases_fixas_vao_para_o_cache_em_disco(motor, tmp_path):
+    servico = voz.VozEmSegundoPlano(pasta_cache=str(tmp_path))
+    assert servico.sintetizar("aquecimento") is not None  # só volta depois das frases fixas
+    for frase in voz.FRASES_FIXAS:
+        with open(servico.arquivo_em_cache(frase), "rb") as arquivo:
+            assert arquivo.read() == b"RIFF" + frase.encode("utf-8")
+    assert servico.voz_portugues is True
+    assert "Motorista a caminho." in voz.FRASES_FIXAS
+
+
+def test_texto_variavel_vira_audio_e_fica_em_memoria(motor, tmp_path):
+    servico = voz.VozEmSegundoPlano(pasta_cache=str(tmp_path), frases_fixas=[])
+    assert servico.sintetizar("3 motoristas encontrados.") == b"RIFF3 motoristas encontrados."
+    assert servico.sintetizar("3 motoristas encontrados.") == b"RIFF3 motoristas encontrados."
+    assert motor.sintetizados.count("3 motoristas encontrados.") == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_desiste_depois_da_espera(motor, tmp_path):
+    servico = voz.VozEmSegundoPlano(pasta_cache=str(tmp_path), frases_fixas=[])
+    motor.liberar.clear()
+    assert servico.sintetizar("demorado", espera_s=0.05) is None
+    motor.liberar.set()
+    assert servico.sintetizar("depois") == b"RIFFdepois"
+
+
+def test_sem_motor_retorna_none(monkeypatch, tmp_path):
+    def falhar():
+        raise RuntimeError("sem motor de voz")
+
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(init=falhar))
+    servico = voz.VozEmSegundoPlano(pasta_cache=str(tmp_path))
+    servico._thread.join(5)
+    assert servico.sintetizar("qualquer coisa") is None
+    assert isinstance(servico.erro, RuntimeError)
@@ -1,32 +1,31 @@
 # utils.py - Funções auxiliares e páginas de apoio
 
 import streamlit as st
+from voz import obter_voz
+from metricas import contar, cronometrado
 
+@cronometrado()
 def speak(text):
+    """Fala o texto no navegador do passageiro se a voz estiver ativada.
+    Frases fixas tocam a partir do cache em disco; as demais são sintetizadas pela
+    thread de voz (até voz.ESPERA_SINTESE_S) e tocadas do mesmo jeito.
+    """
     if st.session_state.get("voz_ativada", False):
-        try:
-            import pyttsx3
-            engine = pyttsx3.init()
-            voices = engine.getProperty('voices')
-            voz_pt = None
-
-            # Tenta encontrar uma voz em português
-            for voz in voices:
-                if "portuguese" in voz.name.lower() or "brazil" in voz.name.lower():
-                    voz_pt = voz.id
-                    break
-
-            if voz_pt:
-                engine.setProperty('voice', voz_pt)
-            else:
-                st.warning("Voz em português não encontrada. Usando voz padrão.")
-
-            engine.setProperty('rate', 160)  # velocidade da fala
-            engine.setProperty('volume', 1.0)
-            engine.say(text)
-            engine.runAndWait()
-        except Exception as e:
-            st.warning(f"Erro ao tentar falar: {e}")
+        voz = obter_voz()
+        audio = voz.arquivo_em_cache(text)
+        if audio:
+            contar("voz.audio_em_cache")
+        else:
+            audio = voz.sintetizar(text)
+            contar("voz.sintetizada" if audio is not None else "voz.descartada")
+        if audio is not None:
+            st.audio(audio, format="audio/wav", autoplay=True)
+
+        if voz.erro is not None:
+            st.warning(f"Erro ao tentar falar: {voz.erro}")
+        elif voz.voz_portugues is False and not st.session_state.get("aviso_voz_exibido"):
+            st.session_state.aviso_voz_exibido = True
+            st.warning("Voz em português não encontrada. Usando voz padrão.")
 
 
 def carregar_tema():
@@ -80,3 +79,17 @@ def mostrar_como_usar():
 
         🔹 **Deficiência Intelectual:** Assistência personalizada durante toda a corrida.
     """)
+
+
+def mostrar_precos():
+    from precos import FORMATOS_TABELA, tabela_precos, arquivo_tabela_precos
+
+    st.subheader("Tabela de Preços")
+    st.dataframe(tabela_precos(), use_container_width=True)
+
+    colunas = st.columns(len(FORMATOS_TABELA))
+    for coluna, (formato, (nome_arquivo, mime)) in zip(colunas, FORMATOS_TABELA.items()):
+        dados = arquivo_tabela_precos(formato)
+        if dados is not None:
+            with coluna:
+                st.download_button(f"Baixar {formato.upper()}", dados, file_name=nome_arquivo, mime=mime)
@@ -0,0 +1,150 @@
+# voz.py - Síntese de voz (pyttsx3) numa thread dedicada, com cache de frases fixas em disco (sem Streamlit)
+#
+# A voz nunca sai pelos alto-falantes do servidor: todo texto vira um WAV que a página
+# toca no navegador do passageiro.
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Frases faladas sempre iguais: sintetizadas uma vez e servidas como arquivo
+FRASES_FIXAS = [
+    "Motorista a caminho.",
+    "Motorista chegou.",
+    "Nenhum motorista compatível encontrado.",
+    "Por favor, selecione ao menos uma necessidade.",
+    "O sistema de voz está funcionando corretamente.",
+]
+PASTA_CACHE = os.path.join(os.path.dirname(__file__), "cache_voz")
+# Falas esperando o motor; além disso as novas são descartadas
+MAX_FALAS_PENDENTES = 16
+# Quanto a página espera pela síntese de um texto fora do cache antes de desistir dele
+ESPERA_SINTESE_S = 2.0
+# Áudios de textos variáveis (ex.: "3 motoristas encontrados.") mantidos em memória
+MAX_AUDIOS_RECENTES = 32
+VELOCIDADE_FALA = 160
+
+
+def _eh_voz_portugues(voz):
+    nome = voz.name.lower()
+    return "portuguese" in nome or "brazil" in nome
+
+
+class VozEmSegundoPlano:
+    """Um único motor pyttsx3, criado e usado só pela thread da voz.
+
+    A voz em português é procurada uma vez, na criação do motor. Em seguida as
+    FRASES_FIXAS que ainda não estão em PASTA_CACHE são gravadas em arquivo e a
+    thread passa a sintetizar, também em arquivo, os textos pedidos por sintetizar().
+    """
+
+    def __init__(self, pasta_cache=PASTA_CACHE, frases_fixas=FRASES_FIXAS):
+        self.pasta_cache = pasta_cache
+        self.frases_fixas = list(frases_fixas)
+        self.voz_portugues = None  # True/False depois que o motor é criado
+        self.erro = None
+        self._fila = queue.Queue(maxsize=MAX_FALAS_PENDENTES)
+        self._recentes = OrderedDict()  # texto -> WAV (bytes)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._executar, name="voz", daemon=True)
+        self._thread.start()
+
+    def caminho_cache(self, texto):
+        nome = hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.pasta_cache, f"{nome}.wav")
+
+    def arquivo_em_cache(self, texto):
+        """Caminho do áudio já sintetizado para o texto, ou None."""
+        caminho = self.caminho_cache(texto)
+        return caminho if os.path.exists(caminho) else None
+
+    def sintetizar(self, texto, espera_s=ESPERA_SINTESE_S):
+        """WAV (bytes) do texto, para tocar no navegador. Retorna None se a fila estiver
+        cheia, o motor não funcionar ou a síntese passar de espera_s.
+        """
+        with self._lock:
+            audio = self._recentes.get(texto)
+            if audio is not None:
+                self._recentes.move_to_end(texto)
+                return audio
+        if not self._thread.is_alive():
+            return None
+        futuro = Future()
+        try:
+            self._fila.put_nowait((texto, futuro))
+        except queue.Full:
+            return None
+        try:
+            audio = futuro.result(timeout=espera_s)
+        except Exception:
+            # Se ainda estiver na fila, a thread pula este texto
+            futuro.cancel()
+            return None
+        with self._lock:
+            self._recentes[texto] = audio
+            while len(self._recentes) > MAX_AUDIOS_RECENTES:
+                self._recentes.popitem(last=False)
+        return audio
+
+    def _executar(self):
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+            voz_pt = next((voz.id for voz in engine.getProperty('voices') if _eh_voz_portugues(voz)), None)
+            self.voz_portugues = voz_pt is not None
+            if voz_pt:
+                engine.setProperty('voice', voz_pt)
+            engine.setProperty('rate', VELOCIDADE_FALA)
+            engine.setProperty('volume', 1.0)
+            self._sintetizar_frases_fixas(engine)
+        except Exception as e:
+            self.erro = e
+            return
+
+        while True:
+            texto, futuro = self._fila.get()
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            descritor, caminho = tempfile.mkstemp(suffix=".wav", prefix="paratodos_voz_")
+            os.close(descritor)
+            try:
+                engine.save_to_file(texto, caminho)
+                engine.runAndWait()
+                with open(caminho, "rb") as arquivo:
+                    futuro.set_result(arquivo.read())
+            except Exception as e:
+                self.erro = e
+                futuro.set_exception(e)
+            finally:
+                os.remove(caminho)
+
+    def _sintetizar_frases_fixas(self, engine):
+        os.makedirs(self.pasta_cache, exist_ok=True)
+        for frase in self.frases_fixas:
+            caminho = self.caminho_cache(frase)
+            if os.path.exists(caminho):
+                continue
+            # Grava num temporário e renomeia: quem lê nunca vê um arquivo pela metade
+            temporario = caminho + ".tmp.wav"
+            engine.save_to_file(frase, temporario)
+            engine.runAndWait()
+            if os.path.exists(temporario):
+                os.replace(temporario, caminho)
+
+
+_voz = None
+_voz_lock = threading.Lock()
+
+
+def obter_voz():
+    """Retorna o serviço de voz do processo, criando-o na primeira chamada."""
+    global _voz
+    if _voz is None:
+        with _voz_lock:
+            if _voz is None:
+                _voz = VozEmSegundoPlano()
+    return _voz